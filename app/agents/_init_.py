@@ -1,2 +1,2 @@
-from .travel_system_agents import agent as requirements_agent
-__all__ = ["requirements_agent"]
\ No newline at end of file
+from .travel_system_agents import build_requirements_agent, build_planner_agent, build_booker_agent
+__all__ = ["build_requirements_agent", "build_planner_agent", "build_booker_agent"]
\ No newline at end of file
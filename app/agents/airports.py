@@ -0,0 +1,270 @@
+# app/agents/airports.py
+"""
+Local airport and city index for IATA resolution.
+
+A curated table of major airports (airports.csv next to this module, or
+AIRPORT_DATA_PATH with the same columns) is loaded on first use through
+`components` and indexed by normalized name: city, airport name, aliases and
+"city airport" pairs, plus IATA and metro-area codes. `resolve_airports`
+answers "Tokyo", "heathrow", "Kuala Lumpr" or "LON" in-process, trying in turn:
+
+- an airport or metro code, or a name written exactly;
+- names starting with the query (typing "bang" finds Bangkok);
+- names within one or two typos, through an index of single-character
+  deletions so no name has to be compared one by one;
+
+and stopping at the first that matches. Airports of one city or metro area
+come back in file order, main airport first.
+
+`nearby_airports` lists the other airports of the same metro area, then the
+closest others within AIRPORT_NEARBY_RADIUS_KM; the flight tools attach them to
+searches that found no flights.
+"""
+import bisect
+import csv
+import math
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.components import components
+
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), "airports.csv")
+
+# Words dropped from names and queries: "Narita International Airport" -> "narita"
+_GENERIC_WORDS = frozenset({"airport", "airports", "international", "intl", "aeropuerto", "aeroport"})
+_CODE = re.compile(r"^[A-Za-z]{3}$")
+_CODE_IN_TEXT = re.compile(r"\(([A-Za-z]{3})\)")
+
+# Keys scanned per prefix query; plenty for a handful of suggestions
+_MAX_PREFIX_KEYS = 64
+# Names tried for typos: short words match too many names, and the deletion
+# index grows with name length while long "city airport" names are rarely typed
+_MIN_FUZZY_LENGTH = 4
+_MAX_FUZZY_LENGTH = 16
+
+
+class Airport(NamedTuple):
+    iata: str
+    name: str
+    city: str
+    country: str
+    metro: str  # IATA metropolitan-area code shared with other airports, or ""
+    lat: float
+    lon: float
+
+    def describe(self) -> dict:
+        return {"iata": self.iata, "name": self.name, "city": self.city, "country": self.country}
+
+
+def normalize_name(text: str) -> str:
+    """Lower-case, accent- and punctuation-free words without 'airport' etc."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = re.findall(r"[a-z0-9]+", text.replace("'", ""))
+    kept = [word for word in words if word not in _GENERIC_WORDS]
+    return " ".join(kept or words)
+
+
+def _deletions(key: str) -> Iterable[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up (limit + 1) once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _distance_km(a: Airport, b: Airport) -> float:
+    lat1, lat2 = math.radians(a.lat), math.radians(b.lat)
+    dlat, dlon = lat2 - lat1, math.radians(b.lon - a.lon)
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 12742.0 * math.asin(math.sqrt(h))
+
+
+class AirportIndex:
+    """Prefix and typo-tolerant lookups over a fixed list of airports."""
+
+    def __init__(self, airports: Sequence[Airport], aliases: Dict[str, Sequence[str]]):
+        self.airports: Tuple[Airport, ...] = tuple(airports)
+        self._codes: Dict[str, int] = {}
+        self._metros: Dict[str, Tuple[int, ...]] = {}
+        names: Dict[str, List[int]] = {}
+        for position, airport in enumerate(self.airports):
+            self._codes[airport.iata] = position
+            if airport.metro:
+                self._metros[airport.metro] = self._metros.get(airport.metro, ()) + (position,)
+            keys = {airport.city, airport.name, f"{airport.city} {airport.name}", *aliases.get(airport.iata, ())}
+            for key in {normalize_name(key) for key in keys}:
+                if key and position not in names.setdefault(key, []):
+                    names[key].append(position)
+        self._names: Dict[str, Tuple[int, ...]] = {key: tuple(positions) for key, positions in names.items()}
+        self._sorted_names: List[str] = sorted(self._names)
+        deletions: Dict[str, List[str]] = {}
+        for key in self._sorted_names:
+            if _MIN_FUZZY_LENGTH <= len(key) <= _MAX_FUZZY_LENGTH:
+                for deleted in _deletions(key):
+                    deletions.setdefault(deleted, []).append(key)
+        self._deletions: Dict[str, Tuple[str, ...]] = {key: tuple(keys) for key, keys in deletions.items()}
+
+    def __len__(self) -> int:
+        return len(self.airports)
+
+    def get(self, code: Optional[str]) -> Optional[Airport]:
+        position = self._codes.get((code or "").strip().upper())
+        return None if position is None else self.airports[position]
+
+    def is_metro(self, code: Optional[str]) -> bool:
+        code = (code or "").strip().upper()
+        return code in self._metros and code not in self._codes
+
+    def group(self, airport: Airport) -> List[Airport]:
+        """Airports of the same metro area (or city, without one), main airport first."""
+        if airport.metro:
+            return [self.airports[position] for position in self._metros[airport.metro]]
+        return [
+            other for other in self.airports
+            if other.city == airport.city and other.country == airport.country
+        ]
+
+    def _exact(self, query: str, key: str) -> List[int]:
+        positions: List[int] = []
+        if _CODE.match(query):
+            code = query.upper()
+            positions.extend(self._metros.get(code, ()))
+            if code in self._codes and self._codes[code] not in positions:
+                positions.insert(0, self._codes[code])
+        return positions + [p for p in self._names.get(key, ()) if p not in positions]
+
+    def _prefixed(self, key: str) -> List[int]:
+        start = bisect.bisect_left(self._sorted_names, key)
+        matches = []
+        for name in self._sorted_names[start:start + _MAX_PREFIX_KEYS]:
+            if not name.startswith(key):
+                break
+            matches.extend((len(name), position) for position in self._names[name])
+        return [position for _, position in sorted(matches)]
+
+    def _fuzzy(self, key: str) -> List[int]:
+        if not _MIN_FUZZY_LENGTH <= len(key) <= _MAX_FUZZY_LENGTH + 2:
+            return []
+        limit = 1 if len(key) < 8 else 2
+        candidates = set(self._deletions.get(key, ()))
+        for deleted in _deletions(key):
+            if deleted in self._names:
+                candidates.add(deleted)
+            candidates.update(self._deletions.get(deleted, ()))
+        scored = []
+        for name in candidates:
+            distance = _edit_distance(key, name, limit)
+            if distance <= limit:
+                scored.extend((distance, position) for position in self._names[name])
+        return [position for _, position in sorted(scored)]
+
+    def resolve(self, query: str, limit: int = 5, exact: bool = False) -> List[Airport]:
+        """
+        Airports matching a city, airport name, alias or code, best first;
+        `exact` skips the prefix and typo matches.
+        """
+        query = (query or "").strip()
+        in_parentheses = _CODE_IN_TEXT.search(query)
+        if in_parentheses:
+            query = in_parentheses.group(1)
+        key = normalize_name(query)
+        if not key:
+            return []
+        positions = self._exact(query, key)
+        if not positions and not exact:
+            positions = self._prefixed(key) or self._fuzzy(key)
+        seen: Dict[int, None] = dict.fromkeys(positions)
+        return [self.airports[position] for position in list(seen)[:limit]]
+
+    def nearby(self, code: str, limit: int, radius_km: float) -> List[Tuple[Airport, float]]:
+        """Other airports of the metro area, then the closest others within `radius_km`."""
+        origin = self.get(code)
+        if origin is None:
+            return []
+        group = [(other, _distance_km(origin, other)) for other in self.group(origin) if other is not origin]
+        # Cheap latitude band before the great-circle distance (1 degree ~ 111 km)
+        band = radius_km / 111.0
+        close = []
+        for other in self.airports:
+            if other is origin or other.metro and other.metro == origin.metro or abs(other.lat - origin.lat) > band:
+                continue
+            distance = _distance_km(origin, other)
+            if distance <= radius_km and all(other is not member for member, _ in group):
+                close.append((other, distance))
+        close.sort(key=lambda item: item[1])
+        return (group + close)[:limit]
+
+
+def load_airports(path: str) -> AirportIndex:
+    """Index over a CSV of iata,metro,country,city,name,lat,lon,aliases (';'-separated)."""
+    airports: List[Airport] = []
+    aliases: Dict[str, Tuple[str, ...]] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            iata = row["iata"].strip().upper()
+            airports.append(
+                Airport(
+                    iata=iata,
+                    name=row["name"].strip(),
+                    city=row["city"].strip(),
+                    country=row["country"].strip().upper(),
+                    metro=(row.get("metro") or "").strip().upper(),
+                    lat=float(row["lat"]),
+                    lon=float(row["lon"]),
+                )
+            )
+            names = tuple(alias.strip() for alias in (row.get("aliases") or "").split(";") if alias.strip())
+            if names:
+                aliases[iata] = names
+    return AirportIndex(airports, aliases)
+
+
+def build_airport_index() -> AirportIndex:
+    return load_airports(settings.AIRPORT_DATA_PATH or DEFAULT_DATA_PATH)
+
+
+def airport_index() -> AirportIndex:
+    return components.get("airport_index")
+
+
+def get_airport(code: Optional[str]) -> Optional[Airport]:
+    """The indexed airport with this IATA code, if any."""
+    return airport_index().get(code)
+
+
+def resolve_airports(query: str, limit: int = 5, exact: bool = False) -> List[Airport]:
+    """Airports for a city, airport name, alias, airport code or metro code; see `AirportIndex.resolve`."""
+    return airport_index().resolve(query, limit, exact)
+
+
+def nearby_airports(code: str, limit: Optional[int] = None, radius_km: Optional[float] = None) -> List[dict]:
+    """Alternative airports for `code`, closest first, with their distance in km."""
+    index = airport_index()
+    return [
+        {**airport.describe(), "distance_km": round(distance)}
+        for airport, distance in index.nearby(
+            code,
+            limit if limit is not None else settings.AIRPORT_NEARBY_LIMIT,
+            radius_km if radius_km is not None else settings.AIRPORT_NEARBY_RADIUS_KM,
+        )
+    ]
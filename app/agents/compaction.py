@@ -0,0 +1,102 @@
+# app/agents/compaction.py
+"""
+Conversation compaction for the requirements agent loop.
+
+Instead of replaying the whole ask-user conversation on every turn, the agent
+sees the user's opening request, a structured summary of what has already been
+extracted (the partial CompleteRequirements from its previous turn, including
+any confirmed flight) and only the most recent messages that fit a token budget.
+"""
+import json
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+
+# Rough chars-per-token ratio for English/JSON; good enough for budgeting
+_CHARS_PER_TOKEN = 4
+# Per-message overhead (role, separators) in chat-completion formats
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Tool payloads kept in the recent window are truncated to this many characters
+_MAX_TOOL_MESSAGE_CHARS = 1500
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Approximate prompt tokens for a list of messages."""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        total += _MESSAGE_OVERHEAD_TOKENS + len(content) // _CHARS_PER_TOKEN
+        if isinstance(message, AIMessage) and message.tool_calls:
+            total += len(json.dumps(message.tool_calls)) // _CHARS_PER_TOKEN
+    return total
+
+
+def summarize_requirements(requirements: dict) -> dict:
+    """Running summary carried between turns: extracted fields plus what is still missing."""
+    extracted = {k: v for k, v in requirements.items() if k != "missing_info"}
+    missing = (requirements.get("missing_info") or {}).get("missing_info") or []
+    return {"extracted": extracted, "still_missing": missing}
+
+
+def _summary_message(summary: dict) -> HumanMessage:
+    return HumanMessage(
+        content=(
+            "Context from earlier in this conversation (already gathered; do not ask for "
+            "these again unless the user changes them). Fields listed under still_missing "
+            "are placeholders.\n" + json.dumps(summary, separators=(",", ":"))
+        ),
+        name="conversation_summary",
+    )
+
+
+def _trim_tool_payload(message: BaseMessage) -> BaseMessage:
+    if isinstance(message, ToolMessage) and isinstance(message.content, str):
+        if len(message.content) > _MAX_TOOL_MESSAGE_CHARS:
+            return message.model_copy(
+                update={"content": message.content[:_MAX_TOOL_MESSAGE_CHARS] + " …[truncated]"}
+            )
+    return message
+
+
+def _drop_orphaned_tool_messages(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """A window must not start inside a tool-call exchange."""
+    while messages and (
+        isinstance(messages[0], ToolMessage)
+        or (isinstance(messages[0], AIMessage) and messages[0].tool_calls)
+    ):
+        messages = messages[1:]
+    return messages
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    summary: Optional[dict],
+    token_budget: int,
+    keep_last: int,
+) -> List[BaseMessage]:
+    """
+    Messages to send to the agent: the opening request, the running summary
+    and the newest messages (at most `keep_last`) that fit in `token_budget`.
+    Without a summary yet, or when everything fits, the history is returned as is.
+    """
+    messages = list(messages)
+    if summary is None or estimate_tokens(messages) <= token_budget:
+        return messages
+
+    head = [messages[0], _summary_message(summary)]
+    budget = token_budget - estimate_tokens(head)
+
+    recent: List[BaseMessage] = []
+    for message in reversed(messages[1:]):
+        if len(recent) >= keep_last:
+            break
+        message = _trim_tool_payload(message)
+        cost = estimate_tokens([message])
+        # Always keep the newest message (the user's latest answer)
+        if recent and cost > budget:
+            break
+        recent.insert(0, message)
+        budget -= cost
+
+    return head + _drop_orphaned_tool_messages(recent)
@@ -0,0 +1,314 @@
+# app/agents/fast_booking.py
+"""
+Code-driven booking for the booker node.
+
+Everything the booker agent needs is already in the CompleteRequirements dict
+(confirmed flight, dates, room type, contact), so when those inputs are present
+the flight booking and the hotel search/booking run directly and concurrently
+without any LLM turns. `None` means the inputs are incomplete and the caller
+should fall back to the booker agent. A result missing the flight or the hotel
+(booking failed, no hotel passes the hard filters) is not final either: the
+caller hands it to the booker agent, which books only what is missing and may
+relax preferences or retry (see `bookings_complete` and `merge_bookings`).
+"""
+import asyncio
+from datetime import date, timedelta
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from pydantic import BaseModel, ValidationError
+
+from app.agents.response_models.booker_agent import (
+    Bookings,
+    FlightBookingResult,
+    HotelBookingResult,
+)
+from app.agents.response_models.requirments_agent import CompleteRequirements
+from app.agents.tools.booker_tools import (
+    book_flight,
+    book_hotel,
+    hotel_id,
+    rank_hotels,
+    search_hotels,
+)
+
+
+class BookingPlan(BaseModel):
+    """Booking inputs extracted from requirements and itinerary."""
+
+    flight_id: str
+    contact_name: str
+    contact_email: str
+    city: str
+    check_in: str
+    check_out: str
+    room_type: str
+    stars: Optional[str] = None
+    area: Optional[str] = None
+    max_price_per_night: Optional[float] = None
+
+
+def _check_out_date(requirements: CompleteRequirements, itinerary: Optional[dict]) -> Optional[str]:
+    if requirements.trip.return_date:
+        return requirements.trip.return_date
+    # One-way trips: stay until the morning after the last planned day
+    days = (itinerary or {}).get("days") or []
+    if days:
+        last_day = date.fromisoformat(days[-1]["date"])
+        return (last_day + timedelta(days=1)).isoformat()
+    return None
+
+
+def _nightly_budget(
+    hotels_amount: Optional[float], check_in: Optional[str], check_out: Optional[str]
+) -> Optional[float]:
+    if not (hotels_amount and check_in and check_out):
+        return None
+    try:
+        nights = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+    except ValueError:
+        return None
+    return hotels_amount / nights if nights >= 1 else None
+
+
+def plan_bookings(requirements: Optional[dict], itinerary: Optional[dict]) -> Optional[BookingPlan]:
+    """Return the booking inputs, or None if any required one is missing."""
+    if not requirements:
+        return None
+    try:
+        parsed = CompleteRequirements.model_validate(requirements)
+        check_out = _check_out_date(parsed, itinerary)
+    except (ValidationError, ValueError, KeyError):
+        return None
+
+    top_option = parsed.flight_check.outbound_result.top_option
+    traveler = parsed.traveler
+    if not (
+        parsed.user_confirmations.accept_outbound_top_option
+        and top_option is not None
+        and top_option.flight_id
+        and traveler.contact_name
+        and traveler.contact_email
+        and check_out
+    ):
+        return None
+
+    check_in = parsed.trip.depart_date
+    nights = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+    if nights < 1:
+        return None
+
+    return BookingPlan(
+        flight_id=top_option.flight_id,
+        contact_name=traveler.contact_name,
+        contact_email=traveler.contact_email,
+        city=parsed.trip.destination.city,
+        check_in=check_in,
+        check_out=check_out,
+        room_type=parsed.hotel_prefs.room_type or "Standard",
+        stars=parsed.hotel_prefs.stars,
+        area=parsed.hotel_prefs.area,
+        max_price_per_night=_nightly_budget(parsed.budget.hotels_amount, check_in, check_out),
+    )
+
+
+def hotel_search_request(requirements: Optional[dict]) -> Optional[dict]:
+    """
+    search_hotels arguments known as soon as requirements are complete, so the
+    graph can search hotels while the planner builds the itinerary. None for
+    one-way trips: their check-out (and so the nightly budget) comes from the
+    itinerary, and a search without them could never be reused.
+    """
+    trip = (requirements or {}).get("trip") or {}
+    city = (trip.get("destination") or {}).get("city")
+    if not city or not trip.get("return_date"):
+        return None
+    hotel_prefs = requirements.get("hotel_prefs") or {}
+    budget = requirements.get("budget") or {}
+    return {
+        "city": city,
+        "check_in": trip.get("depart_date"),
+        "check_out": trip["return_date"],
+        "stars": hotel_prefs.get("stars"),
+        "area": hotel_prefs.get("area"),
+        "room_type": hotel_prefs.get("room_type"),
+        "max_price_per_night": _nightly_budget(
+            budget.get("hotels_amount"), trip.get("depart_date"), trip.get("return_date")
+        ),
+    }
+
+
+def _flight_args(plan: BookingPlan) -> dict:
+    return {
+        "flight_id": plan.flight_id,
+        "passenger_name": plan.contact_name,
+        "passenger_email": plan.contact_email,
+    }
+
+
+def _hotel_search_args(plan: BookingPlan) -> dict:
+    return {
+        "city": plan.city,
+        "check_in": plan.check_in,
+        "check_out": plan.check_out,
+        "stars": plan.stars,
+        "area": plan.area,
+        "room_type": plan.room_type,
+        "max_price_per_night": plan.max_price_per_night,
+    }
+
+
+def _choose_hotel(plan: BookingPlan, search_result: dict) -> Optional[dict]:
+    ranked = rank_hotels(
+        search_result.get("hotels", []),
+        stars=plan.stars,
+        area=plan.area,
+        room_type=plan.room_type,
+        max_price_per_night=plan.max_price_per_night,
+    )
+    return ranked[0] if ranked else None
+
+
+def _hotel_booking_args(plan: BookingPlan, hotel: dict) -> dict:
+    return {
+        "hotel_id": hotel_id(hotel),
+        "guest_name": plan.contact_name,
+        "guest_email": plan.contact_email,
+        "check_in_date": plan.check_in,
+        "check_out_date": plan.check_out,
+        "room_type": plan.room_type,
+    }
+
+
+def _bookings(
+    plan: BookingPlan, flight_result: dict, hotel: Optional[dict], hotel_result: Optional[dict]
+) -> Bookings:
+    flights = None
+    if flight_result.get("success"):
+        flights = FlightBookingResult(
+            booking_id=str(flight_result.get("booking_id")),
+            status=str(flight_result.get("status")),
+            ticket_ref=str(flight_result.get("booking_reference")),
+            flight_id=plan.flight_id,
+        )
+
+    hotels = None
+    if hotel is not None and hotel_result and hotel_result.get("success"):
+        hotels = HotelBookingResult(
+            booking_id=str(hotel_result.get("booking_id")),
+            status=str(hotel_result.get("status")),
+            reservation_ref=str(hotel_result.get("booking_reference")),
+            hotel_id=str(hotel_id(hotel)),
+            total_price=float(hotel_result.get("total_price") or 0.0),
+        )
+
+    return Bookings(flights=flights, hotels=hotels)
+
+
+def _same_budget(requested: Optional[float], planned: Optional[float]) -> bool:
+    if requested is None or planned is None:
+        return requested is planned
+    return abs(requested - planned) < 0.01
+
+
+def bookings_complete(bookings: Optional[Bookings]) -> bool:
+    """Both the flight and the hotel are booked."""
+    return bookings is not None and bookings.flights is not None and bookings.hotels is not None
+
+
+def merge_bookings(booked: Optional[Bookings], agent_bookings: Bookings) -> Bookings:
+    """The booker agent's result, keeping the confirmations the fast path already made."""
+    if booked is None:
+        return agent_bookings
+    return Bookings(
+        flights=booked.flights or agent_bookings.flights,
+        hotels=booked.hotels or agent_bookings.hotels,
+    )
+
+
+def _usable_prefetch(plan: BookingPlan, hotel_options: Optional[dict]) -> Optional[dict]:
+    """
+    Prefetched search result, if it was made for exactly this city, these dates
+    and this nightly budget. A one-way prefetch has no check-out and so no
+    budget: its few top-rated hotels are not the cheaper ones a budget needs.
+    """
+    if not hotel_options or hotel_options.get("result", {}).get("error"):
+        return None
+    request = hotel_options.get("request") or {}
+    if request.get("city") != plan.city or request.get("check_in") != plan.check_in:
+        return None
+    if request.get("check_out") != plan.check_out:
+        return None
+    if not _same_budget(request.get("max_price_per_night"), plan.max_price_per_night):
+        return None
+    return hotel_options["result"]
+
+
+def _search_and_book_hotel(plan: BookingPlan, hotel_options: Optional[dict]) -> tuple:
+    search_result = _usable_prefetch(plan, hotel_options)
+    if search_result is None:
+        search_result = search_hotels.invoke(_hotel_search_args(plan))
+    hotel = _choose_hotel(plan, search_result)
+    if hotel is None:
+        return None, None
+    return hotel, book_hotel.invoke(_hotel_booking_args(plan, hotel))
+
+
+async def _asearch_and_book_hotel(
+    plan: BookingPlan, hotel_options: Optional[dict], config: Optional[RunnableConfig]
+) -> tuple:
+    search_result = _usable_prefetch(plan, hotel_options)
+    if search_result is None:
+        search_result = await search_hotels.ainvoke(_hotel_search_args(plan), config)
+    hotel = _choose_hotel(plan, search_result)
+    if hotel is None:
+        return None, None
+    return hotel, await book_hotel.ainvoke(_hotel_booking_args(plan, hotel), config)
+
+
+def book_from_requirements(
+    requirements: Optional[dict],
+    itinerary: Optional[dict],
+    hotel_options: Optional[dict] = None,
+) -> Optional[Bookings]:
+    """
+    Book flight and hotel without the LLM; None if inputs are incomplete.
+
+    `hotel_options` is the graph's prefetched hotel search, reused when it
+    matches the booking city and dates.
+    """
+    plan = plan_bookings(requirements, itinerary)
+    if plan is None:
+        return None
+
+    # Context-copying pool so the tool calls stay attached to the node's run
+    with ContextThreadPoolExecutor(max_workers=2) as executor:
+        flight_future = executor.submit(book_flight.invoke, _flight_args(plan))
+        hotel_future = executor.submit(_search_and_book_hotel, plan, hotel_options)
+        flight_result = flight_future.result()
+        hotel, hotel_result = hotel_future.result()
+
+    return _bookings(plan, flight_result, hotel, hotel_result)
+
+
+async def abook_from_requirements(
+    requirements: Optional[dict],
+    itinerary: Optional[dict],
+    hotel_options: Optional[dict] = None,
+    config: Optional[RunnableConfig] = None,
+) -> Optional[Bookings]:
+    """
+    Async variant of `book_from_requirements`. `config` is the calling node's
+    config, passed on so the tool calls are traced as part of its run.
+    """
+    plan = plan_bookings(requirements, itinerary)
+    if plan is None:
+        return None
+
+    flight_result, (hotel, hotel_result) = await asyncio.gather(
+        book_flight.ainvoke(_flight_args(plan), config),
+        _asearch_and_book_hotel(plan, hotel_options, config),
+    )
+
+    return _bookings(plan, flight_result, hotel, hotel_result)
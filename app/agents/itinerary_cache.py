@@ -0,0 +1,121 @@
+# app/agents/itinerary_cache.py
+"""
+Memoized planner itineraries.
+
+An itinerary depends only on where and when the trip is, what the travelers
+are interested in and roughly how much they can spend, so those fields are
+normalized into a canonical key. Repeated plans for the same key (group
+bookings, retries, re-runs after a booking failure) are served from the cache
+without calling the planner agent or its web searches.
+"""
+import asyncio
+import bisect
+import copy
+import hashlib
+import json
+import re
+from typing import Optional
+
+from app.config import settings
+from app.core.cache import SQLiteCache, TTLCache
+from app.core.metrics import registry
+
+
+# Upper bounds of the total-budget bands; amounts within a band share plans
+_BUDGET_BANDS = (500, 1000, 2000, 3500, 5000, 7500, 10000, 15000, 25000)
+
+
+def _text(value: Optional[str]) -> Optional[str]:
+    return " ".join(value.casefold().split()) if value else None
+
+
+def _budget_band(budget: dict) -> Optional[str]:
+    amount = budget.get("total_amount")
+    if amount is None:
+        return None
+    currency = (budget.get("total_currency") or "").upper()
+    return f"{currency}:{bisect.bisect_right(_BUDGET_BANDS, float(amount))}"
+
+
+def itinerary_key(requirements: Optional[dict]) -> Optional[str]:
+    """
+    Hash of the itinerary-relevant fields: destination, dates, interests and
+    budget band. None when the destination or departure date is unknown.
+    """
+    trip = (requirements or {}).get("trip") or {}
+    destination = trip.get("destination") or {}
+    city = _text(destination.get("city"))
+    if not city or not trip.get("depart_date"):
+        return None
+
+    interests = (requirements.get("preferences") or {}).get("interests") or []
+    canonical = {
+        "city": city,
+        "airport": _text(destination.get("airport_iata")),
+        "depart_date": trip.get("depart_date"),
+        "return_date": trip.get("return_date"),
+        "interests": sorted({re.sub(r"\s+", " ", i.strip().casefold()) for i in interests if i}),
+        "budget": _budget_band(requirements.get("budget") or {}),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _build_cache():
+    backend = settings.ITINERARY_CACHE_BACKEND.lower()
+    if backend == "sqlite":
+        return SQLiteCache(
+            path=settings.SEARCH_CACHE_PATH,
+            namespace="itinerary",
+            ttl=settings.ITINERARY_CACHE_TTL_SECONDS,
+            max_entries=settings.ITINERARY_CACHE_MAX_ENTRIES,
+        )
+    if backend == "memory":
+        return TTLCache(
+            maxsize=settings.ITINERARY_CACHE_MAX_ENTRIES,
+            ttl=settings.ITINERARY_CACHE_TTL_SECONDS,
+            name="itinerary",
+        )
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown ITINERARY_CACHE_BACKEND: {settings.ITINERARY_CACHE_BACKEND!r}")
+
+
+itinerary_cache = _build_cache()
+if itinerary_cache is not None:
+    registry.register_cache(itinerary_cache.stats)
+
+
+def cached_itinerary(requirements: Optional[dict]) -> Optional[dict]:
+    """Previously planned itinerary for equivalent requirements, or None."""
+    key = itinerary_key(requirements)
+    if itinerary_cache is None or key is None:
+        return None
+    itinerary = itinerary_cache.get(key)
+    # In-memory entries are shared; callers get their own copy
+    return copy.deepcopy(itinerary) if itinerary is not None else None
+
+
+def store_itinerary(requirements: Optional[dict], itinerary: dict) -> None:
+    key = itinerary_key(requirements)
+    if itinerary_cache is not None and key is not None and itinerary.get("days"):
+        itinerary_cache.set(key, itinerary)
+
+
+async def acached_itinerary(requirements: Optional[dict]) -> Optional[dict]:
+    """`cached_itinerary`, on a worker thread for the SQLite backend."""
+    if isinstance(itinerary_cache, SQLiteCache):
+        return await asyncio.to_thread(cached_itinerary, requirements)
+    return cached_itinerary(requirements)
+
+
+async def astore_itinerary(requirements: Optional[dict], itinerary: dict) -> None:
+    if isinstance(itinerary_cache, SQLiteCache):
+        await asyncio.to_thread(store_itinerary, requirements, itinerary)
+    else:
+        store_itinerary(requirements, itinerary)
+
+
+def itinerary_cache_stats() -> dict:
+    """Hit/miss counters for the itinerary cache."""
+    return itinerary_cache.stats() if itinerary_cache is not None else {}
@@ -0,0 +1,404 @@
+# app/agents/requirements_extraction.py
+"""
+Deterministic requirement parsing and validation around the requirements agent.
+
+The prompt's validation rules (ISO dates, departure <= return, origin !=
+destination, at least one adult) are checked here in code, on every result the
+agent reports as complete:
+
+- values the code can repair unambiguously are normalized (dates written as
+  "March 10, 2026" or "2026/03/10", lower-case or "Seoul (ICN)" airport codes,
+  "round trip" for round_trip);
+- a missing airport code is looked up from the airport or city name in the
+  local airport index (app/agents/airports.py) when it names a single airport;
+- anything that needs the user becomes the next question, written here, so a
+  bad result costs no further LLM call. A city or metro code with several
+  airports is asked about by name ("Tokyo has several airports: ...").
+
+Before the agent runs, `fill_missing` handles the simplest follow-up turns:
+when the agent's last question asked only for fields that can be read straight
+from text (contact name/email, traveler counts, a "yes" to the proposed flight,
+cabin, non-stop, date flexibility) and the user's answer contains them and
+little else, the requirements are completed in code without an LLM turn. A
+"yes" only counts when it is unqualified: "ok but not that one" or "yes, but
+a cheaper one?" go to the LLM.
+"""
+import copy
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from app.agents.airports import airport_index
+from app.agents.response_models.requirments_agent import CompleteRequirements
+
+
+# Words of an answer left over after the parsed values; more than this and the
+# user probably said something the code does not understand, so the LLM runs
+_MAX_UNPARSED_WORDS = 10
+# A "yes" to the proposed flight books it, so it is taken in code only when it
+# is all the answer says ("yes please", "sounds good, book it")
+_MAX_CONFIRMATION_UNPARSED_WORDS = 2
+
+_MONTHS = {
+    name: index
+    for index, names in enumerate(
+        (
+            ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+            ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+            ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+        ),
+        start=1,
+    )
+    for name in names
+}
+_MONTH = r"(?P<month>" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\.?"
+
+_DATE_PATTERNS = (
+    re.compile(r"\b(?P<year>\d{4})[-/.](?P<month>\d{1,2})[-/.](?P<day>\d{1,2})\b"),
+    re.compile(rf"(?i)\b{_MONTH}\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<year>\d{{4}}))?\b"),
+    re.compile(rf"(?i)\b(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(?P<year>\d{{4}}))?\b"),
+)
+
+_IATA = re.compile(r"^[A-Z]{3}$")
+_IATA_IN_TEXT = re.compile(r"\(([A-Za-z]{3})\)")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+_NUMBERS = {
+    "no": 0, "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_COUNT = r"(?P<count>\d{1,2}|" + "|".join(_NUMBERS) + r")"
+_ADULTS = re.compile(rf"(?i)\b{_COUNT}\s+(?:adults?|grown-?ups?|people|persons|passengers|travell?ers)\b")
+_SOLO = re.compile(r"(?i)\b(?:just me|only me|solo|by myself|alone)\b")
+_CHILDREN = re.compile(rf"(?i)\b{_COUNT}\s+(?:children|child|kids?)\b")
+
+_NAME = r"(?P<name>[A-Z][\w'.-]*(?:\s+[A-Z0-9][\w'.-]*){0,3})"
+_NAME_INTRO = re.compile(rf"(?i:\b(?:my name is|name is|name:|contact:|lead traveler(?: is)?:?))\s+{_NAME}")
+# "Ana Perera <ana@example.com>": searched only in the text before the email,
+# so a name is never cut out of the email's local part ("John.Smith@...")
+_NAME_BEFORE_EMAIL = re.compile(rf"{_NAME}(?:\s*[<(\[,–-]\s*|\s+)$")
+
+_YES = re.compile(
+    r"(?i)^\W*(?:yes|yeah|yep|sure|ok(?:ay)?|sounds good|that works|works for me|"
+    r"confirm(?:ed)?|go ahead|book it|perfect|great)\b"
+)
+# "ok but not that one", "yes, but a cheaper one instead?": not a plain yes
+_QUALIFIED = re.compile(
+    r"(?i)\b(?:but|not|no|nope|don'?t|instead|another|other|different|"
+    r"cheaper|later|earlier|else|rather|change)\b|n't\b"
+)
+_CABINS = (
+    (re.compile(r"(?i)\bpremium(?:\s+economy)?\b"), "premium"),
+    (re.compile(r"(?i)\bbusiness\b"), "business"),
+    (re.compile(r"(?i)\beconomy\b"), "economy"),
+)
+_NON_STOP = re.compile(r"(?i)\b(?:non-?stop|direct)\b")
+_STOPS_OK = re.compile(r"(?i)\b(?:layovers?|stops?|connections?)\s+(?:are\s+|is\s+)?(?:fine|ok(?:ay)?)\b")
+_FLEX = re.compile(r"(?i)(?:±|\+/-|\+-|plus or minus|flexible by|flex(?:ibility)? of)\s*(?P<days>\d{1,2})\s*days?\b")
+_FIXED_DATES = re.compile(r"(?i)\b(?:fixed dates|not flexible|no flexibility)\b")
+
+# Missing-field names the agent reports (last path segment) -> values this module can read
+_FILLABLE = {
+    "contact_name": ("contact_name",),
+    "name": ("contact_name",),
+    "contact_email": ("contact_email",),
+    "email": ("contact_email",),
+    "contact": ("contact_name", "contact_email"),
+    "lead_traveler": ("contact_name", "contact_email"),
+    "adults": ("adults",),
+    "children": ("children",),
+    "accept_outbound_top_option": ("accept_outbound_top_option",),
+    "user_confirmations": ("accept_outbound_top_option",),
+    "cabin_class": ("cabin_class",),
+    "non_stop": ("non_stop",),
+    "date_flex_days": ("date_flex_days",),
+}
+
+# Value -> location in CompleteRequirements
+_PATHS = {
+    "contact_name": ("traveler", "contact_name"),
+    "contact_email": ("traveler", "contact_email"),
+    "adults": ("traveler", "adults"),
+    "children": ("traveler", "children"),
+    "accept_outbound_top_option": ("user_confirmations", "accept_outbound_top_option"),
+    "cabin_class": ("preferences", "cabin_class"),
+    "non_stop": ("preferences", "non_stop"),
+    "date_flex_days": ("preferences", "date_flex_days"),
+}
+
+
+# --- parsing -----------------------------------------------------------------
+
+
+def _date_from_match(match: re.Match, today: date) -> Optional[date]:
+    month = match.group("month")
+    month = int(month) if month.isdigit() else _MONTHS[month.lower().rstrip(".")]
+    day = int(match.group("day"))
+    year = match.group("year")
+    try:
+        if year:
+            return date(int(year), month, day)
+        # No year: the next such day from today
+        candidate = date(today.year, month, day)
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def find_dates(text: str, today: Optional[date] = None) -> List[Tuple[int, str]]:
+    """(position, ISO date) for every date written in `text`, in order."""
+    today = today or date.today()
+    found: Dict[int, str] = {}
+    taken: List[range] = []
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(match.start() in span for span in taken):
+                continue
+            parsed = _date_from_match(match, today)
+            if parsed is not None:
+                found[match.start()] = parsed.isoformat()
+                taken.append(range(match.start(), match.end()))
+    return sorted(found.items())
+
+
+def parse_date(value: Optional[str], today: Optional[date] = None) -> Optional[str]:
+    """A single date in any supported spelling, as YYYY-MM-DD; None if there is none."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        pass
+    dates = find_dates(value, today)
+    return dates[0][1] if len(dates) == 1 else None
+
+
+def normalize_iata(value: Optional[str]) -> Optional[str]:
+    """'icn', ' ICN ' or 'Seoul (ICN)' -> 'ICN'; None if no code can be read."""
+    value = (value or "").strip()
+    in_parentheses = _IATA_IN_TEXT.search(value)
+    if in_parentheses:
+        value = in_parentheses.group(1)
+    value = value.upper()
+    return value if _IATA.match(value) else None
+
+
+def _count(match: Optional[re.Match]) -> Optional[int]:
+    if match is None:
+        return None
+    count = match.group("count").lower()
+    return int(count) if count.isdigit() else _NUMBERS[count]
+
+
+def extract_answer(text: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Values a short answer states outright, keyed as in `_PATHS`, and the number
+    of words of `text` not accounted for by them.
+    """
+    values: Dict[str, Any] = {}
+    spans: List[Tuple[int, int]] = []
+
+    def found(key: str, value: Any, match: re.Match, group: Union[int, str] = 0) -> None:
+        values.setdefault(key, value)
+        spans.append(match.span(group))
+
+    email = _EMAIL.search(text)
+    if email:
+        found("contact_email", email.group(0), email)
+    name = _NAME_INTRO.search(text)
+    if name and email and name.start("name") < email.end() and email.start() < name.end("name"):
+        name = None  # "my name is John.Smith@example.com"
+    if name is None and email:
+        name = _NAME_BEFORE_EMAIL.search(text, 0, email.start())
+    if name:
+        found("contact_name", name.group("name").strip(" .,-"), name, "name")
+
+    adults = _ADULTS.search(text)
+    if adults:
+        found("adults", _count(adults), adults)
+    else:
+        solo = _SOLO.search(text)
+        if solo:
+            found("adults", 1, solo)
+    children = _CHILDREN.search(text)
+    if children:
+        found("children", _count(children), children)
+
+    yes = _YES.search(text)
+    if yes and not _QUALIFIED.search(text):
+        found("accept_outbound_top_option", True, yes)
+    for pattern, cabin in _CABINS:
+        match = pattern.search(text)
+        if match:
+            found("cabin_class", cabin, match)
+            break
+    non_stop = _NON_STOP.search(text)
+    stops_ok = _STOPS_OK.search(text)
+    if non_stop:
+        found("non_stop", True, non_stop)
+    elif stops_ok:
+        found("non_stop", False, stops_ok)
+    flex = _FLEX.search(text)
+    fixed = _FIXED_DATES.search(text)
+    if flex:
+        found("date_flex_days", int(flex.group("days")), flex)
+    elif fixed:
+        found("date_flex_days", 0, fixed)
+
+    rest = list(text)
+    for start, end in spans:
+        rest[start:end] = " " * (end - start)
+    return values, len(re.findall(r"\w+", "".join(rest)))
+
+
+# --- validation --------------------------------------------------------------
+
+
+Problem = Tuple[str, str]  # (field path, question for the user)
+
+
+def _airport_choices(airports: list) -> str:
+    names = [f"{airport.iata} ({airport.name})" for airport in airports]
+    return ", ".join(names[:-1]) + " or " + names[-1]
+
+
+def _resolve_airport(airport: dict, side: str) -> Tuple[Optional[str], Optional[Problem]]:
+    """IATA code for one end of the trip, filling the city from the index; or the question to ask."""
+    index = airport_index()
+    field = f"trip.{side}.airport_iata"
+    direction = "from" if side == "origin" else "to"
+    text = (airport.get("airport_iata") or "").strip()
+    code = normalize_iata(text)
+    candidates: list = []
+    if code and index.is_metro(code):
+        # "TYO" names a metro area, not an airport the flight search knows
+        candidates, code = index.resolve(code), None
+    elif code is None:
+        candidates = index.resolve(text, exact=True) if text else []
+        candidates = candidates or index.resolve(airport.get("city") or "", exact=True)
+        if len(candidates) == 1:
+            code = candidates[0].iata
+    if code is None:
+        if len(candidates) > 1:
+            place = airport.get("city") or candidates[0].city
+            return None, (field, f"{place} has several airports: {_airport_choices(candidates)}. Which one are you flying {direction}?")
+        return None, (field, f"Which airport are you flying {direction}?")
+    known = index.get(code)
+    if known is not None and not (airport.get("city") or "").strip():
+        airport["city"] = known.city
+    return code, None
+
+
+def validate_requirements(requirements: dict, today: Optional[date] = None) -> Tuple[dict, List[Problem]]:
+    """
+    Normalized copy of complete requirements and the problems left that only
+    the user can fix (empty when they satisfy every rule).
+    """
+    requirements = copy.deepcopy(requirements)
+    problems: List[Problem] = []
+    trip = requirements.get("trip") or {}
+    traveler = requirements.get("traveler") or {}
+
+    for side in ("origin", "destination"):
+        airport = trip.get(side) or {}
+        code, problem = _resolve_airport(airport, side)
+        if problem:
+            problems.append(problem)
+        else:
+            airport["airport_iata"] = code
+    origin = (trip.get("origin") or {}).get("airport_iata")
+    destination = (trip.get("destination") or {}).get("airport_iata")
+    if origin and origin == destination:
+        problems.append(("trip.destination.airport_iata", f"The origin and destination are both {origin}; where would you like to go?"))
+
+    trip_type = re.sub(r"[\s-]+", "_", str(trip.get("type") or "").strip().lower())
+    if trip_type in ("one_way", "round_trip"):
+        trip["type"] = trip_type
+    depart = parse_date(trip.get("depart_date"), today)
+    if depart is None:
+        problems.append(("trip.depart_date", "What is your departure date (YYYY-MM-DD)?"))
+    else:
+        trip["depart_date"] = depart
+    returning = None
+    if trip.get("return_date"):
+        returning = parse_date(trip["return_date"], today)
+        if returning is None:
+            problems.append(("trip.return_date", "What is your return date (YYYY-MM-DD)?"))
+        else:
+            trip["return_date"] = returning
+    elif trip.get("type") == "round_trip":
+        problems.append(("trip.return_date", "What is your return date for the round trip?"))
+    if depart and returning and returning < depart:
+        problems.append(("trip.return_date", f"The return date ({returning}) is before the departure date ({depart}); could you check your dates?"))
+
+    for leg in ("outbound_query", "return_query"):
+        query = (requirements.get("flight_check") or {}).get(leg) or {}
+        for key in ("from_iata", "to_iata"):
+            if query.get(key):
+                query[key] = normalize_iata(query[key]) or query[key]
+        if query.get("date"):
+            query["date"] = parse_date(query["date"], today) or query["date"]
+
+    if not isinstance(traveler.get("adults"), int) or traveler["adults"] < 1:
+        problems.append(("traveler.adults", "How many adults are traveling (at least one)?"))
+    if not isinstance(traveler.get("children"), int) or traveler["children"] < 0:
+        problems.append(("traveler.children", "How many children are traveling?"))
+    if not (traveler.get("contact_name") or "").strip():
+        problems.append(("traveler.contact_name", "What is the lead traveler's full name?"))
+    email = (traveler.get("contact_email") or "").strip()
+    if not _EMAIL.fullmatch(email):
+        problems.append(("traveler.contact_email", "What email address should we use for the bookings?"))
+    return requirements, problems
+
+
+def problems_question(problems: List[Problem]) -> str:
+    """The message asking the user to fix `problems`."""
+    return "Before I continue: " + " ".join(question for _, question in problems)
+
+
+# --- code-only turns ---------------------------------------------------------
+
+
+def fill_missing(summary: Optional[dict], answer: str, today: Optional[date] = None) -> Optional[dict]:
+    """
+    Complete requirements from the previous turn's summary and the user's
+    answer, or None when the answer needs the LLM: a missing field this module
+    cannot read, a value absent from the answer, too much unparsed text, or a
+    result that fails validation.
+    """
+    missing = (summary or {}).get("still_missing") or []
+    if not missing:
+        return None
+    keys: List[str] = []
+    for field in missing:
+        fillable = _FILLABLE.get(str(field).rsplit(".", 1)[-1].strip().lower())
+        if fillable is None:
+            return None
+        keys.extend(key for key in fillable if key not in keys)
+
+    values, unparsed = extract_answer(answer)
+    if unparsed > _MAX_UNPARSED_WORDS or any(key not in values for key in keys):
+        return None
+    if "accept_outbound_top_option" in keys and unparsed > _MAX_CONFIRMATION_UNPARSED_WORDS:
+        return None
+
+    requirements = copy.deepcopy(summary.get("extracted") or {})
+    for key in keys:
+        section, name = _PATHS[key]
+        requirements.setdefault(section, {})[name] = values[key]
+    traveler = requirements.get("traveler") or {}
+    if "adults" in keys or "children" in keys:
+        # The flight availability was checked for a passenger count; a different one needs a new search
+        query = (requirements.get("flight_check") or {}).get("outbound_query") or {}
+        if query.get("passengers") != (traveler.get("adults") or 0) + (traveler.get("children") or 0):
+            return None
+    requirements["missing_info"] = {"missing_info": [], "question": ""}
+
+    try:
+        requirements = CompleteRequirements.model_validate(requirements).model_dump()
+    except ValidationError:
+        return None
+    requirements, problems = validate_requirements(requirements, today)
+    return None if problems else requirements
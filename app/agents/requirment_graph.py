@@ -1,56 +1,194 @@
 import json
-from typing import Optional
+from typing import List, Optional
 
 from langchain.messages import HumanMessage, AIMessage
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.types import interrupt, Command
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import var_child_runnable_config
 
-# from app.agents.travel_system_agents import requirements_agent
-
-
-checkpointer = InMemorySaver()
+from app.agents.compaction import compact_messages, summarize_requirements
+from app.agents.requirements_extraction import (
+    fill_missing,
+    normalize_iata,
+    parse_date,
+    problems_question,
+    validate_requirements,
+)
+from app.agents.tools.flight_tools import aprefetch_flights, prefetch_flights
+from app.config import settings
+from app.core.checkpoint import get_checkpointer
+from app.core.components import components
+from app.core.llm import fast_routing_enabled
+from app.core.metrics import REQUIREMENTS_ROUTES, instrumentation_callbacks
+from app.core.rate_limit import llm_request_context, session_id
 
-from app.agents import requirements_agent
 
 class RequirementsGraphState(MessagesState):
     requirements_complete: bool
     interruption_message: str
     requirements: Optional[dict]
+    requirements_summary: Optional[dict]  # running summary of fields extracted so far
 
 
-def requirements_agent_node(state: RequirementsGraphState) -> RequirementsGraphState:
-    response = requirements_agent.invoke({"messages": state["messages"]})
-
-    response = response["structured_response"]
-    requirements_response = response.requirements
+def _question_update(question: str, requirements: dict) -> RequirementsGraphState:
+    return {
+        "messages": [AIMessage(content=question)],
+        "interruption_message": question,
+        "requirements_complete": False,
+        "requirements": None,
+        "requirements_summary": summarize_requirements(requirements),
+    }
 
-    if requirements_response.missing_info.question != "":
-        return {
-            "messages": [
-                AIMessage(content=requirements_response.missing_info.question)
-            ],
-            "interruption_message": requirements_response.missing_info.question,
-            "requirements_complete": False,
-            "requirements": None,
-        }
 
+def _complete_update(requirements: dict) -> RequirementsGraphState:
     # Store complete requirements as dict in state
     return {
         "messages": [],
         "requirements_complete": True,
         "interruption_message": "",
-        "requirements": requirements_response.model_dump(),
+        "requirements": requirements,
+    }
+
+
+def _requirements_update(response: dict) -> RequirementsGraphState:
+    requirements = response["structured_response"].requirements.model_dump()
+    question = requirements["missing_info"]["question"]
+    if question != "":
+        return _question_update(question, requirements)
+
+    # The prompt's validation rules, enforced in code: what the user must fix
+    # becomes the next question without another LLM call
+    requirements, problems = validate_requirements(requirements)
+    if problems:
+        question = problems_question(problems)
+        requirements["missing_info"] = {
+            "missing_info": [field for field, _ in problems],
+            "question": question,
+        }
+        return _question_update(question, requirements)
+    return _complete_update(requirements)
+
+
+def _code_turn(state: RequirementsGraphState) -> Optional[RequirementsGraphState]:
+    """A follow-up answer that completes the requirements without the agent, if any."""
+    if not settings.REQUIREMENTS_CODE_FILL or not state["messages"]:
+        return None
+    answer = state["messages"][-1]
+    if not isinstance(answer, HumanMessage):
+        return None
+    requirements = fill_missing(state.get("requirements_summary"), str(answer.content))
+    if requirements is None:
+        return None
+    REQUIREMENTS_ROUTES.inc(route="code")
+    return _complete_update(requirements)
+
+
+def _speculative_legs(response: dict) -> List[tuple]:
+    """
+    Flight searches the agent is likely to make next, from the partial
+    requirements of a turn that still has questions: the outbound route
+    (dated if known) and, with a return date, the return leg.
+    """
+    requirements = response["structured_response"].requirements
+    if requirements.missing_info.question == "":
+        return []
+    trip = requirements.trip
+    origin, destination = normalize_iata(trip.origin.airport_iata), normalize_iata(trip.destination.airport_iata)
+    if not origin or not destination or origin == destination:
+        return []
+
+    legs = [(origin, destination, parse_date(trip.depart_date))]
+    return_date = parse_date(trip.return_date)
+    if return_date:
+        legs.append((destination, origin, return_date))
+    return legs
+
+
+def _agent_input(state: RequirementsGraphState) -> dict:
+    # Keep per-turn prompt size flat: summary of earlier turns + recent messages
+    return {
+        "messages": compact_messages(
+            state["messages"],
+            state.get("requirements_summary"),
+            token_budget=settings.REQUIREMENTS_HISTORY_TOKEN_BUDGET,
+            keep_last=settings.REQUIREMENTS_KEEP_LAST_MESSAGES,
+        )
     }
 
 
+def _is_complete(response: dict) -> bool:
+    requirements = response["structured_response"].requirements
+    if requirements.missing_info.question != "":
+        return False
+    # A result failing validation turns into a question in code; no need to escalate
+    return not validate_requirements(requirements.model_dump())[1]
+
+
+# Model routing: clarifying turns are answered by the fast model. When it finds
+# the requirements complete, the turn is redone on the requirements model, so
+# the final CompleteRequirements extraction comes from the larger model (or,
+# for answers `_code_turn` handles, from code without either model).
+
+
+def _invoke_requirements_agent(agent_input: dict) -> dict:
+    if fast_routing_enabled():
+        response = components.get("requirements_fast_agent").invoke(agent_input)
+        if not _is_complete(response):
+            REQUIREMENTS_ROUTES.inc(route="fast")
+            return response
+        REQUIREMENTS_ROUTES.inc(route="escalated")
+    else:
+        REQUIREMENTS_ROUTES.inc(route="direct")
+    return components.get("requirements_agent").invoke(agent_input)
+
+
+async def _ainvoke_requirements_agent(agent_input: dict, config: RunnableConfig) -> dict:
+    if fast_routing_enabled():
+        response = await components.get("requirements_fast_agent").ainvoke(agent_input, config)
+        if not _is_complete(response):
+            REQUIREMENTS_ROUTES.inc(route="fast")
+            return response
+        REQUIREMENTS_ROUTES.inc(route="escalated")
+    else:
+        REQUIREMENTS_ROUTES.inc(route="direct")
+    return await components.get("requirements_agent").ainvoke(agent_input, config)
+
+
+def requirements_agent_node(
+    state: RequirementsGraphState, config: RunnableConfig
+) -> RequirementsGraphState:
+    update = _code_turn(state)
+    if update is not None:
+        return update
+    # The user is waiting on this turn: admitted ahead of background planning
+    with llm_request_context(session_id(config), "interactive"):
+        response = _invoke_requirements_agent(_agent_input(state))
+    if settings.FLIGHT_PREFETCH:
+        # Searches run while the user answers; the tool call then hits the cache
+        prefetch_flights(_speculative_legs(response))
+    return _requirements_update(response)
+
+
+async def arequirements_agent_node(
+    state: RequirementsGraphState, config: RunnableConfig
+) -> RequirementsGraphState:
+    update = _code_turn(state)
+    if update is not None:
+        return update
+    # Pass config explicitly so token streaming reaches the agent on Python < 3.11
+    with llm_request_context(session_id(config), "interactive"):
+        response = await _ainvoke_requirements_agent(_agent_input(state), config)
+    if settings.FLIGHT_PREFETCH:
+        aprefetch_flights(_speculative_legs(response))
+    return _requirements_update(response)
+
+
 def should_ask_user_for_info(state: RequirementsGraphState) -> bool:
     return not state["requirements_complete"]
 
 
-def ask_user_for_info(state: RequirementsGraphState) -> RequirementsGraphState:
-    user_response = interrupt(state["interruption_message"])
-
+def _user_response_update(user_response: str) -> RequirementsGraphState:
     return {
         "messages": [HumanMessage(content=user_response)],
         "interruption_message": "",
@@ -59,9 +197,34 @@ def ask_user_for_info(state: RequirementsGraphState) -> RequirementsGraphState:
     }
 
 
+def ask_user_for_info(state: RequirementsGraphState) -> RequirementsGraphState:
+    user_response = interrupt(state["interruption_message"])
+    return _user_response_update(user_response)
+
+
+async def aask_user_for_info(
+    state: RequirementsGraphState, config: RunnableConfig
+) -> RequirementsGraphState:
+    # Before Python 3.11 the runnable config is not visible to interrupt()
+    # inside async nodes unless it is set on the current context explicitly.
+    # Reset afterwards: later nodes may run in this context and would otherwise
+    # attribute their runs to this node.
+    token = var_child_runnable_config.set(config)
+    try:
+        user_response = interrupt(state["interruption_message"])
+    finally:
+        var_child_runnable_config.reset(token)
+    return _user_response_update(user_response)
+
+
 graph = StateGraph(RequirementsGraphState)
-graph.add_node("requirements_agent", requirements_agent_node)
-graph.add_node("ask_user_for_info", ask_user_for_info)
+graph.add_node(
+    "requirements_agent",
+    RunnableLambda(requirements_agent_node, afunc=arequirements_agent_node),
+)
+graph.add_node(
+    "ask_user_for_info", RunnableLambda(ask_user_for_info, afunc=aask_user_for_info)
+)
 graph.add_edge(START, "requirements_agent")
 graph.add_conditional_edges(
     "requirements_agent",
@@ -70,10 +233,33 @@ graph.add_conditional_edges(
 )
 graph.add_edge("ask_user_for_info", "requirements_agent")
 
-requirements_graph = graph.compile(checkpointer=checkpointer)
+def build_requirements_graph():
+    """Standalone graph, checkpointed directly (used by the __main__ block)."""
+    return graph.compile(checkpointer=get_checkpointer()).with_config(
+        callbacks=instrumentation_callbacks()
+    )
+
+
+def build_requirements_subgraph():
+    """
+    Embedded as a node of travel_system_graph: no checkpointer of its own, so it
+    checkpoints into the parent thread and its interrupt pauses the parent run.
+    """
+    return graph.compile()
+
+
+def __getattr__(name: str):
+    # Compiled graphs are built on first use through `components`
+    if name in ("requirements_graph", "requirements_subgraph"):
+        return components.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    from app.config import validate_settings
+
+    validate_settings()
+    requirements_graph = components.get("requirements_graph")
     initial_state = RequirementsGraphState(
         messages=[
             HumanMessage(
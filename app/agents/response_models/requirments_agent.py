@@ -7,6 +7,12 @@ class TravelerProfile(BaseModel):
 
     adults: int = Field(..., description="Number of adult travelers")
     children: int = Field(..., description="Number of child travelers")
+    contact_name: Optional[str] = Field(
+        None, description="Lead traveler full name used for flight and hotel bookings"
+    )
+    contact_email: Optional[str] = Field(
+        None, description="Lead traveler email used for flight and hotel bookings"
+    )
 
 class AirportInfo(BaseModel):
     """Airport information with city and IATA code."""
@@ -62,6 +68,9 @@ class FlightQuery(BaseModel):
 class FlightOption(BaseModel):
     """Individual flight option details."""
 
+    flight_id: Optional[str] = Field(
+        None, description="Flight ID of this option as returned by the flight search tool"
+    )
     carrier: str = Field(..., description="Airline carrier")
     flight_number: str = Field(..., description="Flight number")
     depart_iso: str = Field(..., description="Departure time in ISO format")
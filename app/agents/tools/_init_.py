@@ -1,2 +1,12 @@
-from .flight_tools import search_flight_availability
-__all__ = ["search_flight_availability"]
\ No newline at end of file
+from .flight_tools import (
+    search_flight_availability,
+    search_flight_calendar,
+    search_flights_batch,
+    flight_cache_stats,
+)
+__all__ = [
+    "search_flight_availability",
+    "search_flight_calendar",
+    "search_flights_batch",
+    "flight_cache_stats",
+]
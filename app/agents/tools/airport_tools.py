@@ -0,0 +1,45 @@
+# app/agents/tools/airport_tools.py
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from app.agents.airports import airport_index
+
+
+class AirportLookupInput(BaseModel):
+    """Input schema for airport lookups."""
+
+    query: str = Field(
+        ...,
+        description="City, airport name, alias or code, e.g. 'Tokyo', 'Heathrow', 'Bali' or 'LON'.",
+    )
+    limit: int = Field(5, ge=1, le=10, description="Maximum number of airports to return.")
+
+
+def _lookup_airports(query: str, limit: int = 5) -> dict:
+    """
+    Resolves a city, airport name, alias or code to IATA airport codes from the
+    local airport index (instant, no web search). Tolerates typos and partial
+    names. A city with several airports returns all of them, main airport
+    first; each airport lists the other airports of its metro area.
+    """
+    print(f"--- TOOL CALLED: Looking up airports for {query} ---")
+    index = airport_index()
+    airports = []
+    for airport in index.resolve(query, limit):
+        entry = airport.describe()
+        entry["metro_airports"] = [other.iata for other in index.group(airport) if other is not airport]
+        airports.append(entry)
+    return {"query": query, "found": bool(airports), "airports": airports}
+
+
+async def _alookup_airports(query: str, limit: int = 5) -> dict:
+    """In-memory lookup; run inline rather than on a worker thread."""
+    return _lookup_airports(query, limit)
+
+
+lookup_airports = StructuredTool.from_function(
+    func=_lookup_airports,
+    coroutine=_alookup_airports,
+    name="lookup_airports",
+    args_schema=AirportLookupInput,
+)
@@ -1,11 +1,21 @@
 # app/agents/tools/booking_tools.py
-from typing import Optional
+import re
+from typing import List, Optional, Tuple
 
+import httpx
 import requests
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 
 from app.config import settings
+from app.core.http import convex_field
+from app.core.resilience import (
+    CircuitOpenError,
+    aconvex_get,
+    aconvex_post,
+    convex_get,
+    convex_post,
+)
 
 
 class FlightBookingInput(BaseModel):
@@ -26,6 +36,24 @@ class HotelSearchInput(BaseModel):
     check_out: Optional[str] = Field(
         None, description="Check-out date in YYYY-MM-DD format (optional)"
     )
+    stars: Optional[str] = Field(
+        None, description="Star rating range from the hotel preferences (e.g., 3-4, 4+)"
+    )
+    area: Optional[str] = Field(
+        None, description="Area preference (e.g., central, quiet); matches rank first"
+    )
+    room_type: Optional[str] = Field(
+        None, description="Required room type (e.g., Standard, Deluxe, Suite)"
+    )
+    max_price_per_night: Optional[float] = Field(
+        None, description="Nightly budget: hotel budget divided by the number of nights"
+    )
+    limit: int = Field(
+        settings.HOTEL_SEARCH_DEFAULT_LIMIT,
+        ge=1,
+        le=20,
+        description="Maximum number of hotels to return",
+    )
 
 
 class HotelBookingInput(BaseModel):
@@ -39,38 +67,172 @@ class HotelBookingInput(BaseModel):
     room_type: str = Field(..., description="Room type (e.g., Standard, Deluxe, Suite)")
 
 
-@tool("search_hotels", args_schema=HotelSearchInput)
-def search_hotels(
-    city: str, check_in: Optional[str] = None, check_out: Optional[str] = None
-) -> dict:
+def hotel_id(hotel: dict) -> Optional[str]:
+    return convex_field(hotel, "_id", "id", "hotelId", "hotel_id")
+
+
+def hotel_price_per_night(hotel: dict) -> Optional[float]:
+    price = convex_field(hotel, "pricePerNight", "price_per_night", "price")
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None  # missing, or formatted such as "$120"
+
+
+def parse_star_range(stars: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Parse '3-4', '4', '4+' or '4 stars' into an inclusive (min, max) range."""
+    if not stars:
+        return None, None
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", stars)]
+    if not numbers:
+        return None, None
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    if "+" in stars:
+        return numbers[0], None
+    return numbers[0], numbers[0]
+
+
+def _offers_room_type(hotel: dict, room_type: str) -> bool:
+    room_types = convex_field(hotel, "roomTypes", "room_types")
+    if not room_types:
+        return True  # unknown inventory; let the booking call decide
+    wanted = room_type.strip().lower()
+    return any(wanted == str(offered).strip().lower() for offered in room_types)
+
+
+def _matches_area(hotel: dict, area: str) -> bool:
+    value = convex_field(hotel, "area", "neighborhood", "district", "location")
+    if value is None:
+        return False
+    wanted = set(re.findall(r"\w+", area.lower()))
+    return bool(wanted & set(re.findall(r"\w+", str(value).lower())))
+
+
+def rank_hotels(
+    hotels: List[dict],
+    stars: Optional[str] = None,
+    area: Optional[str] = None,
+    room_type: Optional[str] = None,
+    max_price_per_night: Optional[float] = None,
+) -> List[dict]:
     """
-    Searches for hotels in a city with optional check-in and check-out dates.
-    Returns a list of available hotels with their details.
+    Filter hotels on the hard constraints (star range, room type, nightly budget)
+    and order the rest: area match first, then higher rating, then lower price.
     """
+    min_stars, max_stars = parse_star_range(stars)
+
+    def _eligible(hotel: dict) -> bool:
+        hotel_stars = convex_field(hotel, "stars", "starRating", "star_rating")
+        if hotel_stars is not None:
+            if min_stars is not None and float(hotel_stars) < min_stars:
+                return False
+            if max_stars is not None and float(hotel_stars) > max_stars:
+                return False
+        if room_type and not _offers_room_type(hotel, room_type):
+            return False
+        price = hotel_price_per_night(hotel)
+        if max_price_per_night is not None and price is not None:
+            if price > max_price_per_night:
+                return False
+        return True
+
+    def _sort_key(hotel: dict) -> tuple:
+        rating = convex_field(hotel, "rating", "reviewScore") or 0
+        price = hotel_price_per_night(hotel)
+        return (
+            0 if area and _matches_area(hotel, area) else 1,
+            -float(rating),
+            price if price is not None else float("inf"),
+        )
+
+    return sorted(filter(_eligible, hotels), key=_sort_key)
+
+
+def project_hotel(hotel: dict) -> dict:
+    """Minimal view of a Convex hotel record with the fields needed to choose and book."""
+    return {
+        "hotel_id": hotel_id(hotel),
+        "name": convex_field(hotel, "name", "hotelName"),
+        "stars": convex_field(hotel, "stars", "starRating", "star_rating"),
+        "area": convex_field(hotel, "area", "neighborhood", "district", "location"),
+        "rating": convex_field(hotel, "rating", "reviewScore"),
+        "price_per_night": hotel_price_per_night(hotel),
+        "room_types": convex_field(hotel, "roomTypes", "room_types"),
+    }
+
+
+def _hotel_search_params(
+    city: str, check_in: Optional[str], check_out: Optional[str]
+) -> dict:
     print(f"--- TOOL CALLED: Searching hotels in {city} ---")
     if check_in:
         print(f"  Check-in: {check_in}")
     if check_out:
         print(f"  Check-out: {check_out}")
 
-    api_url = f"{settings.CONVEX_BASE_URL}/hotels/search"
     params = {"city": city}
     if check_in:
         params["checkIn"] = check_in
     if check_out:
         params["checkOut"] = check_out
+    return params
 
-    try:
-        response = requests.get(api_url, params=params, timeout=10)
-        response.raise_for_status()
 
-        hotels = response.json().get("hotels", [])
+def _hotel_search_result(
+    payload: dict,
+    stars: Optional[str] = None,
+    area: Optional[str] = None,
+    room_type: Optional[str] = None,
+    max_price_per_night: Optional[float] = None,
+    limit: int = settings.HOTEL_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    hotels = payload.get("hotels", [])
+
+    if not hotels:
+        return {"available": False, "hotels": []}
+
+    ranked = rank_hotels(hotels, stars, area, room_type, max_price_per_night)
+    return {
+        "available": bool(ranked),
+        "hotels": [project_hotel(hotel) for hotel in ranked[:limit]],
+        "total_hotels": len(hotels),
+        "matching_hotels": len(ranked),
+        "filtered_out": len(hotels) - len(ranked),
+    }
 
-        if not hotels:
-            return {"available": False, "hotels": []}
 
-        return {"available": True, "hotels": hotels}
+def _search_hotels(
+    city: str,
+    check_in: Optional[str] = None,
+    check_out: Optional[str] = None,
+    stars: Optional[str] = None,
+    area: Optional[str] = None,
+    room_type: Optional[str] = None,
+    max_price_per_night: Optional[float] = None,
+    limit: int = settings.HOTEL_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """
+    Searches for hotels in a city with optional check-in and check-out dates.
+    Hotels outside the star range, without the room type or above the nightly
+    budget are dropped; the rest are ranked (area match, rating, price) and
+    only the top ones are returned with their id, name, stars, area, rating,
+    nightly price and room types, plus how many hotels matched.
+    """
+    params = _hotel_search_params(city, check_in, check_out)
 
+    try:
+        return _hotel_search_result(
+            convex_get("/hotels/search", params),
+            stars,
+            area,
+            room_type,
+            max_price_per_night,
+            limit,
+        )
+
+    except CircuitOpenError as e:
+        return {"available": False, "hotels": [], "error": str(e)}
     except requests.exceptions.RequestException as e:
         print(f"API call failed: {e}")
         return {"available": False, "hotels": [], "error": str(e)}
@@ -83,42 +245,83 @@ def search_hotels(
         }
 
 
-@tool("book_flight", args_schema=FlightBookingInput)
-def book_flight(flight_id: str, passenger_name: str, passenger_email: str) -> dict:
-    """
-    Books a flight reservation using the confirmed flight ID.
-    Returns booking confirmation with booking ID, reference, seat number, and status.
-    """
+async def _asearch_hotels(
+    city: str,
+    check_in: Optional[str] = None,
+    check_out: Optional[str] = None,
+    stars: Optional[str] = None,
+    area: Optional[str] = None,
+    room_type: Optional[str] = None,
+    max_price_per_night: Optional[float] = None,
+    limit: int = settings.HOTEL_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """Async variant of `_search_hotels` on the pooled async client."""
+    params = _hotel_search_params(city, check_in, check_out)
+
+    try:
+        return _hotel_search_result(
+            await aconvex_get("/hotels/search", params),
+            stars,
+            area,
+            room_type,
+            max_price_per_night,
+            limit,
+        )
+
+    except CircuitOpenError as e:
+        return {"available": False, "hotels": [], "error": str(e)}
+    except httpx.HTTPError as e:
+        print(f"API call failed: {e}")
+        return {"available": False, "hotels": [], "error": str(e)}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return {
+            "available": False,
+            "hotels": [],
+            "error": "An internal error occurred.",
+        }
+
+
+def _flight_booking_payload(
+    flight_id: str, passenger_name: str, passenger_email: str
+) -> dict:
     print(
         f"--- TOOL CALLED: Booking flight {flight_id} for {passenger_name} ({passenger_email}) ---"
     )
-
-    api_url = f"{settings.CONVEX_BASE_URL}/flights/book"
-    payload = {
+    return {
         "flightId": flight_id,
         "passengerName": passenger_name,
         "passengerEmail": passenger_email,
     }
-    headers = {"Content-Type": "application/json"}
 
-    try:
-        response = requests.post(api_url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
 
-        result = response.json()
+def _flight_booking_result(result: dict) -> dict:
+    if result.get("success"):
+        booking = result.get("booking", {})
+        return {
+            "success": True,
+            "booking_id": booking.get("bookingId"),
+            "booking_reference": booking.get("bookingReference"),
+            "seat_number": booking.get("seatNumber"),
+            "status": booking.get("status"),
+        }
 
-        if result.get("success"):
-            booking = result.get("booking", {})
-            return {
-                "success": True,
-                "booking_id": booking.get("bookingId"),
-                "booking_reference": booking.get("bookingReference"),
-                "seat_number": booking.get("seatNumber"),
-                "status": booking.get("status"),
-            }
+    return {"success": False, "error": "Booking failed"}
+
+
+def _book_flight(flight_id: str, passenger_name: str, passenger_email: str) -> dict:
+    """
+    Books a flight reservation using the confirmed flight ID.
+    Returns booking confirmation with booking ID, reference, seat number, and status.
+    """
+    payload = _flight_booking_payload(flight_id, passenger_name, passenger_email)
 
-        return {"success": False, "error": "Booking failed"}
+    try:
+        # Never retried: a retry after a lost response could book twice
+        return _flight_booking_result(convex_post("/flights/book", payload))
 
+    except CircuitOpenError as e:
+        return {"success": False, "error": str(e)}
     except requests.exceptions.RequestException as e:
         print(f"API call failed: {e}")
         return {"success": False, "error": str(e)}
@@ -127,8 +330,26 @@ def book_flight(flight_id: str, passenger_name: str, passenger_email: str) -> di
         return {"success": False, "error": "An internal error occurred."}
 
 
-@tool("book_hotel", args_schema=HotelBookingInput)
-def book_hotel(
+async def _abook_flight(
+    flight_id: str, passenger_name: str, passenger_email: str
+) -> dict:
+    """Async variant of `_book_flight` on the pooled async client."""
+    payload = _flight_booking_payload(flight_id, passenger_name, passenger_email)
+
+    try:
+        return _flight_booking_result(await aconvex_post("/flights/book", payload))
+
+    except CircuitOpenError as e:
+        return {"success": False, "error": str(e)}
+    except httpx.HTTPError as e:
+        print(f"API call failed: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return {"success": False, "error": "An internal error occurred."}
+
+
+def _hotel_booking_payload(
     hotel_id: str,
     guest_name: str,
     guest_email: str,
@@ -136,19 +357,13 @@ def book_hotel(
     check_out_date: str,
     room_type: str,
 ) -> dict:
-    """
-    Books a hotel reservation using the hotel ID, dates, and room type.
-    Returns booking confirmation with booking ID, reference, number of nights, total price, and status.
-    """
     print(
         f"--- TOOL CALLED: Booking hotel {hotel_id} for {guest_name} ({guest_email}) ---"
     )
     print(
         f"  Check-in: {check_in_date}, Check-out: {check_out_date}, Room: {room_type}"
     )
-
-    api_url = f"{settings.CONVEX_BASE_URL}/hotels/book"
-    payload = {
+    return {
         "hotelId": hotel_id,
         "guestName": guest_name,
         "guestEmail": guest_email,
@@ -156,30 +371,98 @@ def book_hotel(
         "checkOutDate": check_out_date,
         "roomType": room_type,
     }
-    headers = {"Content-Type": "application/json"}
 
-    try:
-        response = requests.post(api_url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
 
-        result = response.json()
+def _hotel_booking_result(result: dict) -> dict:
+    if result.get("success"):
+        booking = result.get("booking", {})
+        return {
+            "success": True,
+            "booking_id": booking.get("bookingId"),
+            "booking_reference": booking.get("bookingReference"),
+            "number_of_nights": booking.get("numberOfNights"),
+            "total_price": booking.get("totalPrice"),
+            "status": booking.get("status"),
+        }
 
-        if result.get("success"):
-            booking = result.get("booking", {})
-            return {
-                "success": True,
-                "booking_id": booking.get("bookingId"),
-                "booking_reference": booking.get("bookingReference"),
-                "number_of_nights": booking.get("numberOfNights"),
-                "total_price": booking.get("totalPrice"),
-                "status": booking.get("status"),
-            }
+    return {"success": False, "error": "Booking failed"}
+
+
+def _book_hotel(
+    hotel_id: str,
+    guest_name: str,
+    guest_email: str,
+    check_in_date: str,
+    check_out_date: str,
+    room_type: str,
+) -> dict:
+    """
+    Books a hotel reservation using the hotel ID, dates, and room type.
+    Returns booking confirmation with booking ID, reference, number of nights, total price, and status.
+    """
+    payload = _hotel_booking_payload(
+        hotel_id, guest_name, guest_email, check_in_date, check_out_date, room_type
+    )
 
-        return {"success": False, "error": "Booking failed"}
+    try:
+        # Never retried: a retry after a lost response could book twice
+        return _hotel_booking_result(convex_post("/hotels/book", payload))
 
+    except CircuitOpenError as e:
+        return {"success": False, "error": str(e)}
     except requests.exceptions.RequestException as e:
         print(f"API call failed: {e}")
         return {"success": False, "error": str(e)}
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-        return {"success": False, "error": "An internal error occurred."}
\ No newline at end of file
+        return {"success": False, "error": "An internal error occurred."}
+
+
+async def _abook_hotel(
+    hotel_id: str,
+    guest_name: str,
+    guest_email: str,
+    check_in_date: str,
+    check_out_date: str,
+    room_type: str,
+) -> dict:
+    """Async variant of `_book_hotel` on the pooled async client."""
+    payload = _hotel_booking_payload(
+        hotel_id, guest_name, guest_email, check_in_date, check_out_date, room_type
+    )
+
+    try:
+        return _hotel_booking_result(await aconvex_post("/hotels/book", payload))
+
+    except CircuitOpenError as e:
+        return {"success": False, "error": str(e)}
+    except httpx.HTTPError as e:
+        print(f"API call failed: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return {"success": False, "error": "An internal error occurred."}
+
+
+# Each tool carries both implementations: `invoke` runs the blocking one,
+# `ainvoke` awaits the coroutine without a thread offload.
+search_hotels = StructuredTool.from_function(
+    func=_search_hotels,
+    coroutine=_asearch_hotels,
+    name="search_hotels",
+    args_schema=HotelSearchInput,
+)
+
+book_flight = StructuredTool.from_function(
+    func=_book_flight,
+    coroutine=_abook_flight,
+    name="book_flight",
+    args_schema=FlightBookingInput,
+)
+
+book_hotel = StructuredTool.from_function(
+    func=_book_hotel,
+    coroutine=_abook_hotel,
+    name="book_hotel",
+    args_schema=HotelBookingInput,
+)
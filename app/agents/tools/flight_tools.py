@@ -1,10 +1,21 @@
 # app/tools/flight_tools.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, datetime, timedelta
+from typing import Iterable, List, Literal, Optional, Union
+
+import httpx
 import requests
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 
+from app.agents.airports import nearby_airports
 from app.config import settings
+from app.core.cache import TTLCache
+from app.core.http import convex_field
+from app.core.metrics import registry
+from app.core.resilience import CircuitOpenError, aconvex_get, convex_get
 
 
 class FlightSearchInput(BaseModel):
@@ -16,32 +27,177 @@ class FlightSearchInput(BaseModel):
     destination: str = Field(
         ..., description="The IATA code for the destination airport (e.g., 'BKK')."
     )
+    date: Optional[str] = Field(
+        None, description="Departure date in YYYY-MM-DD format (optional)."
+    )
+    cabin_class: Optional[str] = Field(
+        None, description="Only options in this cabin: economy, premium or business."
+    )
+    non_stop: Optional[bool] = Field(
+        None, description="If true, only non-stop options."
+    )
+    max_layovers: Optional[int] = Field(
+        None, description="Maximum number of layovers allowed."
+    )
+    max_price: Optional[float] = Field(
+        None, description="Maximum price in USD per option (e.g. from the flight budget)."
+    )
+    sort_by: Literal["price", "departure", "duration"] = Field(
+        "price", description="Order of returned options."
+    )
+    limit: int = Field(
+        settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+        ge=1,
+        le=20,
+        description="Maximum number of options to return.",
+    )
 
 
-@tool("search_flight_availability", args_schema=FlightSearchInput)
-def search_flight_availability(origin: str, destination: str) -> dict:
-    """
-    Checks if flights are available on a given date between two airports.
-    Returns a small list of candidate options sorted by price.
-    Only call this after you have the origin, destination, and date.
-    """
-    print(f"--- TOOL CALLED: Searching flights from {origin} to {destination} ---")
+class FlightCalendarInput(BaseModel):
+    """Input schema for flexible-date (price calendar) flight searches."""
+
+    origin: str = Field(
+        ..., description="The IATA code for the origin airport (e.g., 'CMB')."
+    )
+    destination: str = Field(
+        ..., description="The IATA code for the destination airport (e.g., 'BKK')."
+    )
+    center_date: date_type = Field(
+        ..., description="Preferred departure date in YYYY-MM-DD format."
+    )
+    flex_days: int = Field(
+        ...,
+        ge=0,
+        le=settings.FLIGHT_CALENDAR_MAX_FLEX_DAYS,
+        description="Days of flexibility either side of the center date (date_flex_days).",
+    )
+    cabin_class: Optional[str] = Field(
+        None, description="Only options in this cabin: economy, premium or business."
+    )
+    non_stop: Optional[bool] = Field(
+        None, description="If true, only non-stop options."
+    )
+    max_layovers: Optional[int] = Field(
+        None, description="Maximum number of layovers allowed."
+    )
+    max_price: Optional[float] = Field(
+        None, description="Maximum price in USD per option (e.g. from the flight budget)."
+    )
+
+
+class FlightLeg(BaseModel):
+    """One route in a batch flight search."""
+
+    origin: str = Field(
+        ..., description="The IATA code for the origin airport (e.g., 'CMB')."
+    )
+    destination: str = Field(
+        ..., description="The IATA code for the destination airport (e.g., 'BKK')."
+    )
+    date: Optional[str] = Field(
+        None, description="Departure date in YYYY-MM-DD format (optional)."
+    )
+
 
-    api_url = f"{settings.CONVEX_BASE_URL}/flights/search"
+class FlightBatchInput(BaseModel):
+    """Input schema for multi-route flight searches."""
+
+    legs: List[FlightLeg] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.FLIGHT_BATCH_MAX_LEGS,
+        description="Routes to search, e.g. outbound and return, or alternative airports.",
+    )
+    cabin_class: Optional[str] = Field(
+        None, description="Only options in this cabin: economy, premium or business."
+    )
+    non_stop: Optional[bool] = Field(
+        None, description="If true, only non-stop options."
+    )
+    max_layovers: Optional[int] = Field(
+        None, description="Maximum number of layovers allowed."
+    )
+    max_price: Optional[float] = Field(
+        None, description="Maximum price in USD per option (e.g. from the flight budget)."
+    )
+    sort_by: Literal["price", "departure", "duration"] = Field(
+        "price", description="Order of returned options."
+    )
+    limit: int = Field(
+        settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+        ge=1,
+        le=20,
+        description="Maximum number of options to return per leg.",
+    )
+
+
+# Popular routes and repeated searches across turns of the requirements loop
+# are served from here; error results are never cached.
+flight_search_cache = TTLCache(
+    maxsize=settings.FLIGHT_CACHE_MAXSIZE,
+    ttl=settings.FLIGHT_CACHE_TTL_SECONDS,
+    stale_ttl=settings.FLIGHT_CACHE_STALE_SECONDS,
+    cacheable=lambda result: "error" not in result,
+    name="flight_search",
+)
+registry.register_cache(flight_search_cache.stats)
+
+
+def _route_key(origin: str, destination: str, date: Optional[str] = None) -> tuple:
+    return (origin.strip().upper(), destination.strip().upper(), date)
+
+
+def _departs_on(flight: dict, date: str) -> bool:
+    depart = convex_field(flight, "departureTime", "departIso", "depart_iso")
+    return depart is None or str(depart)[:10] == date
+
+
+def _flight_search_result(payload: dict, date: Optional[str] = None) -> dict:
+    flights = payload.get("flights", [])
+    if date:
+        # Guard against backends that ignore the date parameter
+        flights = [flight for flight in flights if _departs_on(flight, date)]
+
+    if not flights:
+        return {"available": False, "options": []}
+
+    return {"available": True, "options": flights}
+
+
+def _fetch_flights(origin: str, destination: str, date: Optional[str] = None) -> dict:
     params = {"origin": origin, "destination": destination}
+    if date:
+        params["date"] = date
 
     try:
-        response = requests.get(api_url, params=params, timeout=10)
-        response.raise_for_status()  # Raises an exception for 4XX/5XX errors
+        # Deadline, retries, circuit breaker and hedging: app/core/resilience.py
+        return _flight_search_result(convex_get("/flights/search", params), date)
 
-        flights = response.json().get("flights", [])
+    except CircuitOpenError as e:
+        return {"available": False, "options": [], "error": str(e)}
+    except requests.exceptions.RequestException as e:
+        print(f"API call failed: {e}")
+        return {"available": False, "options": [], "error": str(e)}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return {
+            "available": False,
+            "options": [],
+            "error": "An internal error occurred.",
+        }
 
-        if not flights:
-            return {"available": False, "options": []}
 
-        return {"available": True, "options": flights}
+async def _afetch_flights(origin: str, destination: str, date: Optional[str] = None) -> dict:
+    params = {"origin": origin, "destination": destination}
+    if date:
+        params["date"] = date
 
-    except requests.exceptions.RequestException as e:
+    try:
+        return _flight_search_result(await aconvex_get("/flights/search", params), date)
+
+    except CircuitOpenError as e:
+        return {"available": False, "options": [], "error": str(e)}
+    except httpx.HTTPError as e:
         print(f"API call failed: {e}")
         return {"available": False, "options": [], "error": str(e)}
     except Exception as e:
@@ -50,4 +206,427 @@ def search_flight_availability(origin: str, destination: str) -> dict:
             "available": False,
             "options": [],
             "error": "An internal error occurred.",
-        }
\ No newline at end of file
+        }
+
+
+def _stops(flight: dict) -> Optional[int]:
+    stops = convex_field(flight, "stops", "layovers", "numberOfStops")
+    if isinstance(stops, list):
+        return len(stops)
+    try:
+        return int(stops)
+    except (TypeError, ValueError):
+        return None  # missing, or free text such as "1 stop"
+
+
+def _price(flight: dict) -> Optional[float]:
+    price = convex_field(flight, "price", "priceUsd", "price_usd")
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None  # missing, or formatted such as "$420"
+
+
+def _duration_minutes(flight: dict) -> Optional[float]:
+    duration = convex_field(flight, "durationMinutes", "duration_minutes", "duration")
+    if isinstance(duration, (int, float)):
+        return float(duration)
+    depart, arrive = convex_field(flight, "departureTime", "departIso"), convex_field(flight, "arrivalTime", "arriveIso")
+    try:
+        return (datetime.fromisoformat(arrive) - datetime.fromisoformat(depart)).total_seconds() / 60
+    except (TypeError, ValueError):
+        return None
+
+
+def project_flight(flight: dict) -> dict:
+    """Compact view of a Convex flight record: the FlightOption fields plus cabin and stops."""
+    return {
+        "flight_id": convex_field(flight, "_id", "id", "flightId"),
+        "carrier": convex_field(flight, "carrier", "airline"),
+        "flight_number": convex_field(flight, "flightNumber", "flight_number"),
+        "depart_iso": convex_field(flight, "departureTime", "departIso", "depart_iso"),
+        "arrive_iso": convex_field(flight, "arrivalTime", "arriveIso", "arrive_iso"),
+        "price_usd": _price(flight),
+        "cabin_class": convex_field(flight, "cabinClass", "cabin_class", "cabin"),
+        "stops": _stops(flight),
+    }
+
+
+def select_flights(
+    flights: List[dict],
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    limit: int = 5,
+) -> dict:
+    """Filter, sort and cap raw flight options; returns compact options and counts."""
+    max_stops = 0 if non_stop else max_layovers
+
+    def _eligible(flight: dict) -> bool:
+        cabin = convex_field(flight, "cabinClass", "cabin_class", "cabin")
+        if cabin_class and cabin and str(cabin).lower() != cabin_class.lower():
+            return False
+        stops = _stops(flight)
+        if max_stops is not None and stops is not None and stops > max_stops:
+            return False
+        price = _price(flight)
+        if max_price is not None and price is not None and price > max_price:
+            return False
+        return True
+
+    sort_keys = {
+        "price": _price,
+        "departure": lambda f: convex_field(f, "departureTime", "departIso", "depart_iso"),
+        "duration": _duration_minutes,
+    }
+    sort_value = sort_keys.get(sort_by, _price)
+
+    matching = [f for f in flights if _eligible(f)]
+    # Options missing the sort field go last
+    matching.sort(key=lambda f: (sort_value(f) is None, sort_value(f) or 0))
+    return {
+        "available": bool(matching),
+        "options": [project_flight(f) for f in matching[:limit]],
+        "total_options": len(flights),
+        "matching_options": len(matching),
+    }
+
+
+def with_nearby_airports(result: dict, origin: str, destination: str) -> dict:
+    """
+    Adds alternative airports for both ends of a route that has no matching
+    flights, from the local airport index; failed searches are left as they are.
+    """
+    if result.get("available") or "error" in result:
+        return result
+    nearby = {
+        side: airports
+        for side, airports in (("origin", nearby_airports(origin)), ("destination", nearby_airports(destination)))
+        if airports
+    }
+    if nearby:
+        result["nearby_airports"] = nearby
+    return result
+
+
+def _search_flight_availability(
+    origin: str,
+    destination: str,
+    date: Optional[str] = None,
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    limit: int = settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """
+    Checks if flights are available between two airports, optionally on a date.
+    Returns the top options (compact: id, carrier, times, price, cabin, stops)
+    after applying the optional cabin, stops and price filters, plus how many
+    options matched. Pass the traveler's preferences and flight budget so only
+    relevant options come back. When nothing matches, `nearby_airports` lists
+    alternative origin and destination airports to try.
+    """
+    print(f"--- TOOL CALLED: Searching flights from {origin} to {destination} ---")
+
+    key = _route_key(origin, destination, date)
+    result = flight_search_cache.get_or_load(key, lambda: _fetch_flights(*key))
+    if "error" in result:
+        return result
+    selected = select_flights(
+        result["options"], cabin_class, non_stop, max_layovers, max_price, sort_by, limit
+    )
+    return with_nearby_airports(selected, origin, destination)
+
+
+async def _asearch_flight_availability(
+    origin: str,
+    destination: str,
+    date: Optional[str] = None,
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    limit: int = settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """Async variant of `_search_flight_availability` on the pooled async client."""
+    print(f"--- TOOL CALLED: Searching flights from {origin} to {destination} ---")
+
+    key = _route_key(origin, destination, date)
+    result = await flight_search_cache.aget_or_load(key, lambda: _afetch_flights(*key))
+    if "error" in result:
+        return result
+    selected = select_flights(
+        result["options"], cabin_class, non_stop, max_layovers, max_price, sort_by, limit
+    )
+    return with_nearby_airports(selected, origin, destination)
+
+
+def _load_routes(keys: List[tuple]) -> list:
+    """Cached searches for several route keys on a bounded pool; failures come back as exceptions."""
+
+    def _safe_load(key: tuple) -> object:
+        try:
+            return flight_search_cache.get_or_load(key, lambda: _fetch_flights(*key))
+        except Exception as e:
+            return e
+
+    workers = max(1, min(settings.FLIGHT_SEARCH_CONCURRENCY, len(keys)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_safe_load, keys))
+
+
+async def _aload_routes(keys: List[tuple]) -> list:
+    semaphore = asyncio.Semaphore(max(1, settings.FLIGHT_SEARCH_CONCURRENCY))
+
+    async def _bounded_load(key: tuple) -> dict:
+        async with semaphore:
+            return await flight_search_cache.aget_or_load(
+                key, lambda: _afetch_flights(*key)
+            )
+
+    return await asyncio.gather(
+        *(_bounded_load(key) for key in keys), return_exceptions=True
+    )
+
+
+def _calendar_dates(center_date: Union[str, date_type], flex_days: int) -> List[str]:
+    center = center_date if isinstance(center_date, date_type) else date_type.fromisoformat(center_date)
+    return [
+        (center + timedelta(days=offset)).isoformat()
+        for offset in range(-flex_days, flex_days + 1)
+    ]
+
+
+def _bad_center_date(center_date) -> dict:
+    return {
+        "available": False,
+        "calendar": [],
+        "error": f"center_date must be a date in YYYY-MM-DD format, got {center_date!r}.",
+    }
+
+
+def _calendar_result(dates: List[str], results: list, filters: dict) -> dict:
+    """Cheapest matching option per day, plus the cheapest day overall."""
+    calendar = []
+    for day, result in zip(dates, results):
+        if isinstance(result, Exception):
+            result = {"available": False, "options": [], "error": str(result)}
+        if "error" in result:
+            calendar.append({"date": day, "available": False, "error": result["error"]})
+            continue
+        selected = select_flights(result["options"], sort_by="price", limit=1, **filters)
+        entry = {"date": day, "available": selected["available"]}
+        if selected["options"]:
+            cheapest = selected["options"][0]
+            entry.update(
+                price_usd=cheapest["price_usd"],
+                flight_id=cheapest["flight_id"],
+                carrier=cheapest["carrier"],
+                depart_iso=cheapest["depart_iso"],
+                stops=cheapest["stops"],
+                matching_options=selected["matching_options"],
+            )
+        calendar.append(entry)
+
+    priced = [entry for entry in calendar if entry.get("price_usd") is not None]
+    cheapest_day = min(priced, key=lambda entry: entry["price_usd"], default=None)
+    return {
+        "available": bool(priced),
+        "cheapest_date": cheapest_day["date"] if cheapest_day else None,
+        "calendar": calendar,
+    }
+
+
+def _search_flight_calendar(
+    origin: str,
+    destination: str,
+    center_date: Union[str, date_type],
+    flex_days: int,
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+) -> dict:
+    """
+    Price calendar for a route: searches every departure date within
+    center_date ± flex_days at once and returns the cheapest matching option
+    per day (price, flight ID, carrier, departure, stops) and the cheapest date.
+    Use this instead of repeated single-date searches when the traveler's dates
+    are flexible.
+    """
+    print(
+        f"--- TOOL CALLED: Flight calendar {origin} to {destination} "
+        f"around {center_date} ±{flex_days} days ---"
+    )
+    try:
+        dates = _calendar_dates(center_date, flex_days)
+    except ValueError:
+        return _bad_center_date(center_date)
+    filters = dict(
+        cabin_class=cabin_class,
+        non_stop=non_stop,
+        max_layovers=max_layovers,
+        max_price=max_price,
+    )
+
+    results = _load_routes([_route_key(origin, destination, day) for day in dates])
+    return with_nearby_airports(_calendar_result(dates, results, filters), origin, destination)
+
+
+async def _asearch_flight_calendar(
+    origin: str,
+    destination: str,
+    center_date: Union[str, date_type],
+    flex_days: int,
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+) -> dict:
+    """Async variant of `_search_flight_calendar` on the pooled async client."""
+    print(
+        f"--- TOOL CALLED: Flight calendar {origin} to {destination} "
+        f"around {center_date} ±{flex_days} days ---"
+    )
+    try:
+        dates = _calendar_dates(center_date, flex_days)
+    except ValueError:
+        return _bad_center_date(center_date)
+    filters = dict(
+        cabin_class=cabin_class,
+        non_stop=non_stop,
+        max_layovers=max_layovers,
+        max_price=max_price,
+    )
+    results = await _aload_routes(
+        [_route_key(origin, destination, day) for day in dates]
+    )
+    return with_nearby_airports(_calendar_result(dates, results, filters), origin, destination)
+
+
+def _batch_result(keys: List[tuple], results: list, filters: dict) -> dict:
+    """Per-leg filtered options, in the order the legs were given."""
+    leg_results = []
+    for (origin, destination, date), result in zip(keys, results):
+        if isinstance(result, Exception):
+            result = {"available": False, "options": [], "error": str(result)}
+        entry = {"origin": origin, "destination": destination, "date": date}
+        if "error" in result:
+            entry.update(available=False, options=[], error=result["error"])
+        else:
+            entry.update(select_flights(result["options"], **filters))
+            with_nearby_airports(entry, origin, destination)
+        leg_results.append(entry)
+    return {"legs": leg_results}
+
+
+def _leg_keys(legs: list) -> List[tuple]:
+    legs = [FlightLeg.model_validate(leg) for leg in legs]
+    return [_route_key(leg.origin, leg.destination, leg.date) for leg in legs]
+
+
+def _search_flights_batch(
+    legs: List[FlightLeg],
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    limit: int = settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """
+    Searches several routes at once, e.g. the outbound and return legs of a
+    round trip, or the same trip from alternative nearby airports. Returns the
+    top options for each leg in the order given, with the same filters applied
+    to every leg. Prefer this over separate search_flight_availability calls
+    when more than one route is needed.
+    """
+    print(f"--- TOOL CALLED: Searching flights for {len(legs)} legs ---")
+    filters = dict(
+        cabin_class=cabin_class,
+        non_stop=non_stop,
+        max_layovers=max_layovers,
+        max_price=max_price,
+        sort_by=sort_by,
+        limit=limit,
+    )
+    keys = _leg_keys(legs)
+    return _batch_result(keys, _load_routes(keys), filters)
+
+
+async def _asearch_flights_batch(
+    legs: List[FlightLeg],
+    cabin_class: Optional[str] = None,
+    non_stop: Optional[bool] = None,
+    max_layovers: Optional[int] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    limit: int = settings.FLIGHT_SEARCH_DEFAULT_LIMIT,
+) -> dict:
+    """Async variant of `_search_flights_batch` on the pooled async client."""
+    print(f"--- TOOL CALLED: Searching flights for {len(legs)} legs ---")
+    filters = dict(
+        cabin_class=cabin_class,
+        non_stop=non_stop,
+        max_layovers=max_layovers,
+        max_price=max_price,
+        sort_by=sort_by,
+        limit=limit,
+    )
+    keys = _leg_keys(legs)
+    return _batch_result(keys, await _aload_routes(keys), filters)
+
+
+def prefetch_flights(legs: Iterable[tuple]) -> int:
+    """
+    Warm the flight cache for (origin, destination, date) legs in the
+    background; returns how many searches were scheduled.
+    """
+    keys = [_route_key(*leg) for leg in legs]
+    return sum(
+        flight_search_cache.prefetch(key, lambda key=key: _fetch_flights(*key))
+        for key in keys
+    )
+
+
+def aprefetch_flights(legs: Iterable[tuple]) -> int:
+    """Async variant of `prefetch_flights`; must be called on the running loop."""
+    keys = [_route_key(*leg) for leg in legs]
+    return sum(
+        flight_search_cache.aprefetch(key, lambda key=key: _afetch_flights(*key))
+        for key in keys
+    )
+
+
+def flight_cache_stats() -> dict:
+    """Hit/miss/eviction counters for the flight search cache."""
+    return flight_search_cache.stats()
+
+
+# Agents driven through `ainvoke` use the coroutine directly instead of
+# offloading the blocking implementation to a worker thread.
+search_flight_availability = StructuredTool.from_function(
+    func=_search_flight_availability,
+    coroutine=_asearch_flight_availability,
+    name="search_flight_availability",
+    args_schema=FlightSearchInput,
+)
+
+search_flight_calendar = StructuredTool.from_function(
+    func=_search_flight_calendar,
+    coroutine=_asearch_flight_calendar,
+    name="search_flight_calendar",
+    args_schema=FlightCalendarInput,
+)
+
+search_flights_batch = StructuredTool.from_function(
+    func=_search_flights_batch,
+    coroutine=_asearch_flights_batch,
+    name="search_flights_batch",
+    args_schema=FlightBatchInput,
+)
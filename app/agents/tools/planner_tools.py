@@ -1,13 +1,179 @@
 # app/agents/tools/planner_tools.py
-from langchain_community.tools import DuckDuckGoSearchRun
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
 
-# DuckDuckGo search tool for finding attractions, POIs, and travel information
-web_search = DuckDuckGoSearchRun(
+from app.config import settings
+from app.core.cache import SQLiteCache
+from app.core.components import components
+from app.core.metrics import registry
+
+
+WEB_SEARCH_DESCRIPTION = "Search the web for travel information, attractions, points of interest (POIs), and activities in a destination city. Use this to find popular sights, cultural sites, restaurants, shopping areas, and other tourist attractions."
+
+
+def build_duckduckgo():
+    """DuckDuckGo search tool for finding attractions, POIs, and travel information."""
+    # langchain_community is slow to import; only pay for it on the first search
+    from langchain_community.tools import DuckDuckGoSearchRun
+
+    return DuckDuckGoSearchRun(name="web_search", description=WEB_SEARCH_DESCRIPTION)
+
+
+# Results persist across restarts so repeat destinations skip the network
+search_cache = SQLiteCache(
+    path=settings.SEARCH_CACHE_PATH,
+    namespace="web_search",
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+)
+registry.register_cache(search_cache.stats)
+
+_NO_RESULTS = "No good DuckDuckGo Search Result was found"
+
+
+class WebSearchInput(BaseModel):
+    """Input schema for web search requests."""
+
+    query: str = Field(..., description="Search query, e.g. 'things to do in Seoul food'")
+
+
+class WebSearchBatchInput(BaseModel):
+    """Input schema for batched web search requests."""
+
+    queries: List[str] = Field(
+        ...,
+        description="One search query per interest or city, e.g. ['Seoul food markets', 'Seoul palaces culture']",
+    )
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Canonical cache key for a query. Case, punctuation and whitespace are
+    ignored, so "Seoul food tours" and "seoul  food-tours!" share one entry;
+    word order is kept, as "Tokyo to Seoul" and "Seoul to Tokyo" differ.
+    """
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+def _cacheable(result: str) -> bool:
+    return bool(result.strip()) and not result.startswith(_NO_RESULTS)
+
+
+def _web_search(query: str) -> str:
+    key = normalize_search_query(query)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = components.get("duckduckgo").invoke(query)
+    if _cacheable(result):
+        search_cache.set(key, result)
+    return result
+
+
+async def _aweb_search(query: str) -> str:
+    # The cache is a SQLite file: keep its reads and writes off the event loop
+    key = normalize_search_query(query)
+    cached = await asyncio.to_thread(search_cache.get, key)
+    if cached is not None:
+        return cached
+
+    result = await components.get("duckduckgo").ainvoke(query)
+    if _cacheable(result):
+        await asyncio.to_thread(search_cache.set, key, result)
+    return result
+
+
+web_search = StructuredTool.from_function(
+    func=_web_search,
+    coroutine=_aweb_search,
     name="web_search",
-    description="Search the web for travel information, attractions, points of interest (POIs), and activities in a destination city. Use this to find popular sights, cultural sites, restaurants, shopping areas, and other tourist attractions.",
+    description=WEB_SEARCH_DESCRIPTION,
+    args_schema=WebSearchInput,
+)
+
+
+def _unique_queries(queries: List[str]) -> List[str]:
+    # Drop blanks and queries that normalize to the same cache key
+    seen = set()
+    unique = []
+    for query in queries:
+        key = normalize_search_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query.strip())
+    return unique[: settings.SEARCH_BATCH_MAX_QUERIES]
+
+
+def _merge_results(queries: List[str], results: List[object]) -> str:
+    """One section per query, with sentences already shown for an earlier query removed."""
+    seen_sentences = set()
+    sections = []
+    for query, result in zip(queries, results):
+        if isinstance(result, Exception):
+            sections.append(f"## {query}\nSearch failed: {result}")
+            continue
+        kept = []
+        for sentence in re.split(r"(?<=[.!?])\s+", str(result).strip()):
+            fingerprint = " ".join(re.findall(r"\w+", sentence.lower()))
+            if fingerprint and fingerprint not in seen_sentences:
+                seen_sentences.add(fingerprint)
+                kept.append(sentence)
+        sections.append(f"## {query}\n{' '.join(kept) if kept else '(no new results)'}")
+    return "\n\n".join(sections)
+
+
+def _web_search_batch(queries: List[str]) -> str:
+    """
+    Search the web for several queries at once (e.g. one per interest) and return
+    merged, de-duplicated results grouped by query. Prefer this over repeated
+    web_search calls when gathering points of interest for an itinerary.
+    """
+    queries = _unique_queries(queries)
+    if not queries:
+        return ""
+
+    def _safe_search(query: str) -> object:
+        try:
+            return _web_search(query)
+        except Exception as e:
+            return e
+
+    workers = max(1, min(settings.SEARCH_BATCH_CONCURRENCY, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_safe_search, queries))
+    return _merge_results(queries, results)
+
+
+async def _aweb_search_batch(queries: List[str]) -> str:
+    queries = _unique_queries(queries)
+    if not queries:
+        return ""
+
+    semaphore = asyncio.Semaphore(max(1, settings.SEARCH_BATCH_CONCURRENCY))
+
+    async def _bounded_search(query: str) -> str:
+        async with semaphore:
+            return await _aweb_search(query)
+
+    results = await asyncio.gather(
+        *(_bounded_search(query) for query in queries), return_exceptions=True
+    )
+    return _merge_results(queries, results)
+
+
+web_search_batch = StructuredTool.from_function(
+    func=_web_search_batch,
+    coroutine=_aweb_search_batch,
+    name="web_search_batch",
+    args_schema=WebSearchBatchInput,
 )
 
 
 if __name__ == "__main__":
-    print(web_search.invoke("sri lanka colombo hotels"))
\ No newline at end of file
+    print(web_search.invoke("sri lanka colombo hotels"))
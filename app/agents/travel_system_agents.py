@@ -1,44 +1,94 @@
-from langchain.agents import create_agent
+from app.agents.prompts.travel_system import REQUIREMENTS_AGENT_SYSTEM_PROMPT, PLANNER_AGENT_SYSTEM_PROMPT, BOOKER_AGENT_SYSTEM_PROMPT
+from app.agents.response_models.requirments_agent import RequirementsAgentResponseModel
+from app.agents.response_models.planner_agent import PlannerAgentResponseModel
+from app.agents.response_models.booker_agent import BookerAgentResponseModel
+from app.core.components import components
+from app.core.llm import llm_for
 
+# Agents are built on first use through `components` (see app/core/components.py);
+# create_agent and the tool modules are imported inside the factories.
 
-from app.agents.prompts import REQUIREMENTS_AGENT_SYSTEM_PROMPT, PLANNER_AGENT_SYSTEM_PROMPT, BOOKER_AGENT_SYSTEM_PROMPT
-from app.agents.response_models import RequirementsAgentResponseModel, PlannerAgentResponseModel, BookerAgentResponseModel
-from app.agents.tools.flight_tools import search_flight_availability
-from app.agents.tools.planner_tools import web_search
-from app.agents.tools.booker_tools import book_flight, book_hotel, search_hotels
-from langchain_core.agents.response_models import ToolStrategy
 
-from app.core.llm import llm 
+def _requirements_agent(model):
+    from langchain.agents import create_agent
+    from langchain.agents.structured_output import ToolStrategy
 
+    from app.agents.tools.airport_tools import lookup_airports
+    from app.agents.tools.flight_tools import (
+        search_flight_availability,
+        search_flight_calendar,
+        search_flights_batch,
+    )
 
+    return create_agent(
+        model=model,
+        tools=[search_flights_batch, search_flight_availability, search_flight_calendar, lookup_airports],
+        system_prompt=REQUIREMENTS_AGENT_SYSTEM_PROMPT,
+        response_format=ToolStrategy(RequirementsAgentResponseModel),
+    )
 
-requirments_agent = create_agent(
-    model=llm,
-    tools=[search_flight_availability],
-    system_prompt=REQUIREMENTS_AGENT_SYSTEM_PROMPT,
-    response_model=ToolStrategy(RequirementsAgentResponseModel),
-)
 
-planner_agent = create_agent(
-    model=llm,
-    name="planner",
-    tools=[web_search],
-    response_format=ToolStrategy(PlannerAgentResponseModel),
-    system_prompt=PLANNER_AGENT_SYSTEM_PROMPT,
-)
+def build_requirements_agent():
+    return _requirements_agent(llm_for("requirements"))
+
+
+def build_requirements_fast_agent():
+    """Same agent on the fast model, for clarifying turns (see requirment_graph)."""
+    return _requirements_agent(llm_for("requirements_fast"))
+
+
+def build_planner_agent():
+    from langchain.agents import create_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from app.agents.tools.planner_tools import web_search, web_search_batch
+
+    return create_agent(
+        model=llm_for("planner"),
+        name="planner",
+        tools=[web_search_batch, web_search],
+        response_format=ToolStrategy(PlannerAgentResponseModel),
+        system_prompt=PLANNER_AGENT_SYSTEM_PROMPT,
+    )
+
+
+def build_booker_agent():
+    from langchain.agents import create_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from app.agents.tools.booker_tools import book_flight, book_hotel, search_hotels
+
+    return create_agent(
+        model=llm_for("booker"),
+        name="booker",
+        tools=[book_flight, book_hotel, search_hotels],
+        response_format=ToolStrategy(BookerAgentResponseModel),
+        system_prompt=BOOKER_AGENT_SYSTEM_PROMPT,
+    )
+
+
+_AGENTS = {
+    "requirments_agent": "requirements_agent",
+    "requirements_agent": "requirements_agent",
+    "requirements_fast_agent": "requirements_fast_agent",
+    "planner_agent": "planner_agent",
+    "booker_agent": "booker_agent",
+}
+
+
+def __getattr__(name: str):
+    # `from app.agents.travel_system_agents import planner_agent` keeps working
+    if name in _AGENTS:
+        return components.get(_AGENTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-booker_agent = create_agent(
-    model=llm,
-    name="booker",
-    tools=[book_flight, book_hotel, search_hotels],
-    response_format=ToolStrategy(BookerAgentResponseModel),
-    system_prompt=BOOKER_AGENT_SYSTEM_PROMPT,
-)
 
 if __name__ == "__main__":
-    for chunk in agent.stream(
-        input={"message": ["I want to go to seoul(ICN) from Tokyo(NRT).My dates are flexible."]},
+    from app.config import validate_settings
+
+    validate_settings()
+    for chunk in components.get("requirements_agent").stream(
+        input={"messages": [{"role": "user", "content": "I want to go to seoul(ICN) from Tokyo(NRT).My dates are flexible."}]},
         stream_mode="updates",
     ):
         print(chunk)
-    
\ No newline at end of file
@@ -3,16 +3,29 @@ from typing import Optional
 
 from langchain.messages import HumanMessage, AIMessage
 from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.types import Command
-from langchain_core.runnables import RunnableConfig
-
-from app.agents.requirements_graph import requirements_graph
-from app.agents.travel_system_agents import planner_agent, booker_agent
-from app.agents.requirements_graph import RequirementsGraphState
-
-
-checkpointer = InMemorySaver()
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+from app.config import settings
+from app.core.checkpoint import get_checkpointer
+from app.core.components import components
+from app.core.metrics import instrumentation_callbacks
+from app.core.rate_limit import llm_request_context, session_id
+from app.agents.itinerary_cache import (
+    acached_itinerary,
+    astore_itinerary,
+    cached_itinerary,
+    store_itinerary,
+)
+from app.agents.response_models.booker_agent import Bookings
+from app.agents.fast_booking import (
+    abook_from_requirements,
+    book_from_requirements,
+    bookings_complete,
+    hotel_search_request,
+    merge_bookings,
+)
+from app.agents.tools.booker_tools import search_hotels
 
 
 class TravelSystemState(MessagesState):
@@ -21,131 +34,140 @@ class TravelSystemState(MessagesState):
     requirements: Optional[dict]  # CompleteRequirements dict from requirements graph
     itinerary: Optional[dict]  # Itinerary dict from planner agent
     bookings: Optional[dict]  # Bookings dict from booker agent
+    hotel_options: Optional[dict]  # Hotel search prefetched alongside the planner
 
 
-def requirements_subgraph_node(
-    state: TravelSystemState, config: RunnableConfig
-) -> TravelSystemState:
-    """
-    Invoke the requirements graph as a subgraph.
-    The subgraph shares 'messages' and 'requirements' state with parent.
-
-    Handles interrupt loop internally to gather all user input before proceeding.
-    Similar to requirements_graph.py main block pattern.
-    """
-    # Create subgraph state from parent state
-    subgraph_state = RequirementsGraphState(
-        messages=state["messages"],
-        requirements_complete=False,
-        interruption_message="",
-        requirements=state.get("requirements"),
-    )
-
-    # Extract parent's thread_id from config and derive subgraph thread_id
-    # RunnableConfig is dict-like with "configurable" key containing thread_id
-    configurable = config.get("configurable", {}) if config else {}
-    parent_thread_id = configurable.get("thread_id", "main-thread")
-    subgraph_thread_id = f"{parent_thread_id}-requirements"
-    subgraph_config = {"configurable": {"thread_id": subgraph_thread_id}}
-
-    # Invoke the compiled requirements graph
-    subgraph_result = requirements_graph.invoke(
-        subgraph_state,
-        subgraph_config,
-    )
-
-    # Handle interrupt loop - similar to requirements_graph.py
-    while True:
-        if "__interrupt__" in subgraph_result:
-            # Extract interrupt message
-            interrupt_value = subgraph_result["__interrupt__"]
-            if isinstance(interrupt_value, list) and len(interrupt_value) > 0:
-                interrupt_message = str(interrupt_value[0].value)
-            else:
-                interrupt_message = str(interrupt_value)
-
-            # Display interrupt message to user
-            print(f"\n{interrupt_message}")
-
-            # Get user input
-            user_input = input("Your response: ").strip()
-
-            # Resume execution with user input
-            subgraph_result = requirements_graph.invoke(
-                Command(resume=user_input),
-                subgraph_config,
-            )
-        else:
-            # No interrupt, execution completed
-            break
+def _planner_prompt(requirements: Optional[dict]) -> str:
+    # Format requirements into context message for planner
+    requirements_str = json.dumps(requirements, indent=2)
+    return f"""Based on the following travel requirements, create a day-by-day itinerary:
+    
+{requirements_str}"""
 
-    # Extract requirements from completed subgraph execution
-    requirements = subgraph_result.get("requirements")
 
-    # The result contains 'requirements' field populated when complete
+def _planner_update(itinerary: dict, requirements: Optional[dict]) -> TravelSystemState:
     return {
-        "messages": [AIMessage(content=json.dumps(requirements), name="requirements")],
+        "messages": [AIMessage(content=json.dumps(itinerary), name="planner")],
         "requirements": requirements,
-        "itinerary": None,
+        "itinerary": itinerary,
         "bookings": None,
     }
 
-def planner_agent_node(state: TravelSystemState) -> TravelSystemState:
+
+def planner_agent_node(state: TravelSystemState, config: RunnableConfig) -> TravelSystemState:
     """
-    Invoke planner agent to create itinerary based on requirements.
+    Invoke planner agent to create itinerary based on requirements, unless an
+    itinerary for equivalent requirements is already cached.
     """
     requirements = state.get("requirements")
 
-    # Format requirements into context message for planner
-    requirements_str = json.dumps(requirements, indent=2)
-    planner_prompt = f"""Based on the following travel requirements, create a day-by-day itinerary:
-    
-{requirements_str}"""
+    itinerary = cached_itinerary(requirements)
+    if itinerary is None:
+        # Invoke planner agent; background work, queued behind interactive turns
+        with llm_request_context(session_id(config), "background"):
+            response = components.get("planner_agent").invoke(
+                {"messages": [HumanMessage(content=_planner_prompt(requirements))]}
+            )
+        itinerary = response["structured_response"].itinerary.model_dump()
+        store_itinerary(requirements, itinerary)
 
-    # Invoke planner agent
-    response = planner_agent.invoke(
-        {"messages": [HumanMessage(content=planner_prompt)]}
-    )
+    return _planner_update(itinerary, requirements)
 
-    itinerary = response["structured_response"].itinerary.model_dump()
 
-    return {
-        "messages": [AIMessage(content=json.dumps(itinerary), name="planner")],
-        "requirements": requirements,
-        "itinerary": itinerary,
-        "bookings": None,
-    }
+async def aplanner_agent_node(
+    state: TravelSystemState, config: RunnableConfig
+) -> TravelSystemState:
+    """
+    Async variant of `planner_agent_node`.
+
+    `config` is passed on explicitly: before Python 3.11 callbacks (and so
+    token streaming) do not reach nested runnables through contextvars.
+    """
+    requirements = state.get("requirements")
+
+    itinerary = await acached_itinerary(requirements)
+    if itinerary is None:
+        with llm_request_context(session_id(config), "background"):
+            response = await components.get("planner_agent").ainvoke(
+                {"messages": [HumanMessage(content=_planner_prompt(requirements))]}, config
+            )
+        itinerary = response["structured_response"].itinerary.model_dump()
+        await astore_itinerary(requirements, itinerary)
+
+    return _planner_update(itinerary, requirements)
 
 
-def booker_agent_node(state: TravelSystemState) -> TravelSystemState:
+def hotel_prefetch_node(state: TravelSystemState) -> TravelSystemState:
     """
-    Invoke booker agent to book flights and hotels based on requirements and itinerary.
+    Search hotels for the destination and dates while the planner runs;
+    the result does not depend on the itinerary.
     """
-    requirements = state.get("requirements")
-    itinerary = state.get("itinerary")
+    request = hotel_search_request(state.get("requirements"))
+    if request is None:
+        return {"hotel_options": None}
+    return {"hotel_options": {"request": request, "result": search_hotels.invoke(request)}}
+
 
+async def ahotel_prefetch_node(
+    state: TravelSystemState, config: RunnableConfig
+) -> TravelSystemState:
+    """
+    Async variant of `hotel_prefetch_node`.
+    """
+    request = hotel_search_request(state.get("requirements"))
+    if request is None:
+        return {"hotel_options": None}
+    result = await search_hotels.ainvoke(request, config)
+    return {"hotel_options": {"request": request, "result": result}}
+
+
+def _booker_prompt(
+    requirements: Optional[dict],
+    itinerary: Optional[dict],
+    hotel_options: Optional[dict] = None,
+    booked: Optional[Bookings] = None,
+) -> str:
     # Format booking context
     requirements_str = json.dumps(requirements, indent=2)
     itinerary_str = json.dumps(itinerary, indent=2)
 
-    booker_prompt = f"""Based on the following requirements and itinerary, book the flights and hotels:
+    hotels_section = ""
+    if hotel_options and hotel_options["result"].get("available"):
+        # The prefetch searched with the hotel preferences: already filtered and ranked
+        result = hotel_options["result"]
+        hotels_section = f"""
+
+AVAILABLE HOTELS (already searched for {hotel_options["request"]["city"]}, top {len(result["hotels"])} of {result["matching_hotels"]} matching, best first):
+{json.dumps(result["hotels"], indent=2)}"""
+
+    booked_section = ""
+    if booked is not None and (booked.flights or booked.hotels):
+        # The fast path booked part of the trip: only the rest is left to the agent
+        booked_section = f"""
+
+ALREADY BOOKED (do not book these again):
+{booked.model_dump_json(indent=2)}
+
+Book only what is still missing. If no hotel meets every preference, relax the
+area first, then the star range, staying within the hotel budget where possible."""
+
+    return f"""Based on the following requirements and itinerary, book the flights and hotels:
 
 REQUIREMENTS:
 {requirements_str}
 
 ITINERARY:
-{itinerary_str}
+{itinerary_str}{hotels_section}{booked_section}
 
 Extract the flight ID from the confirmed flight in requirements and book it.
 For hotels, use the destination city and dates from the itinerary or requirements to book a hotel.
+If available hotels are listed above, pick one of them instead of searching again.
 Return booking confirmations for both flight and hotel."""
 
-    # Invoke booker agent
-    response = booker_agent.invoke({"messages": [HumanMessage(content=booker_prompt)]})
-
-    # Extract structured bookings from response
-    bookings = response["structured_response"].bookings.model_dump()
 
+def _booker_update(
+    bookings: dict, requirements: Optional[dict], itinerary: Optional[dict]
+) -> TravelSystemState:
     return {
         "messages": [AIMessage(content=json.dumps(bookings), name="booker")],
         "requirements": requirements,
@@ -154,24 +176,110 @@ Return booking confirmations for both flight and hotel."""
     }
 
 
-# Build the graph
-graph = StateGraph(TravelSystemState)
+def booker_agent_node(state: TravelSystemState, config: RunnableConfig) -> TravelSystemState:
+    """
+    Book flights and hotels based on requirements and itinerary.
 
-graph.add_node("requirements_subgraph", requirements_subgraph_node)
-graph.add_node("planner", planner_agent_node)
-graph.add_node("booker", booker_agent_node)
+    Uses the deterministic fast path when the requirements carry every booking
+    input; the booker agent handles the rest, including whatever the fast path
+    could not book.
+    """
+    requirements = state.get("requirements")
+    itinerary = state.get("itinerary")
 
-# Define flow
-graph.add_edge(START, "requirements_subgraph")
-graph.add_edge("requirements_subgraph", "planner")
-graph.add_edge("planner", "booker")
-graph.add_edge("booker", END)
+    booked = None
+    if settings.BOOKING_FAST_PATH:
+        booked = book_from_requirements(
+            requirements, itinerary, state.get("hotel_options")
+        )
+        if bookings_complete(booked):
+            return _booker_update(booked.model_dump(), requirements, itinerary)
 
-# Compile the graph
-travel_system_graph = graph.compile(checkpointer=checkpointer)
+    booker_prompt = _booker_prompt(requirements, itinerary, state.get("hotel_options"), booked)
+
+    # Invoke booker agent
+    with llm_request_context(session_id(config), "background"):
+        response = components.get("booker_agent").invoke(
+            {"messages": [HumanMessage(content=booker_prompt)]}
+        )
+
+    # Extract structured bookings from response
+    bookings = merge_bookings(booked, response["structured_response"].bookings).model_dump()
+    return _booker_update(bookings, requirements, itinerary)
+
+
+async def abooker_agent_node(
+    state: TravelSystemState, config: RunnableConfig
+) -> TravelSystemState:
+    """
+    Async variant of `booker_agent_node`; booking tools run on the async client.
+    """
+    requirements = state.get("requirements")
+    itinerary = state.get("itinerary")
+
+    booked = None
+    if settings.BOOKING_FAST_PATH:
+        booked = await abook_from_requirements(
+            requirements, itinerary, state.get("hotel_options"), config
+        )
+        if bookings_complete(booked):
+            return _booker_update(booked.model_dump(), requirements, itinerary)
+
+    booker_prompt = _booker_prompt(requirements, itinerary, state.get("hotel_options"), booked)
+
+    with llm_request_context(session_id(config), "background"):
+        response = await components.get("booker_agent").ainvoke(
+            {"messages": [HumanMessage(content=booker_prompt)]}, config
+        )
+
+    bookings = merge_bookings(booked, response["structured_response"].bookings).model_dump()
+    return _booker_update(bookings, requirements, itinerary)
+
+
+def build_travel_system_graph():
+    """Compile the full pipeline; built on first use through `components`."""
+    graph = StateGraph(TravelSystemState)
+
+    # Each node carries a sync and an async implementation so the same compiled
+    # graph serves both `.invoke` and `.ainvoke`/`.astream`.
+    # The requirements graph is added as a native subgraph: it shares 'messages'
+    # and 'requirements' with the parent, and its ask-user interrupt surfaces on
+    # the parent thread, resumable with Command(resume=...). A paused session holds
+    # no thread or coroutine, only its checkpoint.
+    graph.add_node("requirements_subgraph", components.get("requirements_subgraph"))
+    graph.add_node("planner", RunnableLambda(planner_agent_node, afunc=aplanner_agent_node))
+    graph.add_node(
+        "hotel_prefetch", RunnableLambda(hotel_prefetch_node, afunc=ahotel_prefetch_node)
+    )
+    graph.add_node("booker", RunnableLambda(booker_agent_node, afunc=abooker_agent_node))
+
+    # Define flow: once requirements are complete the planner and the
+    # itinerary-independent hotel search run in parallel, joining at the booker.
+    graph.add_edge(START, "requirements_subgraph")
+    graph.add_edge("requirements_subgraph", "planner")
+    graph.add_edge("requirements_subgraph", "hotel_prefetch")
+    graph.add_edge(["planner", "hotel_prefetch"], "booker")
+    graph.add_edge("booker", END)
+
+    # Compile the graph. Instrumentation callbacks are inherited by every node,
+    # subgraph, agent, LLM call and tool call of a run.
+    return graph.compile(checkpointer=get_checkpointer()).with_config(
+        callbacks=instrumentation_callbacks()
+    )
+
+
+def __getattr__(name: str):
+    # `from app.agents.travel_system_graph import travel_system_graph` keeps working
+    if name == "travel_system_graph":
+        return components.get("travel_system_graph")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    from app.config import validate_settings
+
+    validate_settings()
+    travel_system_graph = components.get("travel_system_graph")
     initial_state = TravelSystemState(
         messages=[
             HumanMessage(
@@ -181,13 +289,21 @@ if __name__ == "__main__":
         requirements=None,
         itinerary=None,
         bookings=None,
+        hotel_options=None,
     )
 
     config = {"configurable": {"thread_id": "thread-1"}}
 
-    # Invoke the graph - interrupt loop is now handled inside requirements_subgraph_node
     result = travel_system_graph.invoke(initial_state, config)
 
+    # Requirements questions pause the whole graph; answer and resume the parent thread
+    while "__interrupt__" in result:
+        print(f"\n{result['__interrupt__'][0].value}")
+
+        user_input = input("Your response: ").strip()
+
+        result = travel_system_graph.invoke(Command(resume=user_input), config)
+
     print("\n=== FINAL RESULTS ===")
     print(f"Requirements: {json.dumps(result.get('requirements'), indent=2)}")
     print(f"\nItinerary: {json.dumps(result.get('itinerary'), indent=2)}")
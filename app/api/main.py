@@ -0,0 +1,139 @@
+# app/api/main.py
+"""HTTP API for the travel planner with server-sent event streaming."""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain.messages import HumanMessage
+from langgraph.types import Command
+from pydantic import BaseModel, Field
+
+from app.api.sessions import Session, sessions
+from app.config import validate_settings
+from app.core.components import components
+from app.core.checkpoint import checkpoint_usage_report
+from app.core.metrics import render_prometheus, traces
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Configuration is checked when the server starts, not when modules are
+    # imported; the graph (and with it the LLM client and agents) is built
+    # here so the first request does not pay for it.
+    validate_settings()
+    components.get("travel_system_graph")
+    yield
+
+
+app = FastAPI(title="Multi-Agent Travel Planner", lifespan=lifespan)
+
+
+class MessageRequest(BaseModel):
+    """A user message for a planning session."""
+
+    message: str = Field(..., description="User message, e.g. the initial trip request")
+
+
+class ResumeRequest(BaseModel):
+    """The user's answer to a pending clarification question."""
+
+    response: str = Field(..., description="Answer to the pending question")
+
+
+def _get_session(session_id: str) -> Session:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+def _ensure_idle(session: Session) -> None:
+    if session.running:
+        raise HTTPException(status_code=409, detail="Session is already running")
+
+
+@app.post("/sessions", status_code=201)
+async def create_session(request: MessageRequest) -> dict:
+    """Create a session and start planning from the initial message."""
+    session = sessions.create()
+    sessions.start_run(
+        session,
+        {
+            "messages": [HumanMessage(content=request.message)],
+            "requirements": None,
+            "itinerary": None,
+            "bookings": None,
+            "hotel_options": None,
+        },
+    )
+    return {"session_id": session.session_id, "status": session.status}
+
+
+@app.post("/sessions/{session_id}/messages")
+async def post_message(session_id: str, request: MessageRequest) -> dict:
+    """Send a message; answers the pending question if the session is waiting on one."""
+    session = _get_session(session_id)
+    _ensure_idle(session)
+    if session.status == "waiting_for_input":
+        sessions.start_run(session, Command(resume=request.message))
+    else:
+        sessions.start_run(session, {"messages": [HumanMessage(content=request.message)]})
+    return {"session_id": session.session_id, "status": session.status}
+
+
+@app.post("/sessions/{session_id}/resume")
+async def resume_session(session_id: str, request: ResumeRequest) -> dict:
+    """Resume a session paused on a clarification question."""
+    session = _get_session(session_id)
+    _ensure_idle(session)
+    if session.status != "waiting_for_input":
+        raise HTTPException(status_code=409, detail="Session is not waiting for input")
+    sessions.start_run(session, Command(resume=request.response))
+    return {"session_id": session.session_id, "status": session.status}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str) -> dict:
+    """Current status, pending question and results of a session."""
+    return await sessions.status(_get_session(session_id))
+
+
+@app.get("/sessions/{session_id}/events")
+async def stream_session(session_id: str) -> StreamingResponse:
+    """
+    Server-sent events for the session's current run: `token` (LLM output as it
+    is generated), `update` (graph node results), `interrupt` (question for the
+    user), `error` and a final `end`. Several clients may subscribe; each gets
+    the run's events from its start.
+    """
+    session = _get_session(session_id)
+    return StreamingResponse(
+        sessions.stream(session),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/sessions/{session_id}/trace")
+async def session_trace(session_id: str) -> dict:
+    """Timed spans (nodes, LLM calls with tokens, tool calls) recorded for the session."""
+    _get_session(session_id)
+    return traces.dump(session_id) or {"thread_id": session_id, "totals": {}, "spans": []}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Latency histograms, token, retry and cache counters in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/checkpoints/usage")
+async def checkpoints_usage() -> dict:
+    """Thread/checkpoint counts and memory or disk usage of the checkpoint store."""
+    return checkpoint_usage_report()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("app.api.main:app", host="0.0.0.0", port=8000)
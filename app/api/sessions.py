@@ -0,0 +1,232 @@
+# app/api/sessions.py
+"""
+Planning sessions driven through the travel system graph.
+
+Each session is one graph thread. A run (start, new message or resume) executes
+in a background task and publishes graph node updates, LLM tokens and
+interrupts to an event log of its own, which SSE subscribers read:
+
+- a new run starts a new log, so a subscriber only ever sees the run that was
+  current when it connected, never events left over from an earlier one;
+- any number of subscribers read the same log, each from its own position, and
+  one that connects late replays what the run has published so far;
+- a log keeps the last SESSION_EVENT_BUFFER events; a subscriber that falls
+  further behind skips the oldest (tokens, mostly), never the final `end`.
+
+Sessions idle for SESSION_TTL_SECONDS (no run, no subscriber) are dropped from
+the store; their graph threads stay in the checkpointer.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.components import components
+
+
+# Sent on idle SSE connections so proxies keep them open
+KEEPALIVE_SECONDS = 15.0
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "name": value.name, "content": value.content}
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return str(value)
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, default=_json_default)
+
+
+class RunEvents:
+    """Bounded event log of one run, read by any number of subscribers."""
+
+    def __init__(self, maxlen: int = 1000):
+        self._log: Deque[Tuple[str, Any]] = deque(maxlen=max(1, maxlen))
+        self._published = 0  # events ever published; positions count from 0
+        self.ended = False
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: str, data: Any) -> None:
+        async with self._changed:
+            self._log.append((event, data))
+            self._published += 1
+            self.ended = self.ended or event == "end"
+            self._changed.notify_all()
+
+    def read(self, position: int) -> Tuple[List[Tuple[str, Any]], int]:
+        """Events from `position` on (or the oldest still kept) and the next position."""
+        first = self._published - len(self._log)
+        return list(islice(self._log, max(position, first) - first, None)), self._published
+
+    async def wait(self, position: int, timeout: float) -> bool:
+        """Whether an event past `position` arrived within `timeout` seconds."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self._published > position), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+@dataclass
+class Session:
+    """In-process record of one planning session."""
+
+    session_id: str
+    status: str = "idle"  # idle | running | waiting_for_input | completed | cancelled | error
+    question: Optional[str] = None
+    error: Optional[str] = None
+    events: Optional[RunEvents] = None  # log of the latest run
+    task: Optional[asyncio.Task] = None
+    subscribers: int = 0
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def config(self) -> dict:
+        return {"configurable": {"thread_id": self.session_id}}
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+
+class SessionStore:
+    """Registry of live sessions and the runs that drive them."""
+
+    def __init__(self, ttl: Optional[float] = None, event_buffer: Optional[int] = None):
+        self._sessions: Dict[str, Session] = {}
+        self._ttl = settings.SESSION_TTL_SECONDS if ttl is None else ttl
+        self._event_buffer = settings.SESSION_EVENT_BUFFER if event_buffer is None else event_buffer
+        self._last_eviction = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> Session:
+        self.evict_idle()
+        session = Session(session_id=uuid.uuid4().hex)
+        self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def evict_idle(self, force: bool = False) -> int:
+        """Drop sessions with no run or subscriber for the TTL; checked at most once a minute."""
+        now = time.monotonic()
+        if self._ttl <= 0 or (not force and now - self._last_eviction < min(60.0, self._ttl)):
+            return 0
+        self._last_eviction = now
+        idle = [
+            session_id
+            for session_id, session in self._sessions.items()
+            if not session.running and not session.subscribers and now - session.last_active > self._ttl
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+        return len(idle)
+
+    def start_run(self, session: Session, graph_input: Any) -> None:
+        session.status = "running"
+        session.question = None
+        session.error = None
+        session.events = RunEvents(self._event_buffer)
+        session.touch()
+        session.task = asyncio.create_task(self._run(session, session.events, graph_input))
+
+    async def _run(self, session: Session, events: RunEvents, graph_input: Any) -> None:
+        try:
+            travel_system_graph = components.get("travel_system_graph")
+            async for namespace, mode, chunk in travel_system_graph.astream(
+                graph_input,
+                session.config,
+                stream_mode=["updates", "messages"],
+                subgraphs=True,
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if isinstance(message, AIMessageChunk) and isinstance(message.content, str) and message.content:
+                        await events.publish(
+                            "token",
+                            {"node": metadata.get("langgraph_node"), "content": message.content},
+                        )
+                    continue
+
+                for node, update in chunk.items():
+                    if node == "__interrupt__":
+                        session.question = str(update[0].value) if update else None
+                        await events.publish("interrupt", {"question": session.question})
+                    else:
+                        await events.publish(
+                            "update",
+                            {"node": node, "namespace": list(namespace), "update": update},
+                        )
+
+            snapshot = await travel_system_graph.aget_state(session.config)
+            session.status = "waiting_for_input" if snapshot.next else "completed"
+        except asyncio.CancelledError:
+            # Client gone, eviction or shutdown: subscribers still get a truthful `end`
+            session.status = "cancelled"
+            session.error = "Run was cancelled"
+            raise
+        except Exception as e:
+            session.status = "error"
+            session.error = str(e)
+            await events.publish("error", {"error": session.error})
+        finally:
+            session.touch()
+            await events.publish("end", {"status": session.status})
+
+    async def stream(self, session: Session) -> AsyncIterator[str]:
+        """Server-sent events for the session's latest run, until it ends."""
+        events = session.events
+        if events is None:
+            return
+        session.subscribers += 1
+        position = 0
+        try:
+            while True:
+                batch, position = events.read(position)
+                for event, data in batch:
+                    yield f"event: {event}\ndata: {_dumps(data)}\n\n"
+                    if event == "end":
+                        return
+                if not await events.wait(position, KEEPALIVE_SECONDS):
+                    yield ": keep-alive\n\n"
+        finally:
+            session.subscribers -= 1
+            session.touch()
+
+    async def status(self, session: Session) -> dict:
+        snapshot = await components.get("travel_system_graph").aget_state(session.config)
+        values = snapshot.values or {}
+        return {
+            "session_id": session.session_id,
+            "status": session.status,
+            "question": session.question,
+            "error": session.error,
+            "next": list(snapshot.next),
+            "requirements": values.get("requirements"),
+            "itinerary": values.get("itinerary"),
+            "bookings": values.get("bookings"),
+        }
+
+
+sessions = SessionStore()
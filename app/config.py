@@ -13,18 +13,185 @@ class Settings(BaseModel):
 
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL_NAME: str = "gpt-4.1"
+    # Model per agent; "" uses OPENAI_MODEL_NAME
+    REQUIREMENTS_MODEL_NAME: str = ""
+    PLANNER_MODEL_NAME: str = ""
+    BOOKER_MODEL_NAME: str = ""
+    # Clarifying requirement turns run on this model; a turn it finds complete is
+    # redone on REQUIREMENTS_MODEL_NAME for the final extraction. "" disables routing
+    REQUIREMENTS_FAST_MODEL_NAME: str = "gpt-4.1-mini"
     CONVEX_BASE_URL: str = ""
 
+    # Shared keep-alive connection pool for the Convex backend
+    CONVEX_POOL_CONNECTIONS: int = 10  # number of per-host pools kept alive
+    CONVEX_POOL_MAXSIZE: int = 20  # max open connections per host
+    CONVEX_POOL_BLOCK: bool = False  # wait for a free connection instead of opening extra ones
+    CONVEX_CONNECT_TIMEOUT: float = 3.05
+    CONVEX_READ_TIMEOUT: float = 10.0  # per attempt, clipped to the call's deadline
+
+    # Convex resilience: deadlines per call (all attempts), retries for searches only
+    CONVEX_SEARCH_DEADLINE_SECONDS: float = 8.0
+    CONVEX_BOOKING_DEADLINE_SECONDS: float = 15.0
+    CONVEX_SEARCH_RETRIES: int = 2  # extra attempts; bookings are never retried
+    CONVEX_RETRY_BACKOFF_SECONDS: float = 0.2  # full-jitter base, doubled per attempt
+    CONVEX_RETRY_BACKOFF_MAX_SECONDS: float = 2.0
+    CONVEX_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures that open an endpoint's circuit
+    CONVEX_BREAKER_RESET_SECONDS: float = 30.0  # open time before a trial request
+    CONVEX_HEDGE_AFTER_SECONDS: float = 0.0  # duplicate a slow search after this long; 0 disables
+
+    # In-process cache for /flights/search results
+    FLIGHT_CACHE_TTL_SECONDS: float = 300.0
+    FLIGHT_CACHE_STALE_SECONDS: float = 600.0  # serve stale while refreshing
+    FLIGHT_CACHE_MAXSIZE: int = 1024
+    FLIGHT_SEARCH_DEFAULT_LIMIT: int = 5  # options returned to the LLM per search
+    HOTEL_SEARCH_DEFAULT_LIMIT: int = 5  # hotels returned to the LLM per search
+    FLIGHT_SEARCH_CONCURRENCY: int = 7  # concurrent Convex searches per calendar/batch call
+    FLIGHT_CALENDAR_MAX_FLEX_DAYS: int = 7  # widest ± window a calendar may span
+    FLIGHT_BATCH_MAX_LEGS: int = 6  # routes per batch flight search
+
+    # Local airport index for city/name -> IATA lookups; "" uses app/agents/airports.csv
+    AIRPORT_DATA_PATH: str = ""
+    AIRPORT_NEARBY_RADIUS_KM: float = 200.0  # alternatives offered when a route has no flights
+    AIRPORT_NEARBY_LIMIT: int = 3  # alternatives per airport
+
+    # Persistent SQLite cache for planner web searches
+    SEARCH_CACHE_PATH: str = ".cache/travel_planner.sqlite3"
+    SEARCH_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    SEARCH_CACHE_MAX_ENTRIES: int = 5000
+    SEARCH_BATCH_CONCURRENCY: int = 4  # parallel queries per web_search_batch call
+    SEARCH_BATCH_MAX_QUERIES: int = 8
+
+    # Memoized planner itineraries: "memory", "sqlite" (SEARCH_CACHE_PATH) or "none"
+    ITINERARY_CACHE_BACKEND: str = "memory"
+    ITINERARY_CACHE_TTL_SECONDS: float = 24 * 3600.0
+    ITINERARY_CACHE_MAX_ENTRIES: int = 512
+
+    # Book directly from the requirements dict; the booker LLM is only a fallback
+    BOOKING_FAST_PATH: bool = True
+    # Warm the flight cache for routes seen in partial requirements while the user types
+    FLIGHT_PREFETCH: bool = True
+
+    # Requirements loop history sent to the LLM: summary + recent turns
+    REQUIREMENTS_HISTORY_TOKEN_BUDGET: int = 1500
+    REQUIREMENTS_KEEP_LAST_MESSAGES: int = 6
+    # Complete the requirements in code when an answer only supplies fields that can be
+    # parsed directly (contact details, traveler counts, a yes to the flight): no LLM turn
+    REQUIREMENTS_CODE_FILL: bool = True
+
+    # Admission control for all LLM calls; 0 disables a limit
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_MAX_CONCURRENCY: int = 16  # calls in flight per process
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 120.0
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = 512  # reserved per call until usage is reported
+    # "memory" (per process) or "sqlite" (budgets shared by processes on this host)
+    LLM_RATE_LIMIT_BACKEND: str = "memory"
+    LLM_RATE_LIMIT_PATH: str = ".cache/llm_rate_limit.sqlite3"
+
+    # API sessions: events kept per run for SSE subscribers; idle sessions dropped after the TTL (0 keeps them)
+    SESSION_EVENT_BUFFER: int = 1000
+    SESSION_TTL_SECONDS: float = 3600.0
+
+    # Node/tool/LLM timings and token counts (Prometheus text + per-session traces)
+    INSTRUMENTATION_ENABLED: bool = True
+    TRACE_MAX_THREADS: int = 200  # sessions whose traces are kept
+    TRACE_MAX_SPANS: int = 1000  # most recent spans kept per session
+    TRACE_OPEN_SPAN_TTL_SECONDS: float = 3600.0  # unfinished spans (cancelled runs) dropped after this
+
+    # Graph checkpoint storage: "sqlite" (durable, bounded) or "memory"
+    CHECKPOINTER_BACKEND: str = "sqlite"
+    CHECKPOINT_DB_PATH: str = ".cache/checkpoints.sqlite3"
+    CHECKPOINT_KEEP_LAST: int = 5  # checkpoints kept per thread and namespace
+    CHECKPOINT_THREAD_TTL_SECONDS: float = 24 * 3600.0  # 0 disables idle eviction
+    CHECKPOINT_PRUNE_INTERVAL_SECONDS: float = 300.0
+
 
 settings = Settings(
     OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "",
     OPENAI_MODEL_NAME=os.getenv("OPENAI_MODEL_NAME", "gpt-4.1"),
+    REQUIREMENTS_MODEL_NAME=os.getenv("REQUIREMENTS_MODEL_NAME", ""),
+    PLANNER_MODEL_NAME=os.getenv("PLANNER_MODEL_NAME", ""),
+    BOOKER_MODEL_NAME=os.getenv("BOOKER_MODEL_NAME", ""),
+    REQUIREMENTS_FAST_MODEL_NAME=os.getenv("REQUIREMENTS_FAST_MODEL_NAME", "gpt-4.1-mini"),
     CONVEX_BASE_URL=os.getenv("CONVEX_BASE_URL") or "",
+    CONVEX_POOL_CONNECTIONS=os.getenv("CONVEX_POOL_CONNECTIONS", "10"),
+    CONVEX_POOL_MAXSIZE=os.getenv("CONVEX_POOL_MAXSIZE", "20"),
+    CONVEX_POOL_BLOCK=os.getenv("CONVEX_POOL_BLOCK", "false"),
+    CONVEX_CONNECT_TIMEOUT=os.getenv("CONVEX_CONNECT_TIMEOUT", "3.05"),
+    CONVEX_READ_TIMEOUT=os.getenv("CONVEX_READ_TIMEOUT", "10"),
+    CONVEX_SEARCH_DEADLINE_SECONDS=os.getenv("CONVEX_SEARCH_DEADLINE_SECONDS", "8"),
+    CONVEX_BOOKING_DEADLINE_SECONDS=os.getenv("CONVEX_BOOKING_DEADLINE_SECONDS", "15"),
+    CONVEX_SEARCH_RETRIES=os.getenv("CONVEX_SEARCH_RETRIES", "2"),
+    CONVEX_RETRY_BACKOFF_SECONDS=os.getenv("CONVEX_RETRY_BACKOFF_SECONDS", "0.2"),
+    CONVEX_RETRY_BACKOFF_MAX_SECONDS=os.getenv("CONVEX_RETRY_BACKOFF_MAX_SECONDS", "2"),
+    CONVEX_BREAKER_FAILURE_THRESHOLD=os.getenv("CONVEX_BREAKER_FAILURE_THRESHOLD", "5"),
+    CONVEX_BREAKER_RESET_SECONDS=os.getenv("CONVEX_BREAKER_RESET_SECONDS", "30"),
+    CONVEX_HEDGE_AFTER_SECONDS=os.getenv("CONVEX_HEDGE_AFTER_SECONDS", "0"),
+    FLIGHT_CACHE_TTL_SECONDS=os.getenv("FLIGHT_CACHE_TTL_SECONDS", "300"),
+    FLIGHT_CACHE_STALE_SECONDS=os.getenv("FLIGHT_CACHE_STALE_SECONDS", "600"),
+    FLIGHT_CACHE_MAXSIZE=os.getenv("FLIGHT_CACHE_MAXSIZE", "1024"),
+    FLIGHT_SEARCH_DEFAULT_LIMIT=os.getenv("FLIGHT_SEARCH_DEFAULT_LIMIT", "5"),
+    HOTEL_SEARCH_DEFAULT_LIMIT=os.getenv("HOTEL_SEARCH_DEFAULT_LIMIT", "5"),
+    FLIGHT_SEARCH_CONCURRENCY=os.getenv("FLIGHT_SEARCH_CONCURRENCY", "7"),
+    FLIGHT_CALENDAR_MAX_FLEX_DAYS=os.getenv("FLIGHT_CALENDAR_MAX_FLEX_DAYS", "7"),
+    FLIGHT_BATCH_MAX_LEGS=os.getenv("FLIGHT_BATCH_MAX_LEGS", "6"),
+    AIRPORT_DATA_PATH=os.getenv("AIRPORT_DATA_PATH", ""),
+    AIRPORT_NEARBY_RADIUS_KM=os.getenv("AIRPORT_NEARBY_RADIUS_KM", "200"),
+    AIRPORT_NEARBY_LIMIT=os.getenv("AIRPORT_NEARBY_LIMIT", "3"),
+    SEARCH_CACHE_PATH=os.getenv("SEARCH_CACHE_PATH", ".cache/travel_planner.sqlite3"),
+    SEARCH_CACHE_TTL_SECONDS=os.getenv("SEARCH_CACHE_TTL_SECONDS", "604800"),
+    SEARCH_CACHE_MAX_ENTRIES=os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"),
+    SEARCH_BATCH_CONCURRENCY=os.getenv("SEARCH_BATCH_CONCURRENCY", "4"),
+    SEARCH_BATCH_MAX_QUERIES=os.getenv("SEARCH_BATCH_MAX_QUERIES", "8"),
+    ITINERARY_CACHE_BACKEND=os.getenv("ITINERARY_CACHE_BACKEND", "memory"),
+    ITINERARY_CACHE_TTL_SECONDS=os.getenv("ITINERARY_CACHE_TTL_SECONDS", "86400"),
+    ITINERARY_CACHE_MAX_ENTRIES=os.getenv("ITINERARY_CACHE_MAX_ENTRIES", "512"),
+    BOOKING_FAST_PATH=os.getenv("BOOKING_FAST_PATH", "true"),
+    FLIGHT_PREFETCH=os.getenv("FLIGHT_PREFETCH", "true"),
+    REQUIREMENTS_HISTORY_TOKEN_BUDGET=os.getenv("REQUIREMENTS_HISTORY_TOKEN_BUDGET", "1500"),
+    REQUIREMENTS_KEEP_LAST_MESSAGES=os.getenv("REQUIREMENTS_KEEP_LAST_MESSAGES", "6"),
+    REQUIREMENTS_CODE_FILL=os.getenv("REQUIREMENTS_CODE_FILL", "true"),
+    LLM_RATE_LIMIT_ENABLED=os.getenv("LLM_RATE_LIMIT_ENABLED", "true"),
+    LLM_REQUESTS_PER_MINUTE=os.getenv("LLM_REQUESTS_PER_MINUTE", "500"),
+    LLM_TOKENS_PER_MINUTE=os.getenv("LLM_TOKENS_PER_MINUTE", "200000"),
+    LLM_MAX_CONCURRENCY=os.getenv("LLM_MAX_CONCURRENCY", "16"),
+    LLM_QUEUE_TIMEOUT_SECONDS=os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "120"),
+    LLM_COMPLETION_TOKENS_ESTIMATE=os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "512"),
+    LLM_RATE_LIMIT_BACKEND=os.getenv("LLM_RATE_LIMIT_BACKEND", "memory"),
+    LLM_RATE_LIMIT_PATH=os.getenv("LLM_RATE_LIMIT_PATH", ".cache/llm_rate_limit.sqlite3"),
+    SESSION_EVENT_BUFFER=os.getenv("SESSION_EVENT_BUFFER", "1000"),
+    SESSION_TTL_SECONDS=os.getenv("SESSION_TTL_SECONDS", "3600"),
+    INSTRUMENTATION_ENABLED=os.getenv("INSTRUMENTATION_ENABLED", "true"),
+    TRACE_MAX_THREADS=os.getenv("TRACE_MAX_THREADS", "200"),
+    TRACE_MAX_SPANS=os.getenv("TRACE_MAX_SPANS", "1000"),
+    TRACE_OPEN_SPAN_TTL_SECONDS=os.getenv("TRACE_OPEN_SPAN_TTL_SECONDS", "3600"),
+    CHECKPOINTER_BACKEND=os.getenv("CHECKPOINTER_BACKEND", "sqlite"),
+    CHECKPOINT_DB_PATH=os.getenv("CHECKPOINT_DB_PATH", ".cache/checkpoints.sqlite3"),
+    CHECKPOINT_KEEP_LAST=os.getenv("CHECKPOINT_KEEP_LAST", "5"),
+    CHECKPOINT_THREAD_TTL_SECONDS=os.getenv("CHECKPOINT_THREAD_TTL_SECONDS", "86400"),
+    CHECKPOINT_PRUNE_INTERVAL_SECONDS=os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "300"),
 )
 
-# Fail fast if essential keys are missing
-if not settings.OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable not set.")
+REQUIRED_SETTINGS = ("OPENAI_API_KEY", "CONVEX_BASE_URL")
+
+# Settings limited to a set of values, checked with the required ones
+SETTING_CHOICES = {
+    "LLM_RATE_LIMIT_BACKEND": ("memory", "sqlite"),
+}
+
 
-if not settings.CONVEX_BASE_URL:
-    raise ValueError("CONVEX_BASE_URL environment variable not set.")
\ No newline at end of file
+def validate_settings(*names: str) -> None:
+    """
+    Fail fast if essential keys are missing. Entry points (API startup,
+    __main__ blocks) call this once; importing the package does not, so
+    workers and tests can import modules without a full environment.
+    """
+    for name in names or REQUIRED_SETTINGS:
+        if not getattr(settings, name):
+            raise ValueError(f"{name} environment variable not set.")
+    for name in names or SETTING_CHOICES:
+        choices = SETTING_CHOICES.get(name)
+        value = str(getattr(settings, name)).lower()
+        if choices and value not in choices:
+            raise ValueError(f"Unknown {name}: {value!r} (expected one of {', '.join(choices)})")
@@ -0,0 +1,391 @@
+# app/core/cache.py
+"""
+Caches shared by the agent tools.
+
+- TTLCache: in-process TTL + LRU cache with stale-while-revalidate and
+  single-flight loads.
+- SQLiteCache: persistent, size-capped cache that survives restarts.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+# Background refreshes for stale entries served from sync callers
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+@dataclass
+class CacheStats:
+    """Counters for a single cache instance."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # callers that waited on another caller's in-flight load
+    loads: int = 0
+    load_errors: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    prefetches: int = 0  # speculative background loads scheduled
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class TTLCache:
+    """
+    Bounded key/value cache.
+
+    Entries are fresh for `ttl` seconds and may then be served for another
+    `stale_ttl` seconds while a single background reload refreshes them.
+    Beyond `maxsize` entries the least recently used one is evicted.
+    Concurrent misses for the same key share one loader call.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        name: str = "cache",
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._cacheable = cacheable or (lambda value: True)
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._ainflight: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self._stats = CacheStats()
+        self._background: set = set()  # strong refs to async refresh tasks
+
+    # -- basic operations -------------------------------------------------
+
+    def _lookup(self, key: Hashable, now: float) -> Tuple[Optional[_Entry], bool]:
+        """Return (entry, is_fresh); caller must hold the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None, False
+        if now >= entry.stale_until:
+            del self._data[key]
+            self._stats.expirations += 1
+            return None, False
+        self._data.move_to_end(key)
+        return entry, now < entry.fresh_until
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh or stale value without loading, or None."""
+        entry, _ = self._classify(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self._cacheable(value):
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = _Entry(value, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "size": len(self._data), **asdict(self._stats)}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # -- sync loading -------------------------------------------------------
+
+    def _classify(self, key: Hashable) -> Tuple[Optional[_Entry], bool]:
+        with self._lock:
+            entry, fresh = self._lookup(key, time.monotonic())
+            if entry is None:
+                self._stats.misses += 1
+            elif fresh:
+                self._stats.hits += 1
+            else:
+                self._stats.stale_hits += 1
+            return entry, fresh
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Run `loader` once per key across threads and store its result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats.loads += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._stats.load_errors += 1
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _quiet_load(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        try:
+            self._load(key, loader)
+        except Exception:
+            pass  # background loads never surface errors; callers load again
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._inflight:
+                return
+        # A failed refresh keeps serving the stale value until it expires
+        _refresh_executor.submit(self._quiet_load, key, loader)
+
+    def prefetch(self, key: Hashable, loader: Callable[[], Any]) -> bool:
+        """
+        Warm `key` in the background unless it is fresh or already loading.
+        Returns True if a load was scheduled. Hit/miss counters are untouched.
+        """
+        with self._lock:
+            _, fresh = self._lookup(key, time.monotonic())
+            if fresh or key in self._inflight:
+                return False
+            self._stats.prefetches += 1
+        _refresh_executor.submit(self._quiet_load, key, loader)
+        return True
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        entry, fresh = self._classify(key)
+        if entry is not None:
+            if not fresh:
+                self._refresh_in_background(key, loader)
+            return entry.value
+        return self._load(key, loader)
+
+    # -- async loading ------------------------------------------------------
+
+    async def _aload(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        task = self._ainflight.get(slot)
+        if task is not None:
+            self._stats.coalesced += 1
+        else:
+            # The load runs as its own task: cancelling the caller that started it
+            # (client gone, hedge lost, prefetch dropped) must not cancel the load
+            # other callers are waiting on
+            self._stats.loads += 1
+            task = loop.create_task(self._run_load(slot, loader))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._ainflight[slot] = task
+        return await asyncio.shield(task)
+
+    async def _run_load(self, slot: tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except BaseException:
+            self._stats.load_errors += 1
+            raise
+        else:
+            self.set(slot[1], value)
+            return value
+        finally:
+            self._ainflight.pop(slot, None)
+
+    async def aget_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        entry, fresh = self._classify(key)
+        if entry is not None:
+            if not fresh and (asyncio.get_running_loop(), key) not in self._ainflight:
+                self._spawn(self._aload(key, loader))
+            return entry.value
+        return await self._aload(key, loader)
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def aprefetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Async counterpart of `prefetch`: schedules the load as a task on the
+        running loop, where later `aget_or_load` calls coalesce onto it.
+        """
+        slot = (asyncio.get_running_loop(), key)
+        with self._lock:
+            _, fresh = self._lookup(key, time.monotonic())
+            if fresh or slot in self._ainflight:
+                return False
+            self._stats.prefetches += 1
+        self._spawn(self._aload(key, loader))
+        return True
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache in a single SQLite file.
+
+    Values are stored as JSON under a namespace so several caches can share
+    one database. Each entry carries its own expiry, and once a namespace
+    exceeds `max_entries` the least recently read rows are dropped.
+    The connection is opened lazily on first use.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl: float, max_entries: int):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_lru "
+                "ON cache_entries (namespace, accessed_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._stats.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at, now),
+            )
+            self._enforce_size(conn, now)
+
+    def _enforce_size(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now),
+        )
+        (count,) = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (self.namespace, self.namespace, overflow),
+            )
+            self._stats.evictions += overflow
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._connection().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            return {"name": self.namespace, "size": size, **asdict(self._stats)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,466 @@
+# app/core/checkpoint.py
+"""
+Checkpoint storage for the LangGraph graphs.
+
+`get_checkpointer()` returns the process-wide saver selected by
+Settings.CHECKPOINTER_BACKEND:
+
+- "memory": langgraph's InMemorySaver (unbounded, lost on restart)
+- "sqlite": SQLiteCheckpointSaver, a durable store that keeps only the last
+  CHECKPOINT_KEEP_LAST checkpoints per thread and namespace and drops threads
+  idle for longer than CHECKPOINT_THREAD_TTL_SECONDS.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.config import settings
+
+
+# Payloads above this size are zlib-compressed before they are stored
+_COMPRESS_MIN_BYTES = 512
+_ZLIB_SUFFIX = "+zlib"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """Bounded, durable checkpoint saver backed by a single SQLite file."""
+
+    def __init__(
+        self,
+        path: str,
+        keep_last: int = 5,
+        thread_ttl: Optional[float] = None,
+        prune_interval: float = 300.0,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.keep_last = max(1, keep_last)
+        self.thread_ttl = thread_ttl
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._last_prune = time.time()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # -- serialization ------------------------------------------------------
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        type_, payload = self.serde.dumps_typed(value)
+        if len(payload) >= _COMPRESS_MIN_BYTES:
+            return type_ + _ZLIB_SUFFIX, zlib.compress(payload)
+        return type_, payload
+
+    def _load(self, type_: str, payload: bytes) -> Any:
+        if type_.endswith(_ZLIB_SUFFIX):
+            type_, payload = type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+    # -- reads --------------------------------------------------------------
+
+    def _pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, self._load(type_, value)) for task_id, channel, type_, value in rows]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self._load(type_, checkpoint),
+            metadata=self._load(metadata_type, metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=self._pending_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            "checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                item = self._tuple(thread_id, checkpoint_ns, tuple(row))
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(item)
+        yield from results
+
+    # -- writes -------------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, payload = self._dump(checkpoint)
+        metadata_type, metadata_payload = self._dump(get_checkpoint_metadata(config, metadata))
+        now = time.time()
+
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        type_,
+                        payload,
+                        metadata_type,
+                        metadata_payload,
+                    ),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+                    (thread_id, now),
+                )
+                self._apply_retention(thread_id, checkpoint_ns)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if self.thread_ttl and now - self._last_prune >= self.prune_interval:
+                self._last_prune = now
+                self._prune_idle_threads(now - self.thread_ttl)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _apply_retention(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the newest `keep_last` checkpoints (and their writes)."""
+        stale = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.keep_last),
+        ).fetchall()
+        for (checkpoint_id,) in stale:
+            for table in ("checkpoints", "writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                )
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Regular writes are idempotent per (task, index); special channels
+        # (errors, interrupts) carry negative indexes and are overwritten.
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        statement = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, payload = self._dump(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    payload,
+                    task_path,
+                )
+            )
+        with self._lock:
+            self._conn.executemany(
+                f"{statement} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_threads([thread_id])
+
+    def _delete_threads(self, thread_ids: Sequence[str]) -> None:
+        for thread_id in thread_ids:
+            for table in ("checkpoints", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def _prune_idle_threads(self, cutoff: float) -> int:
+        idle = [
+            thread_id
+            for (thread_id,) in self._conn.execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)
+            ).fetchall()
+        ]
+        self._delete_threads(idle)
+        return len(idle)
+
+    def prune_idle_threads(self, ttl: Optional[float] = None) -> int:
+        """Delete threads not updated within `ttl` seconds; returns how many."""
+        ttl = self.thread_ttl if ttl is None else ttl
+        if not ttl:
+            return 0
+        with self._lock:
+            self._last_prune = time.time()
+            return self._prune_idle_threads(self._last_prune - ttl)
+
+    # -- reporting ----------------------------------------------------------
+
+    def usage_report(self) -> dict:
+        """Row counts, stored payload bytes and on-disk size of the store."""
+        with self._lock:
+            conn = self._conn
+            (threads,) = conn.execute("SELECT COUNT(*) FROM threads").fetchone()
+            checkpoints, checkpoint_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+            ).fetchone()
+            writes, write_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM writes"
+            ).fetchone()
+            (page_count,) = conn.execute("PRAGMA page_count").fetchone()
+            (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+        wal_path = f"{self.path}-wal"
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "writes": writes,
+            "payload_bytes": checkpoint_bytes + write_bytes,
+            "db_bytes": page_count * page_size,
+            "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            "keep_last": self.keep_last,
+            "thread_ttl_seconds": self.thread_ttl,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- async API: SQLite calls are short, run them off the event loop -----
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _memory_usage_report(saver: InMemorySaver) -> dict:
+    checkpoints = sum(len(ns) for thread in saver.storage.values() for ns in thread.values())
+    payload_bytes = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for thread in saver.storage.values()
+        for ns in thread.values()
+        for checkpoint, metadata, _ in ns.values()
+    ) + sum(len(blob[1]) for blob in saver.blobs.values())
+    return {
+        "backend": "memory",
+        "threads": len(saver.storage),
+        "checkpoints": checkpoints,
+        "writes": sum(len(w) for w in saver.writes.values()),
+        "payload_bytes": payload_bytes,
+    }
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Process-wide checkpointer selected by Settings.CHECKPOINTER_BACKEND."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                backend = settings.CHECKPOINTER_BACKEND.lower()
+                if backend == "memory":
+                    _checkpointer = InMemorySaver()
+                elif backend == "sqlite":
+                    _checkpointer = SQLiteCheckpointSaver(
+                        settings.CHECKPOINT_DB_PATH,
+                        keep_last=settings.CHECKPOINT_KEEP_LAST,
+                        thread_ttl=settings.CHECKPOINT_THREAD_TTL_SECONDS or None,
+                        prune_interval=settings.CHECKPOINT_PRUNE_INTERVAL_SECONDS,
+                    )
+                else:
+                    raise ValueError(f"Unknown CHECKPOINTER_BACKEND: {settings.CHECKPOINTER_BACKEND}")
+    return _checkpointer
+
+
+def checkpoint_usage_report() -> dict:
+    """Memory/disk usage of the configured checkpointer."""
+    saver = get_checkpointer()
+    if isinstance(saver, SQLiteCheckpointSaver):
+        return saver.usage_report()
+    if isinstance(saver, InMemorySaver):
+        return _memory_usage_report(saver)
+    return {"backend": type(saver).__name__}
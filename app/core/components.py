@@ -0,0 +1,86 @@
+# app/core/components.py
+"""
+Lazily built, process-wide components.
+
+LLM clients, agents, compiled graphs and heavy third-party tools are not
+created at import time. Each is registered here under a name with a factory
+given as a "module:function" path, so neither the module nor its
+dependencies are imported until `components.get(name)` is first called.
+Tests and load harnesses can `override` a component (e.g. a scripted chat
+model for "llm") before anything that depends on it is built.
+"""
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+Factory = Union[str, Callable[[], Any]]
+
+
+# Default wiring of the application
+DEFAULT_FACTORIES: Dict[str, str] = {
+    "llm": "app.core.llm:build_llm",
+    "requirements_agent": "app.agents.travel_system_agents:build_requirements_agent",
+    "requirements_fast_agent": "app.agents.travel_system_agents:build_requirements_fast_agent",
+    "planner_agent": "app.agents.travel_system_agents:build_planner_agent",
+    "booker_agent": "app.agents.travel_system_agents:build_booker_agent",
+    "requirements_graph": "app.agents.requirment_graph:build_requirements_graph",
+    "requirements_subgraph": "app.agents.requirment_graph:build_requirements_subgraph",
+    "travel_system_graph": "app.agents.travel_system_graph:build_travel_system_graph",
+    "duckduckgo": "app.agents.tools.planner_tools:build_duckduckgo",
+    "airport_index": "app.agents.airports:build_airport_index",
+}
+
+
+def _resolve(factory: Factory) -> Callable[[], Any]:
+    if callable(factory):
+        return factory
+    module_name, _, attr = factory.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class Components:
+    """Registry of named singletons built on first use."""
+
+    def __init__(self, factories: Optional[Dict[str, Factory]] = None):
+        self._factories: Dict[str, Factory] = dict(factories or {})
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()  # factories may get() their dependencies
+
+    def register(self, name: str, factory: Factory) -> None:
+        """Set the factory for `name`; an already built instance is dropped."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def override(self, name: str, instance: Any) -> None:
+        """Use `instance` for `name` instead of building it."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name: str, factory: Optional[Factory] = None) -> Any:
+        """Instance for `name`; `factory` is registered first if none is yet."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if factory is not None:
+                    self._factories.setdefault(name, factory)
+                if name not in self._factories:
+                    raise KeyError(f"No component registered as {name!r}")
+                self._instances[name] = _resolve(self._factories[name])()
+            return self._instances[name]
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Forget built instances (all, or one) so they are rebuilt on next use."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def built(self) -> List[str]:
+        return sorted(self._instances)
+
+
+components = Components(DEFAULT_FACTORIES)
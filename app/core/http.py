@@ -0,0 +1,100 @@
+# app/core/http.py
+"""Shared, pooled HTTP transport for the Convex backend.
+
+Every tool talks to the same host, so they share one keep-alive session
+instead of paying a fresh TCP+TLS handshake per call. Async tools use an
+httpx.AsyncClient with the same pool limits, one per event loop.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import settings
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.CONVEX_POOL_CONNECTIONS,
+        pool_maxsize=settings.CONVEX_POOL_MAXSIZE,
+        pool_block=settings.CONVEX_POOL_BLOCK,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+def get_convex_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close_convex_session() -> None:
+    """Close the shared session and drop its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_async_convex_client() -> httpx.AsyncClient:
+    """Return the pooled async client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        # Forget clients whose loops have gone away (e.g. asyncio.run in scripts)
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale_loop]
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.CONVEX_POOL_MAXSIZE,
+                max_keepalive_connections=settings.CONVEX_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.CONVEX_READ_TIMEOUT, connect=settings.CONVEX_CONNECT_TIMEOUT
+            ),
+            headers={"Accept": "application/json"},
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_convex_client() -> None:
+    """Close the async client bound to the running event loop."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def convex_url(path: str) -> str:
+    """Build an absolute Convex URL for an API path such as '/flights/search'."""
+    return f"{settings.CONVEX_BASE_URL.rstrip('/')}{path}"
+
+
+def convex_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout tuple for Convex requests."""
+    return (settings.CONVEX_CONNECT_TIMEOUT, settings.CONVEX_READ_TIMEOUT)
+
+
+def convex_field(record: dict, *names: str):
+    """First present value among alternative Convex field names."""
+    for name in names:
+        if record.get(name) is not None:
+            return record[name]
+    return None
@@ -1,4 +1,66 @@
-from langchain_openai import ChatOpenAI
-from app.config import settings
+from typing import Optional
 
-llm = ChatOpenAI(model=settings.OPENAI_MODEL_NAME, api_key=settings.OPENAI_API_KEY)
\ No newline at end of file
+from app.config import settings, validate_settings
+from app.core.components import components
+from app.core.metrics import instrumentation_callbacks
+from app.core.rate_limit import rate_limited
+
+# Settings field naming the model of each agent role
+_ROLE_MODELS = {
+    "requirements": "REQUIREMENTS_MODEL_NAME",
+    "requirements_fast": "REQUIREMENTS_FAST_MODEL_NAME",
+    "planner": "PLANNER_MODEL_NAME",
+    "booker": "BOOKER_MODEL_NAME",
+}
+
+
+def model_name(role: str) -> str:
+    """Model configured for an agent role ("requirements", "requirements_fast", "planner", "booker")."""
+    name = getattr(settings, _ROLE_MODELS[role])
+    if not name and role == "requirements_fast":
+        return model_name("requirements")  # routing disabled: one model for every turn
+    return name or settings.OPENAI_MODEL_NAME
+
+
+def fast_routing_enabled() -> bool:
+    """True when clarifying requirement turns run on a different model than the final extraction."""
+    return model_name("requirements_fast") != model_name("requirements")
+
+
+def build_llm(model: Optional[str] = None):
+    """Chat model for `model` (default OPENAI_MODEL_NAME); built on first use via `components`."""
+    # Imported here: langchain_openai (and the OpenAI SDK) dominate cold start
+    from langchain_openai import ChatOpenAI
+
+    validate_settings("OPENAI_API_KEY")
+    # Every call is admitted by the shared RPM/TPM limiter (app/core/rate_limit.py)
+    model_cls = rate_limited(ChatOpenAI) if settings.LLM_RATE_LIMIT_ENABLED else ChatOpenAI
+    # stream_usage: token counts are reported for streamed runs too.
+    # The callbacks are also attached here because agent model calls made from
+    # async nodes do not inherit the graph's callbacks before Python 3.11; the
+    # callback manager skips the duplicate when they do.
+    return model_cls(
+        model=model or settings.OPENAI_MODEL_NAME,
+        api_key=settings.OPENAI_API_KEY,
+        stream_usage=True,
+        callbacks=instrumentation_callbacks(),
+    )
+
+
+def llm_for(role: str):
+    """
+    Chat model of an agent role. The default model is the "llm" component;
+    any other model is the component "llm:<model name>", so roles on the same
+    model share one client and each can be overridden like "llm".
+    """
+    name = model_name(role)
+    if name == settings.OPENAI_MODEL_NAME:
+        return components.get("llm")
+    return components.get(f"llm:{name}", factory=lambda: build_llm(name))
+
+
+def __getattr__(name: str):
+    # `from app.core.llm import llm` keeps working, built on first access
+    if name == "llm":
+        return components.get("llm")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
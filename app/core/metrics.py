@@ -0,0 +1,437 @@
+# app/core/metrics.py
+"""
+Latency, token, retry and cache instrumentation.
+
+`metrics_handler` is a LangChain callback handler attached to the top-level
+graphs. Through callback inheritance it sees every graph node (including the
+requirements subgraph and the agents' own model/tools nodes), every LLM call
+and every tool call, and records:
+
+- histograms of wall time per node, tool and LLM call,
+- prompt/completion/cached token counters per agent and model,
+- error and retry counters (Convex call outcomes, hedges and circuit
+  breaker transitions are recorded by app.core.resilience),
+- a bounded per-thread span trace (thread_id is the API session id).
+
+Cache hit/miss counters are pulled from the caches at scrape time through
+registered collectors. `render_prometheus()` produces the text exposition
+format served by the API.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.errors import GraphInterrupt
+
+from app.config import settings
+
+
+# Seconds; spans sub-millisecond cache hits up to long agent turns
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[index] += 1
+            series[-1] += value
+
+    def totals(self) -> Dict[LabelValues, Tuple[float, float]]:
+        """(count, sum) per label values."""
+        with self._lock:
+            return {key: (sum(series[:-1]), series[-1]) for key, series in self._series.items()}
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors evaluated at render time."""
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_collectors: List[Callable[[], dict]] = []
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labelnames))
+
+    def register_cache(self, stats: Callable[[], dict]) -> None:
+        """Export a cache's `stats()` dict (TTLCache/SQLiteCache shape) on every scrape."""
+        self._cache_collectors.append(stats)
+
+    def _cache_samples(self) -> List[str]:
+        sizes, events = [], []
+        for collect in self._cache_collectors:
+            try:
+                stats = dict(collect())
+            except Exception:
+                continue  # a broken cache must not break the scrape
+            name = stats.pop("name", "cache")
+            size = stats.pop("size", None)
+            if size is not None:
+                sizes.append(f'travel_cache_size{{cache="{_escape(name)}"}} {size}')
+            for event, value in sorted(stats.items()):
+                events.append(
+                    f'travel_cache_events_total{{cache="{_escape(name)}",event="{_escape(event)}"}} {value}'
+                )
+        lines = []
+        if sizes:
+            lines += ["# HELP travel_cache_size Entries currently cached.", "# TYPE travel_cache_size gauge", *sizes]
+        if events:
+            lines += [
+                "# HELP travel_cache_events_total Cache hits, misses, loads and evictions.",
+                "# TYPE travel_cache_events_total counter",
+                *events,
+            ]
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        lines.extend(self._cache_samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+NODE_SECONDS = registry.histogram(
+    "travel_node_duration_seconds", "Graph node wall time.", ("node", "status")
+)
+TOOL_SECONDS = registry.histogram(
+    "travel_tool_duration_seconds", "Tool call wall time.", ("tool", "status")
+)
+LLM_SECONDS = registry.histogram(
+    "travel_llm_duration_seconds", "LLM call wall time.", ("agent", "model", "status")
+)
+LLM_TOKENS = registry.counter(
+    "travel_llm_tokens_total", "LLM tokens by kind (prompt, completion, cached).", ("agent", "model", "kind")
+)
+LLM_QUEUE_SECONDS = registry.histogram(
+    "travel_llm_queue_wait_seconds",
+    "Time LLM calls waited for rate-limit admission.",
+    ("priority", "outcome"),
+)
+REQUIREMENTS_ROUTES = registry.counter(
+    "travel_requirements_routes_total",
+    "Requirement turns by route (code, fast, escalated, direct).",
+    ("route",),
+)
+RETRIES = registry.counter(
+    "travel_retries_total", "Retried calls by component.", ("component",)
+)
+CONVEX_CALLS = registry.counter(
+    "travel_convex_calls_total",
+    "Convex calls by endpoint and final outcome (ok, error, timeout, circuit_open).",
+    ("endpoint", "outcome"),
+)
+CONVEX_HEDGES = registry.counter(
+    "travel_convex_hedges_total", "Hedged Convex reads sent, and how many the hedge won.", ("endpoint", "result")
+)
+CIRCUIT_TRANSITIONS = registry.counter(
+    "travel_circuit_transitions_total", "Circuit breaker state changes by endpoint.", ("endpoint", "state")
+)
+
+
+def record_retry(component: str) -> None:
+    """Count a retry made outside LangChain's retry wrappers (e.g. HTTP clients)."""
+    RETRIES.inc(component=component)
+
+
+def render_prometheus() -> str:
+    return registry.render()
+
+
+class TraceStore:
+    """Recent spans per thread, bounded in threads and spans per thread."""
+
+    def __init__(self, max_threads: int, max_spans: int):
+        self.max_threads = max_threads
+        self.max_spans = max_spans
+        self._threads: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, thread_id: str, span: dict) -> None:
+        with self._lock:
+            spans = self._threads.get(thread_id)
+            if spans is None:
+                spans = self._threads[thread_id] = deque(maxlen=self.max_spans)
+            self._threads.move_to_end(thread_id)
+            spans.append(span)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+    def dump(self, thread_id: str) -> Optional[dict]:
+        """Spans in start order with per-kind totals, or None for an unknown thread."""
+        with self._lock:
+            spans = list(self._threads.get(thread_id, ()))
+        if not spans:
+            return None
+        spans.sort(key=lambda span: span["start"])
+        totals: Dict[str, dict] = {}
+        for span in spans:
+            total = totals.setdefault(span["kind"], {"count": 0, "seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] = round(total["seconds"] + span["duration_ms"] / 1000, 6)
+            for kind, value in (span.get("tokens") or {}).items():
+                total[f"{kind}_tokens"] = total.get(f"{kind}_tokens", 0) + value
+        return {"thread_id": thread_id, "totals": totals, "spans": spans}
+
+
+traces = TraceStore(settings.TRACE_MAX_THREADS, settings.TRACE_MAX_SPANS)
+
+
+def _node_path(metadata: dict) -> str:
+    """'requirements_subgraph:<id>|requirements_agent:<id>' -> 'requirements_subgraph/requirements_agent'."""
+    namespace = metadata.get("langgraph_checkpoint_ns") or metadata.get("langgraph_node") or ""
+    return "/".join(part.split(":", 1)[0] for part in namespace.split("|") if part)
+
+
+def _agent_label(metadata: dict) -> str:
+    # LLM calls run in an agent's "model" node; label them with the graph node that invoked the agent
+    path = _node_path(metadata)
+    if path.endswith("/model"):
+        path = path[: -len("/model")]
+    return path or metadata.get("agent") or "unknown"
+
+
+def _token_usage(response: LLMResult) -> Dict[str, int]:
+    usage = {"prompt": 0, "completion": 0, "cached": 0}
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None)
+            if metadata:
+                found = True
+                usage["prompt"] += metadata.get("input_tokens", 0)
+                usage["completion"] += metadata.get("output_tokens", 0)
+                usage["cached"] += (metadata.get("input_token_details") or {}).get("cache_read", 0) or 0
+    if not found:
+        # Providers that only report usage in llm_output (OpenAI-style)
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        usage["prompt"] = token_usage.get("prompt_tokens", 0)
+        usage["completion"] = token_usage.get("completion_tokens", 0)
+        usage["cached"] = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0
+    return {kind: value for kind, value in usage.items() if value}
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Times graph nodes, LLM calls and tool calls; feeds histograms and traces.
+
+    Runs that never end (cancelled tasks, abandoned streams) leave their span
+    open; spans older than `open_span_ttl` seconds, or beyond `max_open_spans`,
+    are dropped as new ones start.
+    """
+
+    # Record on the calling thread/loop instead of a worker thread
+    run_inline = True
+
+    def __init__(self, open_span_ttl: float = 3600.0, max_open_spans: int = 10000):
+        self.open_span_ttl = open_span_ttl
+        self.max_open_spans = max_open_spans
+        self._open: "OrderedDict[UUID, dict]" = OrderedDict()  # in start order
+        self._lock = threading.Lock()
+
+    def _drop_stale(self, now: float) -> None:
+        """Forget the oldest open spans past the TTL or the cap; caller holds the lock."""
+        while self._open:
+            oldest = next(iter(self._open.values()))
+            if len(self._open) < self.max_open_spans and now - oldest["t0"] < self.open_span_ttl:
+                return
+            self._open.popitem(last=False)
+
+    def _start(self, run_id: UUID, kind: str, name: str, metadata: Optional[dict], **labels) -> None:
+        with self._lock:
+            self._drop_stale(time.perf_counter())
+            self._open[run_id] = {
+                "kind": kind,
+                "name": name,
+                "labels": labels,
+                "thread_id": (metadata or {}).get("thread_id"),
+                "wall_start": time.time(),
+                "t0": time.perf_counter(),
+            }
+
+    def _finish(self, run_id: UUID, status: str, tokens: Optional[dict] = None) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        seconds = time.perf_counter() - span["t0"]
+        labels = span["labels"]
+        if span["kind"] == "node":
+            NODE_SECONDS.observe(seconds, status=status, **labels)
+        elif span["kind"] == "tool":
+            TOOL_SECONDS.observe(seconds, status=status, **labels)
+        else:
+            LLM_SECONDS.observe(seconds, status=status, **labels)
+            for kind, value in (tokens or {}).items():
+                LLM_TOKENS.inc(value, kind=kind, **labels)
+
+        if span["thread_id"]:
+            record = {
+                "kind": span["kind"],
+                "name": span["name"],
+                "start": span["wall_start"],
+                "duration_ms": round(seconds * 1000, 3),
+                "status": status,
+            }
+            if tokens:
+                record["tokens"] = tokens
+            traces.add(str(span["thread_id"]), record)
+
+    # -- graph nodes --------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        # Node tasks are the runs LangGraph tags with their superstep
+        if metadata and any(tag.startswith("graph:step:") for tag in tags or ()):
+            path = _node_path(metadata)
+            self._start(run_id, "node", path, metadata, node=path)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # Interrupts surface as errors of the interrupted node; they are pauses, not failures
+        status = "interrupted" if isinstance(error, GraphInterrupt) else "error"
+        self._finish(run_id, status)
+
+    # -- LLM calls ----------------------------------------------------------
+
+    def _llm_start(self, serialized, run_id, metadata, invocation_params) -> None:
+        metadata = metadata or {}
+        model = (
+            metadata.get("ls_model_name")
+            or (invocation_params or {}).get("model")
+            or (invocation_params or {}).get("model_name")
+            or (serialized or {}).get("name")
+            or "unknown"
+        )
+        agent = _agent_label(metadata)
+        self._start(run_id, "llm", f"{agent}:{model}", metadata, agent=agent, model=model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, invocation_params=None, **kwargs):
+        self._llm_start(serialized, run_id, metadata, invocation_params)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, invocation_params=None, **kwargs):
+        self._llm_start(serialized, run_id, metadata, invocation_params)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        self._finish(run_id, "ok", _token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
+
+    # -- tools --------------------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, "tool", name, metadata, tool=name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
+
+    # -- retries ------------------------------------------------------------
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        with self._lock:
+            span = self._open.get(run_id)
+        record_retry(span["name"] if span else "runnable")
+
+
+metrics_handler = MetricsCallbackHandler(settings.TRACE_OPEN_SPAN_TTL_SECONDS)
+
+
+def instrumentation_callbacks() -> list:
+    """Callbacks to attach to top-level graphs (empty when instrumentation is off)."""
+    return [metrics_handler] if settings.INSTRUMENTATION_ENABLED else []
@@ -0,0 +1,591 @@
+# app/core/rate_limit.py
+"""
+Process-wide admission control for LLM calls.
+
+Every chat-model call made through a `rate_limited(...)` model class (the
+shared `llm` is one) is admitted by `llm_limiter` before it is sent:
+
+- requests-per-minute and tokens-per-minute budgets (token buckets; a call
+  reserves its estimated prompt + completion tokens and the reservation is
+  settled against the usage the provider reports),
+- a cap on calls in flight,
+- a fair queue: waiting calls are served by priority first (interactive
+  requirement turns before background planning/booking), then round-robin
+  across sessions, so one busy session cannot starve the others.
+
+Graph nodes tag their agent calls with `llm_request_context(session,
+priority)`. The budgets live in memory, or in a small SQLite file
+(LLM_RATE_LIMIT_BACKEND="sqlite") so several worker processes on one host
+share them; queueing and the in-flight cap are per process.
+
+Time spent queued is recorded in travel_llm_queue_wait_seconds.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import LLM_QUEUE_SECONDS
+
+
+PRIORITIES = {"interactive": 0, "background": 1}
+_PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+# (session, priority) of the calls made in the current context
+_request: contextvars.ContextVar[Tuple[str, int]] = contextvars.ContextVar(
+    "llm_request", default=("default", PRIORITIES["background"])
+)
+# Set while a call holds an admission, so nested generate/stream calls pass through
+_admitted: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_admitted", default=False)
+
+# Longest a budget transaction waits for another process's SQLite lock. It
+# runs under the limiter's process lock, so a busy file makes the head call
+# retry after _BUSY_RETRY_SECONDS rather than stall every thread.
+_BUSY_TIMEOUT_SECONDS = 0.05
+_BUSY_RETRY_SECONDS = 0.05
+
+
+class LLMQueueTimeout(TimeoutError):
+    """Raised when a call waited longer than LLM_QUEUE_TIMEOUT_SECONDS for admission."""
+
+
+@contextmanager
+def llm_request_context(session: Optional[str], priority: str = "background") -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to a session and priority."""
+    token = _request.set((session or "default", PRIORITIES[priority]))
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def session_id(config: Optional[dict]) -> Optional[str]:
+    """Session (graph thread) id from a runnable config."""
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+class _MemoryBudget:
+    """Per-minute request and token buckets in this process."""
+
+    blocking = False
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        now = time.monotonic()
+        self._levels = {"requests": float(rpm), "tokens": float(tpm)}
+        self._updated = {"requests": now, "tokens": now}
+
+    def _refill(self, name: str, capacity: int, now: float) -> float:
+        level = min(capacity, self._levels[name] + (now - self._updated[name]) * capacity / 60.0)
+        self._levels[name], self._updated[name] = level, now
+        return level
+
+    def take(self, tokens: int) -> float:
+        """Deduct one request and `tokens`; otherwise return the seconds to wait."""
+        now = time.monotonic()
+        wait = 0.0
+        if self.rpm:
+            level = self._refill("requests", self.rpm, now)
+            wait = max(wait, (1 - level) * 60.0 / self.rpm)
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # an oversized call can still run on a full bucket
+            level = self._refill("tokens", self.tpm, now)
+            wait = max(wait, (tokens - level) * 60.0 / self.tpm)
+        if wait > 0:
+            return wait
+        if self.rpm:
+            self._levels["requests"] -= 1
+        if self.tpm:
+            self._levels["tokens"] -= tokens
+        return 0.0
+
+    def adjust(self, tokens: int) -> None:
+        """Return (negative: charge) tokens once actual usage is known."""
+        if self.tpm:
+            now = time.monotonic()
+            self._levels["tokens"] = min(self.tpm, self._refill("tokens", self.tpm, now) + tokens)
+
+
+class _SQLiteBudget:
+    """
+    The same buckets in a SQLite file shared by the processes on one host.
+    Each take/adjust is one IMMEDIATE transaction, so updates are atomic
+    across processes; they may wait on the file lock, so async callers run
+    them on a worker thread. That wait is bounded by _BUSY_TIMEOUT_SECONDS: a
+    take that cannot get the lock asks the caller to retry shortly, and an
+    adjustment that cannot is carried into the next transaction.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, rpm: int, tpm: int):
+        self.path = path
+        self.rpm = rpm
+        self.tpm = tpm
+        self._conn: Optional[sqlite3.Connection] = None
+        self._deferred_tokens = 0  # adjustments not yet written
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None, timeout=5.0
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_budget (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(f"PRAGMA busy_timeout = {int(_BUSY_TIMEOUT_SECONDS * 1000)}")
+            self._conn = conn
+        return self._conn
+
+    def _begin(self, conn: sqlite3.Connection) -> bool:
+        """Start an IMMEDIATE transaction; False if another process holds the lock."""
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                return False
+            raise
+        return True
+
+    def _levels(self, conn: sqlite3.Connection, now: float) -> Dict[str, float]:
+        rows = dict(
+            (name, (level, updated_at))
+            for name, level, updated_at in conn.execute("SELECT name, level, updated_at FROM llm_budget")
+        )
+        levels = {}
+        for name, capacity in (("requests", self.rpm), ("tokens", self.tpm)):
+            level, updated_at = rows.get(name, (float(capacity), now))
+            levels[name] = min(capacity, level + max(0.0, now - updated_at) * capacity / 60.0)
+        return levels
+
+    def _store(self, conn: sqlite3.Connection, levels: Dict[str, float], now: float) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO llm_budget (name, level, updated_at) VALUES (?, ?, ?)",
+            [(name, level, now) for name, level in levels.items()],
+        )
+
+    def take(self, tokens: int) -> float:
+        conn = self._connection()
+        now = time.time()  # wall clock: shared between processes
+        if not self._begin(conn):
+            return _BUSY_RETRY_SECONDS
+        try:
+            levels = self._levels(conn, now)
+            if self.tpm and self._deferred_tokens:
+                levels["tokens"] = min(self.tpm, levels["tokens"] + self._deferred_tokens)
+            wait = 0.0
+            if self.rpm:
+                wait = max(wait, (1 - levels["requests"]) * 60.0 / self.rpm)
+            if self.tpm:
+                tokens = min(tokens, self.tpm)
+                wait = max(wait, (tokens - levels["tokens"]) * 60.0 / self.tpm)
+            if wait <= 0:
+                levels["requests"] -= 1 if self.rpm else 0
+                levels["tokens"] -= tokens if self.tpm else 0
+            if wait <= 0 or self._deferred_tokens:
+                self._store(conn, levels, now)
+            conn.execute("COMMIT")
+            self._deferred_tokens = 0
+            return max(wait, 0.0)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def adjust(self, tokens: int) -> None:
+        if not self.tpm:
+            return
+        conn = self._connection()
+        now = time.time()
+        tokens += self._deferred_tokens
+        if not self._begin(conn):
+            self._deferred_tokens = tokens
+            return
+        try:
+            levels = self._levels(conn, now)
+            levels["tokens"] = min(self.tpm, levels["tokens"] + tokens)
+            self._store(conn, levels, now)
+            conn.execute("COMMIT")
+            self._deferred_tokens = 0
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _reset(token: contextvars.Token) -> None:
+    try:
+        _admitted.reset(token)
+    except ValueError:
+        pass  # an abandoned stream finalized from another context
+
+
+class _Waiter:
+    __slots__ = ("session", "priority", "tokens", "granted", "abandoned", "event", "future", "loop")
+
+    def __init__(self, session: str, priority: int, tokens: int):
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.granted = False
+        self.abandoned = False
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Ticket:
+    """An admitted call; `settle` corrects the token reservation with actual usage."""
+
+    def __init__(self, limiter: "LLMRateLimiter", tokens: int):
+        self._limiter = limiter
+        self.tokens = tokens
+        self._settled = False
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if self._settled or not actual_tokens:
+            return
+        self._settled = True
+        self._limiter._adjust(self.tokens - actual_tokens)
+
+    async def asettle(self, actual_tokens: Optional[int]) -> None:
+        await self._limiter._off_loop(self.settle, actual_tokens)
+
+
+class LLMRateLimiter:
+    """RPM/TPM budgets, an in-flight cap and a fair priority queue for LLM calls."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        queue_timeout: float,
+        backend: str = "memory",
+        path: Optional[str] = None,
+    ):
+        # Unknown backends are reported by validate_settings() at startup
+        if backend == "sqlite":
+            self._budget = _SQLiteBudget(path, requests_per_minute, tokens_per_minute)
+        else:
+            self._budget = _MemoryBudget(requests_per_minute, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        # priority -> session -> waiters in arrival order; sessions rotate on every grant
+        self._queues: Dict[int, "OrderedDict[str, deque]"] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._timeouts = 0
+        self._waited: Dict[str, List[float]] = {}  # priority -> [total, max] seconds queued
+
+    # --- scheduling ------------------------------------------------------
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        sessions = self._queues.setdefault(waiter.priority, OrderedDict())
+        sessions.setdefault(waiter.session, deque()).append(waiter)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        sessions = self._queues.get(waiter.priority, {})
+        queue = sessions.get(waiter.session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del sessions[waiter.session]
+
+    def _next(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return sessions[next(iter(sessions))][0]
+        return None
+
+    def _dispatch(self, caller: Optional[_Waiter] = None) -> float:
+        """
+        Grant queued calls in order while capacity allows; seconds until the
+        head may run. A head other than `caller` is woken so it sleeps for
+        that wait itself instead of until its queue timeout.
+        """
+        while True:
+            waiter = self._next()
+            if waiter is None:
+                return 0.0
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                return 0.0  # a release will dispatch again
+            wait = self._budget.take(waiter.tokens)
+            if wait > 0:
+                if waiter is not caller:
+                    waiter.wake()
+                return wait
+            sessions = self._queues[waiter.priority]
+            queue = sessions.pop(waiter.session)
+            queue.popleft()
+            if queue:
+                sessions[waiter.session] = queue  # back of the rotation
+            self._in_flight += 1
+            self._admitted += 1
+            waiter.granted = True
+            waiter.wake()
+
+    def _join(self, waiter: _Waiter) -> float:
+        with self._lock:
+            if waiter.abandoned:
+                return 0.0  # cancelled before its thread got here
+            self._enqueue(waiter)
+            return self._dispatch(waiter)
+
+    def _redispatch(self, waiter: _Waiter) -> float:
+        with self._lock:
+            return self._dispatch(waiter) if not waiter.granted else 0.0
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Withdraw a cancelled waiter, or free the slot it was granted meanwhile."""
+        with self._lock:
+            waiter.abandoned = True
+            if not waiter.granted:
+                self._remove(waiter)
+                self._dispatch()
+                return
+        self._release()
+
+    async def _off_loop(self, func, *args):
+        """Call `func`, on a worker thread when the budget does blocking I/O."""
+        if self._budget.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _adjust(self, tokens: int) -> None:
+        with self._lock:
+            self._budget.adjust(tokens)
+            self._dispatch()
+
+    def _timed_out(self, waiter: _Waiter) -> bool:
+        """Drop a waiter whose deadline passed; False if it was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._remove(waiter)
+            self._timeouts += 1
+            self._dispatch()
+        return True
+
+    def _observe(self, waiter: _Waiter, started: float, outcome: str) -> None:
+        waited = time.monotonic() - started
+        priority = _PRIORITY_NAMES[waiter.priority]
+        LLM_QUEUE_SECONDS.observe(waited, priority=priority, outcome=outcome)
+        with self._lock:
+            totals = self._waited.setdefault(priority, [0.0, 0.0])
+            totals[0] += waited
+            totals[1] = max(totals[1], waited)
+
+    # --- admission -------------------------------------------------------
+
+    @contextmanager
+    def admit(self, tokens: int) -> Iterator[Optional[Ticket]]:
+        """Block until the call may run; hold its in-flight slot for the block."""
+        if _admitted.get():
+            yield None
+            return
+        session, priority = _request.get()
+        waiter = _Waiter(session, priority, tokens)
+        waiter.event = threading.Event()
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        wait = self._join(waiter)
+        while not waiter.granted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and self._timed_out(waiter):
+                self._observe(waiter, started, "timeout")
+                raise LLMQueueTimeout(f"LLM call queued for more than {self.queue_timeout:.0f}s")
+            # Woken by a release or settle; otherwise re-check when the buckets refill
+            waiter.event.wait(min(wait, remaining) if wait > 0 else remaining)
+            waiter.event.clear()
+            wait = self._redispatch(waiter)
+        self._observe(waiter, started, "admitted")
+
+        token = _admitted.set(True)
+        try:
+            yield Ticket(self, tokens)
+        finally:
+            _reset(token)
+            self._release()
+
+    @asynccontextmanager
+    async def aadmit(self, tokens: int):
+        """
+        Async `admit`; waiting does not block the event loop, and neither do
+        the SQLite budget's transactions (see `_off_loop`).
+        """
+        if _admitted.get():
+            yield None
+            return
+        session, priority = _request.get()
+        waiter = _Waiter(session, priority, tokens)
+        waiter.loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        try:
+            wait = await self._off_loop(self._join, waiter)
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and await self._off_loop(self._timed_out, waiter):
+                    self._observe(waiter, started, "timeout")
+                    raise LLMQueueTimeout(f"LLM call queued for more than {self.queue_timeout:.0f}s")
+                waiter.future = waiter.loop.create_future()
+                if waiter.granted:
+                    break
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter.future), min(wait, remaining) if wait > 0 else remaining
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                wait = await self._off_loop(self._redispatch, waiter)
+        except asyncio.CancelledError:
+            # The worker thread finishes even if this await is cancelled again
+            await self._off_loop(self._abandon, waiter)
+            raise
+        self._observe(waiter, started, "admitted")
+
+        token = _admitted.set(True)
+        try:
+            yield Ticket(self, tokens)
+        finally:
+            _reset(token)
+            await self._off_loop(self._release)
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {
+                _PRIORITY_NAMES[priority]: sum(len(queue) for queue in sessions.values())
+                for priority, sessions in self._queues.items()
+            }
+            return {
+                "in_flight": self._in_flight,
+                "queued": queued,
+                "admitted": self._admitted,
+                "timeouts": self._timeouts,
+                "waited_seconds": {
+                    priority: {"total": round(total, 3), "max": round(longest, 3)}
+                    for priority, (total, longest) in self._waited.items()
+                },
+            }
+
+
+llm_limiter = LLMRateLimiter(
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    backend=settings.LLM_RATE_LIMIT_BACKEND.lower(),
+    path=settings.LLM_RATE_LIMIT_PATH,
+)
+
+
+def estimate_call_tokens(messages: List[Any], kwargs: dict) -> int:
+    """Prompt estimate (~4 characters per token, tool schemas included) plus the completion allowance."""
+    chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+    tools = kwargs.get("tools")
+    if tools:
+        chars += len(json.dumps(tools, default=str))
+    return chars // 4 + settings.LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def _usage_total(message: Any) -> Optional[int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+class RateLimitedChatModel:
+    """
+    Mixin for chat model classes: each generate call is admitted by
+    `llm_limiter` and holds an in-flight slot until it completes. Use
+    `rate_limited(ChatOpenAI)` rather than subclassing by hand.
+    """
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with llm_limiter.admit(estimate_call_tokens(messages, kwargs)) as ticket:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            if ticket is not None and result.generations:
+                ticket.settle(_usage_total(result.generations[0].message))
+            return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with llm_limiter.aadmit(estimate_call_tokens(messages, kwargs)) as ticket:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            if ticket is not None and result.generations:
+                await ticket.asettle(_usage_total(result.generations[0].message))
+            return result
+
+
+class _RateLimitedStreaming:
+    """Stream counterpart of `RateLimitedChatModel`, for classes that implement streaming."""
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        with llm_limiter.admit(estimate_call_tokens(messages, kwargs)) as ticket:
+            total = 0
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                total += _usage_total(chunk.message) or 0
+                yield chunk
+            if ticket is not None:
+                ticket.settle(total)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async with llm_limiter.aadmit(estimate_call_tokens(messages, kwargs)) as ticket:
+            total = 0
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                total += _usage_total(chunk.message) or 0
+                yield chunk
+            if ticket is not None:
+                await ticket.asettle(total)
+
+
+_limited_classes: Dict[type, type] = {}
+
+
+def rate_limited(model_cls: type) -> type:
+    """Subclass of a chat model class whose calls go through `llm_limiter`."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    if model_cls not in _limited_classes:
+        bases = (RateLimitedChatModel,)
+        # Only wrap streaming the class really implements; BaseChatModel decides
+        # whether to stream by checking for an overridden _stream/_astream
+        if model_cls._stream is not BaseChatModel._stream:
+            bases += (_RateLimitedStreaming,)
+        _limited_classes[model_cls] = type(
+            f"RateLimited{model_cls.__name__}", bases + (model_cls,), {}
+        )
+    return _limited_classes[model_cls]
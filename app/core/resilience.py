@@ -0,0 +1,386 @@
+# app/core/resilience.py
+"""
+Deadlines, retries, circuit breaking and hedged reads for Convex calls.
+
+Tools call `convex_get` / `convex_post` (or the async variants) instead of
+using the pooled session directly:
+
+- every call has a deadline covering all of its attempts; each attempt's
+  read timeout is clipped to what is left of it,
+- searches (GET) are retried with full-jitter exponential backoff on
+  timeouts, connection errors and 408/429/5xx responses, honouring
+  Retry-After; bookings (POST) are never retried, as a retry after a lost
+  response could book twice,
+- each endpoint has a circuit breaker: after consecutive failures it fails
+  fast with `CircuitOpenError` until a trial request succeeds, so a
+  degraded backend costs the agent one cheap error instead of a 10 s wait,
+- with CONVEX_HEDGE_AFTER_SECONDS set, a search that has not answered by
+  then is sent a second time and the first response wins, trimming p99.
+
+Outcomes, retries, hedges and breaker transitions are counted in
+app.core.metrics.
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import requests
+
+from app.config import settings
+from app.core.http import convex_url, get_async_convex_client, get_convex_session
+from app.core.metrics import CIRCUIT_TRANSITIONS, CONVEX_CALLS, CONVEX_HEDGES, RETRIES, record_retry
+
+
+# Statuses worth another attempt; other 4xx are the caller's fault
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Shortest read timeout worth starting an attempt with
+_MIN_ATTEMPT_SECONDS = 0.05
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling Convex while an endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(
+            f"Convex {endpoint} is temporarily unavailable; retry in {max(retry_in, 0):.0f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failures in a row; open ->
+    half_open once `reset_timeout` has passed, letting a single trial
+    request through; its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_TRANSITIONS.inc(endpoint=self.name, state=state)
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; reserves the trial slot when half open."""
+        with self._lock:
+            if self._state == "open":
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition("half_open")
+                self._trial_in_flight = False
+            if self._state == "half_open":
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return self.reset_timeout - (self._clock() - self._opened_at)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != "closed":
+                self._transition("closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == "half_open" or (
+                self._state == "closed" and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition("open")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Process-wide breaker for an endpoint path such as '/flights/search'."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(
+                endpoint,
+                CircuitBreaker(
+                    endpoint,
+                    settings.CONVEX_BREAKER_FAILURE_THRESHOLD,
+                    settings.CONVEX_BREAKER_RESET_SECONDS,
+                ),
+            )
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    with _breakers_lock:
+        return {endpoint: breaker.state for endpoint, breaker in sorted(_breakers.items())}
+
+
+def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+    # Full jitter keeps retrying clients from synchronising against a recovering backend
+    ceiling = min(
+        settings.CONVEX_RETRY_BACKOFF_MAX_SECONDS,
+        settings.CONVEX_RETRY_BACKOFF_SECONDS * 2 ** attempt,
+    )
+    delay = random.uniform(0, ceiling)
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+def _retry_after(response: Any) -> Optional[float]:
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to the jittered backoff
+
+
+def _classify(error: Exception) -> Tuple[bool, bool, Optional[float], str]:
+    """(counts as a backend failure, worth retrying, Retry-After seconds, outcome label)."""
+    if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+        return True, True, None, "timeout"
+    if isinstance(error, (requests.exceptions.ConnectionError, httpx.TransportError)):
+        return True, True, None, "error"
+    response = getattr(error, "response", None)
+    if isinstance(error, (requests.exceptions.HTTPError, httpx.HTTPStatusError)) and response is not None:
+        if response.status_code in RETRYABLE_STATUSES:
+            return True, True, _retry_after(response), "error"
+        return False, False, None, "error"  # the backend answered; the request was wrong
+    return False, False, None, "error"
+
+
+def _policy(method: str) -> Tuple[float, int, float]:
+    """(deadline seconds, extra attempts, hedge delay or 0) for a method."""
+    if method == "GET":
+        return (
+            settings.CONVEX_SEARCH_DEADLINE_SECONDS,
+            settings.CONVEX_SEARCH_RETRIES,
+            settings.CONVEX_HEDGE_AFTER_SECONDS,
+        )
+    return settings.CONVEX_BOOKING_DEADLINE_SECONDS, 0, 0.0
+
+
+# --- sync -----------------------------------------------------------------
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(
+                    max_workers=settings.CONVEX_POOL_MAXSIZE, thread_name_prefix="convex-hedge"
+                )
+    return _hedge_pool
+
+
+def _hedged(send: Callable[[], Any], endpoint: str, hedge_after: float) -> Any:
+    """First successful result of `send`, started again if it is slower than `hedge_after`."""
+    pool = _get_hedge_pool()
+    primary = pool.submit(send)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    CONVEX_HEDGES.inc(endpoint=endpoint, result="sent")
+    hedge = pool.submit(send)
+    pending, error = {primary, hedge}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    CONVEX_HEDGES.inc(endpoint=endpoint, result="won")
+                return future.result()  # the loser finishes in the background
+            error = future.exception()
+    raise error
+
+
+def _request(method: str, path: str, **kwargs: Any) -> dict:
+    deadline_seconds, retries, hedge_after = _policy(method)
+    deadline = time.monotonic() + deadline_seconds
+    breaker = get_breaker(path)
+    url = convex_url(path)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            CONVEX_CALLS.inc(endpoint=path, outcome="circuit_open")
+            raise CircuitOpenError(path, breaker.retry_in())
+
+        remaining = max(deadline - time.monotonic(), _MIN_ATTEMPT_SECONDS)
+        timeout = (
+            min(settings.CONVEX_CONNECT_TIMEOUT, remaining),
+            min(settings.CONVEX_READ_TIMEOUT, remaining),
+        )
+
+        def send() -> requests.Response:
+            response = get_convex_session().request(method, url, timeout=timeout, **kwargs)
+            response.raise_for_status()  # Raises an exception for 4XX/5XX errors
+            return response
+
+        try:
+            response = _hedged(send, path, hedge_after) if hedge_after else send()
+        except Exception as e:
+            failure, retryable, retry_after, outcome = _classify(e)
+            if failure:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            delay = _backoff(attempt, retry_after)
+            if not retryable or attempt >= retries or time.monotonic() + delay >= deadline:
+                CONVEX_CALLS.inc(endpoint=path, outcome=outcome)
+                raise
+            record_retry(f"convex:{path}")
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        breaker.record_success()
+        CONVEX_CALLS.inc(endpoint=path, outcome="ok")
+        return response.json()
+
+
+def convex_get(path: str, params: Optional[dict] = None) -> dict:
+    """Idempotent Convex read with deadline, retries, breaker and optional hedging."""
+    return _request("GET", path, params=params)
+
+
+def convex_post(path: str, payload: dict) -> dict:
+    """Convex write with deadline and breaker; never retried."""
+    return _request("POST", path, json=payload)
+
+
+# --- async ----------------------------------------------------------------
+
+
+async def _ahedged(send: Callable[[], Any], endpoint: str, hedge_after: float) -> Any:
+    """Async `_hedged`; the losing request is cancelled."""
+    primary = asyncio.ensure_future(send())
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        CONVEX_HEDGES.inc(endpoint=endpoint, result="sent")
+        hedge = asyncio.ensure_future(send())
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        CONVEX_HEDGES.inc(endpoint=endpoint, result="won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _arequest(method: str, path: str, **kwargs: Any) -> dict:
+    deadline_seconds, retries, hedge_after = _policy(method)
+    deadline = time.monotonic() + deadline_seconds
+    breaker = get_breaker(path)
+    url = convex_url(path)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            CONVEX_CALLS.inc(endpoint=path, outcome="circuit_open")
+            raise CircuitOpenError(path, breaker.retry_in())
+
+        remaining = max(deadline - time.monotonic(), _MIN_ATTEMPT_SECONDS)
+        timeout = httpx.Timeout(
+            min(settings.CONVEX_READ_TIMEOUT, remaining),
+            connect=min(settings.CONVEX_CONNECT_TIMEOUT, remaining),
+        )
+
+        async def send() -> httpx.Response:
+            response = await get_async_convex_client().request(method, url, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            return response
+
+        try:
+            response = await (_ahedged(send, path, hedge_after) if hedge_after else send())
+        except Exception as e:
+            failure, retryable, retry_after, outcome = _classify(e)
+            if failure:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            delay = _backoff(attempt, retry_after)
+            if not retryable or attempt >= retries or time.monotonic() + delay >= deadline:
+                CONVEX_CALLS.inc(endpoint=path, outcome=outcome)
+                raise
+            record_retry(f"convex:{path}")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        breaker.record_success()
+        CONVEX_CALLS.inc(endpoint=path, outcome="ok")
+        return response.json()
+
+
+async def aconvex_get(path: str, params: Optional[dict] = None) -> dict:
+    """Async `convex_get` on the pooled async client."""
+    return await _arequest("GET", path, params=params)
+
+
+async def aconvex_post(path: str, payload: dict) -> dict:
+    """Async `convex_post` on the pooled async client."""
+    return await _arequest("POST", path, json=payload)
+
+
+def resilience_stats() -> dict:
+    """Breaker states plus call outcome, retry and hedge counts per endpoint."""
+    calls: Dict[str, Dict[str, int]] = {}
+    for (endpoint, outcome), value in CONVEX_CALLS.values().items():
+        calls.setdefault(endpoint, {})[outcome] = int(value)
+    hedges: Dict[str, Dict[str, int]] = {}
+    for (endpoint, result), value in CONVEX_HEDGES.values().items():
+        hedges.setdefault(endpoint, {})[result] = int(value)
+    retries = {
+        component[len("convex:"):]: int(value)
+        for (component,), value in RETRIES.values().items()
+        if component.startswith("convex:")
+    }
+    return {"breakers": breaker_states(), "calls": calls, "retries": retries, "hedges": hedges}
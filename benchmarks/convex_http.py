@@ -0,0 +1,86 @@
+# benchmarks/convex_http.py
+"""Per-call latency of bare `requests.get` vs the shared pooled Convex session.
+
+Run from the repository root:
+
+    python -m benchmarks.convex_http --calls 500 --latency 0.002
+
+The stub speaks plain HTTP, so the gap measured here is only the TCP
+handshake and connection setup; against an HTTPS Convex deployment the
+TLS handshake makes the difference considerably larger.
+"""
+import argparse
+import os
+import statistics
+import time
+
+import requests
+
+from benchmarks.convex_stub import ConvexStub
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run(label: str, get, url: str, calls: int) -> dict:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        response = get(url, params={"origin": "NRT", "destination": "ICN"})
+        response.raise_for_status()
+        response.json()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "label": label,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": _percentile(samples, 50),
+        "p99_ms": _percentile(samples, 99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub latency in seconds")
+    args = parser.parse_args()
+
+    with ConvexStub(latency=args.latency) as stub:
+        os.environ["CONVEX_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+        from app.core.http import close_convex_session, convex_timeout, convex_url, get_convex_session
+
+        url = convex_url("/flights/search")
+        session = get_convex_session()
+
+        results = [
+            _run(
+                "requests.get (new connection per call)",
+                lambda u, params: requests.get(u, params=params, timeout=convex_timeout()),
+                url,
+                args.calls,
+            ),
+            _run(
+                "pooled keep-alive session",
+                lambda u, params: session.get(u, params=params, timeout=convex_timeout()),
+                url,
+                args.calls,
+            ),
+        ]
+        close_convex_session()
+
+    print(f"{args.calls} calls per client, stub latency {args.latency * 1000:.1f} ms")
+    for row in results:
+        print(
+            f"  {row['label']:<42} mean {row['mean_ms']:7.3f} ms"
+            f"  p50 {row['p50_ms']:7.3f} ms  p99 {row['p99_ms']:7.3f} ms"
+        )
+    speedup = results[0]["mean_ms"] / results[1]["mean_ms"]
+    print(f"  pooled session is {speedup:.2f}x faster per call")
+
+
+if __name__ == "__main__":
+    main()
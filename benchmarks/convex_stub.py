@@ -0,0 +1,225 @@
+# benchmarks/convex_stub.py
+"""Local HTTP stub of the Convex endpoints used by the agent tools.
+
+Serves /flights/search, /hotels/search, /flights/book and /hotels/book with
+canned payloads, optional per-request latency, an optional slow tail (a
+fraction of requests taking extra time) and an optional error rate.
+HTTP/1.1 keep-alive is enabled so pooled clients can reuse connections.
+"""
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _flights(origin: str, destination: str, count: int = 5, date: str = None) -> list:
+    if date:
+        # Dated searches: every option departs that day, fares vary by day
+        day_offset = sum(map(ord, date)) % 7
+        return [
+            {
+                "_id": f"fl_{origin}_{destination}_{date}_{i}",
+                "carrier": ["KE", "OZ", "JL", "NH", "7C"][i % 5],
+                "flightNumber": f"{100 + i}",
+                "origin": origin,
+                "destination": destination,
+                "departureTime": f"{date}T{6 + i % 16:02d}:30:00",
+                "arrivalTime": f"{date}T{8 + i % 16:02d}:45:00",
+                "price": 160.0 + 15 * day_offset + 35 * i,
+                "cabinClass": "economy",
+                "stops": i % 2,
+            }
+            for i in range(count)
+        ]
+    return [
+        {
+            "_id": f"fl_{origin}_{destination}_{i}",
+            "carrier": ["KE", "OZ", "JL", "NH", "7C"][i % 5],
+            "flightNumber": f"{100 + i}",
+            "origin": origin,
+            "destination": destination,
+            "departureTime": f"2026-03-{10 + i:02d}T08:30:00",
+            "arrivalTime": f"2026-03-{10 + i:02d}T11:00:00",
+            "price": 180.0 + 35 * i,
+            "cabinClass": "economy",
+            "stops": i % 2,
+        }
+        for i in range(count)
+    ]
+
+
+def _hotels(city: str, count: int = 8) -> list:
+    return [
+        {
+            "_id": f"ht_{city.lower()}_{i}",
+            "name": f"{city} Hotel {i}",
+            "city": city,
+            "area": ["central", "quiet", "near beach", "business district"][i % 4],
+            "stars": 2 + i % 4,
+            "pricePerNight": 70.0 + 25 * i,
+            "roomTypes": ["Standard", "Deluxe", "Suite"][: 1 + i % 3],
+            "rating": round(3.5 + (i % 3) * 0.5, 1),
+        }
+        for i in range(count)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # second one waits on a delayed ACK and keep-alive clients see ~40 ms stalls.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - silence default logging
+        pass
+
+    def _send(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _simulate(self) -> bool:
+        stub = self.server.stub
+        stub.record(self.path)
+        delay = stub.latency
+        if stub.tail_rate and random.random() < stub.tail_rate:
+            delay += stub.tail_latency
+        if delay:
+            time.sleep(delay)
+        if stub.error_rate and random.random() < stub.error_rate:
+            self._send(503, {"error": "stub: injected failure"})
+            return False
+        return True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if not self._simulate():
+            return
+        if url.path == "/flights/search":
+            origin = query.get("origin", "").upper()
+            destination = query.get("destination", "").upper()
+            flights = _flights(
+                origin, destination, self.server.stub.flight_count, query.get("date") or None
+            )
+            self._send(200, {"flights": flights})
+        elif url.path == "/hotels/search":
+            self._send(200, {"hotels": _hotels(query.get("city", ""), self.server.stub.hotel_count)})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self._simulate():
+            return
+        path = urlparse(self.path).path
+        booking_id = uuid.uuid4().hex[:12]
+        if path == "/flights/book":
+            self._send(
+                200,
+                {
+                    "success": True,
+                    "booking": {
+                        "bookingId": booking_id,
+                        "bookingReference": f"TK{booking_id[:6].upper()}",
+                        "seatNumber": "14C",
+                        "status": "confirmed",
+                        "flightId": body.get("flightId"),
+                    },
+                },
+            )
+        elif path == "/hotels/book":
+            self._send(
+                200,
+                {
+                    "success": True,
+                    "booking": {
+                        "bookingId": booking_id,
+                        "bookingReference": f"HR{booking_id[:6].upper()}",
+                        "numberOfNights": 3,
+                        "totalPrice": 360.0,
+                        "status": "confirmed",
+                        "hotelId": body.get("hotelId"),
+                    },
+                },
+            )
+        else:
+            self._send(404, {"error": "not found"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop connections on purpose (timeouts, cancelled hedged reads)
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class ConvexStub:
+    """Run the stub on a background thread; use as a context manager."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        tail_latency: float = 0.0,
+        tail_rate: float = 0.0,
+        flight_count: int = 5,
+        hotel_count: int = 8,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self.flight_count = flight_count
+        self.hotel_count = hotel_count
+        self.calls: dict = {}
+        self._calls_lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str) -> None:
+        with self._calls_lock:
+            key = urlparse(path).path
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+    def start(self) -> "ConvexStub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "ConvexStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    with ConvexStub(port=8787) as stub:
+        print(f"Convex stub listening on {stub.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,77 @@
+# benchmarks/import_time.py
+"""Cold-start cost of importing the application's entry-point modules.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time --repeat 5
+
+Each import runs in a fresh interpreter, so nothing is shared between
+samples. Besides the median wall time, the report lists which heavy
+third-party packages the import pulled in; after an import none of them
+should be loaded, since the LLM client, agents and search tools are built
+on first use.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = (
+    "app.config",
+    "app.agents.tools.flight_tools",
+    "app.agents.tools.planner_tools",
+    "app.core.llm",
+    "app.agents.travel_system_agents",
+    "app.agents.travel_system_graph",
+    "app.api.main",
+)
+
+HEAVY = ("langchain_openai", "openai", "langchain_community", "langchain.agents", "ddgs", "duckduckgo_search")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _sample(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        return {"ms": None, "heavy": [], "error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first sample is not charged for compiling
+    for module in args.modules:
+        subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True)
+
+    print(f"median of {args.repeat} fresh interpreters per module")
+    for module in args.modules:
+        samples = [_sample(module) for _ in range(args.repeat)]
+        failed = next((s for s in samples if s["ms"] is None), None)
+        if failed:
+            print(f"  {module:<36} failed: {failed['error']}")
+            continue
+        median = statistics.median(s["ms"] for s in samples)
+        heavy = ", ".join(samples[-1]["heavy"]) or "-"
+        print(f"  {module:<36} {median:8.1f} ms  heavy: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+# benchmarks/load_test.py
+"""End-to-end load test of travel_system_graph, fully offline.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --sessions 200 --concurrency 50 \
+        --llm-latency 0.2 --convex-latency 0.02 --error-rate 0.01
+
+Every session runs the whole pipeline the way the API drives it: the first
+message starts the requirements loop, the scripted model asks for the lead
+traveler's contact details (an interrupt), the answer resumes the thread and
+the planner, hotel prefetch and booker run to completion. The LLM is
+benchmarks.fake_llm.ScriptedChatModel and Convex is benchmarks.convex_stub,
+so the numbers measure the application's own overhead plus the simulated
+latencies, and are reproducible.
+
+Trips rotate over a set of routes and departure dates, so repeated sessions
+exercise the flight and itinerary caches the way returning routes would.
+Checkpoints and the search cache go to a temporary directory unless
+CHECKPOINT_DB_PATH / SEARCH_CACHE_PATH are set.
+
+Reported: throughput, p50/p99 session latency (time spent in the graph,
+excluding --think-time), outcomes, Convex calls per session, and memory per
+session as RSS growth and checkpoint payload bytes (plus peak traced Python
+allocations with --tracemalloc).
+
+The scripted model goes through the same LLM rate limiter as the real one;
+--rpm, --tpm and --llm-concurrency tighten its budgets to show queueing, and
+the report then includes admissions and time queued per priority.
+
+Model routing (REQUIREMENTS_FAST_MODEL_NAME) is on by default, as in the
+app: each configured model is a scripted model under its real name, the fast
+one answering in --fast-llm-latency. The report breaks calls, latency, tokens
+and estimated cost down by model; run again with --fast-model "" to compare
+against a single model.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.convex_stub import ConvexStub
+from benchmarks.fake_llm import FakeSearch, ScriptedChatModel, trip_line
+
+# USD per million (input, output) tokens, for the cost estimate
+PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+ROUTES = (
+    ("NRT", "ICN"),
+    ("ICN", "NRT"),
+    ("BKK", "SIN"),
+    ("SIN", "CMB"),
+    ("HKG", "TPE"),
+    ("KIX", "BKK"),
+)
+
+_FIRST_DATE = date(2026, 3, 1)
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource  # max RSS only, in KiB on Linux
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _session_messages(index: int, nights: int) -> tuple:
+    origin, destination = ROUTES[index % len(ROUTES)]
+    depart = _FIRST_DATE + timedelta(days=(index // len(ROUTES)) % 28)
+    trip = trip_line(origin, destination, depart.isoformat(), (depart + timedelta(days=nights)).isoformat())
+    first = f"Hi, I'd like to plan a trip. {trip}"
+    answer = f"Contact: Traveler {index} <traveler{index}@example.com>"
+    return first, answer
+
+
+def _outcome(result: dict) -> str:
+    if "__interrupt__" in result:
+        return "stuck"  # still asking after the contact details were given
+    bookings = result.get("bookings") or {}
+    return "booked" if bookings.get("flights") and bookings.get("hotels") else "partial"
+
+
+def _record(index: int, outcome: str, seconds: float, error: str = None) -> dict:
+    return {"session": index, "outcome": outcome, "seconds": seconds, "error": error}
+
+
+async def _arun_session(graph, index: int, args) -> dict:
+    from langchain_core.messages import HumanMessage
+    from langgraph.types import Command
+
+    first, answer = _session_messages(index, args.nights)
+    config = {"configurable": {"thread_id": f"load-{uuid.uuid4().hex}"}}
+    elapsed = 0.0
+    try:
+        start = time.perf_counter()
+        result = await graph.ainvoke({"messages": [HumanMessage(content=first)]}, config)
+        elapsed += time.perf_counter() - start
+        if "__interrupt__" in result:
+            await asyncio.sleep(args.think_time)
+            start = time.perf_counter()
+            result = await graph.ainvoke(Command(resume=answer), config)
+            elapsed += time.perf_counter() - start
+        return _record(index, _outcome(result), elapsed)
+    except Exception as e:
+        return _record(index, "error", elapsed, f"{type(e).__name__}: {e}")
+
+
+def _run_session(graph, index: int, args) -> dict:
+    from langchain_core.messages import HumanMessage
+    from langgraph.types import Command
+
+    first, answer = _session_messages(index, args.nights)
+    config = {"configurable": {"thread_id": f"load-{uuid.uuid4().hex}"}}
+    elapsed = 0.0
+    try:
+        start = time.perf_counter()
+        result = graph.invoke({"messages": [HumanMessage(content=first)]}, config)
+        elapsed += time.perf_counter() - start
+        if "__interrupt__" in result:
+            time.sleep(args.think_time)
+            start = time.perf_counter()
+            result = graph.invoke(Command(resume=answer), config)
+            elapsed += time.perf_counter() - start
+        return _record(index, _outcome(result), elapsed)
+    except Exception as e:
+        return _record(index, "error", elapsed, f"{type(e).__name__}: {e}")
+
+
+async def _arun_all(graph, indices: range, args) -> list:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def _bounded(index: int) -> dict:
+        async with semaphore:
+            return await _arun_session(graph, index, args)
+
+    return await asyncio.gather(*(_bounded(i) for i in indices))
+
+
+def _run_all(graph, indices: range, args) -> list:
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        return list(pool.map(lambda i: _run_session(graph, i, args), indices))
+
+
+def _configure(args, stub: ConvexStub, workdir: str) -> None:
+    # Settings are read when app.config is first imported
+    os.environ["CONVEX_BASE_URL"] = stub.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["CHECKPOINTER_BACKEND"] = args.checkpointer
+    os.environ.setdefault("CHECKPOINT_DB_PATH", os.path.join(workdir, "checkpoints.sqlite3"))
+    os.environ.setdefault("SEARCH_CACHE_PATH", os.path.join(workdir, "search.sqlite3"))
+    if args.agent_booking:
+        os.environ["BOOKING_FAST_PATH"] = "false"
+    for name, value in (
+        ("LLM_REQUESTS_PER_MINUTE", args.rpm),
+        ("LLM_TOKENS_PER_MINUTE", args.tpm),
+        ("LLM_MAX_CONCURRENCY", args.llm_concurrency),
+    ):
+        os.environ[name] = str(value)
+    if args.fast_model is not None:
+        os.environ["REQUIREMENTS_FAST_MODEL_NAME"] = args.fast_model
+
+    from app.config import settings
+    from app.core.components import components
+    from app.core.llm import fast_routing_enabled, model_name
+    from app.core.metrics import instrumentation_callbacks
+    from app.core.rate_limit import rate_limited
+
+    model_cls = rate_limited(ScriptedChatModel) if settings.LLM_RATE_LIMIT_ENABLED else ScriptedChatModel
+    fast = model_name("requirements_fast") if fast_routing_enabled() else None
+    fast_latency = args.llm_latency / 3 if args.fast_llm_latency is None else args.fast_llm_latency
+
+    def scripted(name: str, latency: float) -> ScriptedChatModel:
+        # Callbacks attached as build_llm does
+        return model_cls(latency=latency, model_name=name, callbacks=instrumentation_callbacks())
+
+    components.override("llm", scripted(settings.OPENAI_MODEL_NAME, args.llm_latency))
+    for role in ("requirements", "requirements_fast", "planner", "booker"):
+        name = model_name(role)
+        if name != settings.OPENAI_MODEL_NAME:
+            components.override(f"llm:{name}", scripted(name, fast_latency if name == fast else args.llm_latency))
+    components.override("duckduckgo", FakeSearch(latency=args.search_latency))
+
+
+def _llm_usage() -> dict:
+    """Cumulative calls, seconds and tokens per model, from the app's metrics."""
+    from app.core.metrics import LLM_SECONDS, LLM_TOKENS, REQUIREMENTS_ROUTES
+
+    models = {}
+    for (agent, model, status), (count, seconds) in LLM_SECONDS.totals().items():
+        usage = models.setdefault(model, {"calls": 0, "seconds": 0.0, "prompt": 0, "completion": 0})
+        usage["calls"] += count
+        usage["seconds"] += seconds
+    for (agent, model, kind), value in LLM_TOKENS.values().items():
+        usage = models.setdefault(model, {"calls": 0, "seconds": 0.0, "prompt": 0, "completion": 0})
+        if kind in ("prompt", "completion"):
+            usage[kind] += value
+    routes = {route: count for (route,), count in REQUIREMENTS_ROUTES.values().items()}
+    return {"models": models, "routes": routes}
+
+
+def _llm_report(before: dict, after: dict, sessions: int) -> dict:
+    models = {}
+    for model, usage in sorted(after["models"].items()):
+        previous = before["models"].get(model, {})
+        delta = {key: value - previous.get(key, 0) for key, value in usage.items()}
+        if not delta["calls"]:
+            continue
+        price = PRICES.get(model)
+        cost = (delta["prompt"] * price[0] + delta["completion"] * price[1]) / 1e6 if price else None
+        models[model] = {
+            "calls_per_session": round(delta["calls"] / sessions, 2),
+            "mean_ms": round(delta["seconds"] / delta["calls"] * 1000, 1),
+            "tokens_per_session": round((delta["prompt"] + delta["completion"]) / sessions),
+            "usd_per_1k_sessions": round(cost / sessions * 1000, 2) if cost is not None else None,
+        }
+    costs = [m["usd_per_1k_sessions"] for m in models.values()]
+    return {
+        "by_model": models,
+        "usd_per_1k_sessions": round(sum(costs), 2) if None not in costs else None,
+        "requirements_routes": {
+            route: count - before["routes"].get(route, 0) for route, count in sorted(after["routes"].items())
+        },
+    }
+
+
+def _summary(results: list, wall: float, stub_calls: dict, rss_delta: int, llm: dict, args) -> dict:
+    from app.core.checkpoint import checkpoint_usage_report
+    from app.core.rate_limit import llm_limiter
+    from app.core.resilience import resilience_stats
+
+    latencies = [r["seconds"] for r in results if r["outcome"] != "error"] or [0.0]
+    outcomes = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    errors = sorted({r["error"] for r in results if r["error"]})
+    usage = checkpoint_usage_report()
+    sessions = len(results)
+    return {
+        "mode": args.mode,
+        "sessions": sessions,
+        "concurrency": args.concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_sessions_per_s": round(sessions / wall, 2) if wall else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 1),
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+        },
+        "outcomes": outcomes,
+        "errors": errors[:5],
+        "convex_calls_per_session": {
+            path: round(count / sessions, 2) for path, count in sorted(stub_calls.items())
+        },
+        "memory_per_session_kib": {
+            "rss_growth": round(rss_delta / sessions / 1024, 1),
+            "checkpoint_payload": round(usage.get("payload_bytes", 0) / sessions / 1024, 1)
+            if "payload_bytes" in usage
+            else None,
+        },
+        "checkpointer": usage,
+        "convex_resilience": resilience_stats(),
+        "llm": llm,
+        "llm_rate_limit": llm_limiter.stats(),
+    }
+
+
+def _print(summary: dict, peak_traced: int = None) -> None:
+    latency = summary["latency_ms"]
+    memory = summary["memory_per_session_kib"]
+    print(
+        f"{summary['sessions']} sessions, {summary['mode']}, concurrency {summary['concurrency']}: "
+        f"{summary['wall_seconds']:.2f} s, {summary['throughput_sessions_per_s']} sessions/s"
+    )
+    print(
+        f"  latency  mean {latency['mean']:.1f} ms  p50 {latency['p50']:.1f} ms"
+        f"  p99 {latency['p99']:.1f} ms  max {latency['max']:.1f} ms"
+    )
+    print(f"  outcomes {summary['outcomes']}")
+    for error in summary["errors"]:
+        print(f"    {error}")
+    print(f"  convex calls/session {summary['convex_calls_per_session']}")
+    resilience = summary["convex_resilience"]
+    if resilience["retries"] or resilience["hedges"] or set(resilience["breakers"].values()) - {"closed"}:
+        print(
+            f"  convex retries {resilience['retries']}  hedges {resilience['hedges']}"
+            f"  breakers {resilience['breakers']}"
+        )
+    llm = summary["llm"]
+    for model, usage in llm["by_model"].items():
+        cost = usage["usd_per_1k_sessions"]
+        print(
+            f"  llm {model:<14} calls/session {usage['calls_per_session']}  mean {usage['mean_ms']:.1f} ms"
+            f"  tokens/session {usage['tokens_per_session']}"
+            f"  ${cost if cost is not None else '?'} per 1k sessions"
+        )
+    print(f"  llm cost ${llm['usd_per_1k_sessions']} per 1k sessions  requirement turns {llm['requirements_routes']}")
+    limiter = summary["llm_rate_limit"]
+    waited = "  ".join(
+        f"{priority} {w['total']:.2f} s (max {w['max']:.2f} s)" for priority, w in sorted(limiter["waited_seconds"].items())
+    )
+    print(f"  llm admitted {limiter['admitted']}  timeouts {limiter['timeouts']}  queued {waited or '-'}")
+    print(
+        f"  memory/session  RSS growth {memory['rss_growth']} KiB"
+        f"  checkpoint payload {memory['checkpoint_payload']} KiB"
+    )
+    if peak_traced is not None:
+        print(f"  peak traced Python allocations {peak_traced / 1024 / 1024:.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per model call")
+    parser.add_argument("--fast-model", help='REQUIREMENTS_FAST_MODEL_NAME ("" disables routing)')
+    parser.add_argument(
+        "--fast-llm-latency", type=float, help="seconds per fast-model call (default: a third of --llm-latency)"
+    )
+    parser.add_argument("--search-latency", type=float, default=0.0, help="seconds per web search")
+    parser.add_argument("--convex-latency", type=float, default=0.0, help="stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub requests failing with 503")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of stub requests that are slow")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="extra seconds for slow stub requests")
+    # Unlimited by default, so the numbers measure the application rather than the budgets
+    parser.add_argument("--rpm", type=int, default=0, help="LLM requests per minute (0: unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="LLM tokens per minute (0: unlimited)")
+    parser.add_argument("--llm-concurrency", type=int, default=0, help="LLM calls in flight (0: unlimited)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds the user takes to answer")
+    parser.add_argument("--nights", type=int, default=3)
+    parser.add_argument("--checkpointer", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--agent-booking", action="store_true", help="disable the booking fast path")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed sessions run first")
+    parser.add_argument("--tracemalloc", action="store_true", help="trace Python allocations (slower)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the tools' console output")
+    args = parser.parse_args()
+
+    # The tools print every call; at load that is mostly terminal overhead
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as workdir, ConvexStub(
+        latency=args.convex_latency,
+        error_rate=args.error_rate,
+        tail_latency=args.tail_latency,
+        tail_rate=args.tail_rate,
+    ) as stub, quiet:
+        _configure(args, stub, workdir)
+        from app.core.components import components
+
+        graph = components.get("travel_system_graph")
+        run = _run_all if args.mode == "sync" else lambda *a: asyncio.run(_arun_all(*a))
+
+        # Warm-up sessions use indices past the timed ones so they do not
+        # pre-populate the caches for the measured trips
+        run(graph, range(args.sessions, args.sessions + args.warmup), args)
+        stub.calls.clear()
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_before = _rss_bytes()
+        llm_before = _llm_usage()
+        start = time.perf_counter()
+        results = run(graph, range(args.sessions), args)
+        wall = time.perf_counter() - start
+        rss_delta = max(0, _rss_bytes() - rss_before)
+        peak_traced = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+        llm = _llm_report(llm_before, _llm_usage(), len(results))
+        summary = _summary(results, wall, dict(stub.calls), rss_delta, llm, args)
+
+    if args.json:
+        summary["peak_traced_bytes"] = peak_traced
+        print(json.dumps(summary, indent=2))
+    else:
+        _print(summary, peak_traced)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/requirements_compaction.py
+"""Prompt tokens per requirements-loop turn, full history vs compacted history.
+
+Run from the repository root:
+
+    python -m benchmarks.requirements_compaction --turns 20
+
+Each simulated turn has the agent search flights (tool call plus raw payload),
+ask a question and get an answer, which is the growth pattern of the
+ask-user loop. Token counts use the same estimator as the compaction stage.
+"""
+import argparse
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.agents.compaction import compact_messages, estimate_tokens, summarize_requirements
+from app.agents.prompts.travel_system import REQUIREMENTS_AGENT_SYSTEM_PROMPT
+from benchmarks.convex_stub import _flights
+
+
+def _draft(turn: int) -> dict:
+    # Partial CompleteRequirements as the agent would return it mid-conversation
+    return {
+        "traveler": {"adults": 2, "children": 0},
+        "trip": {
+            "type": "round_trip",
+            "origin": {"city": "Tokyo", "airport_iata": "NRT"},
+            "destination": {"city": "Seoul", "airport_iata": "ICN"},
+            "depart_date": "2026-03-10",
+            "return_date": "2026-03-14",
+        },
+        "preferences": {"cabin_class": "economy", "non_stop": True, "max_layovers": 0, "date_flex_days": 2, "interests": ["food", "culture"]},
+        "budget": {"total_currency": "USD", "total_amount": 3000, "flights_amount": 1200, "hotels_amount": 1200},
+        "hotel_prefs": {"stars": "3-4", "area": "central", "room_type": "Standard"},
+        "missing_info": {"missing_info": [f"field_{i}" for i in range(max(0, 8 - turn))], "question": "…"},
+    }
+
+
+def _turn(turn: int) -> list:
+    call_id = f"call_{turn}"
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"id": call_id, "name": "search_flight_availability", "args": {"origin": "NRT", "destination": "ICN"}}],
+        ),
+        ToolMessage(content=json.dumps({"available": True, "options": _flights("NRT", "ICN", 12)}), tool_call_id=call_id),
+        AIMessage(content=f"Question {turn}: could you confirm your preferred departure time and budget split?"),
+        HumanMessage(content=f"Answer {turn}: mornings are best, and keep hotels under 300 USD a night."),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=1500, help="history token budget")
+    parser.add_argument("--keep-last", type=int, default=6)
+    args = parser.parse_args()
+
+    system_tokens = len(REQUIREMENTS_AGENT_SYSTEM_PROMPT) // 4
+    messages = [HumanMessage(content="I want to go to Seoul(ICN) from Tokyo(NRT). My dates are flexible.")]
+    summary = None
+    total_full = total_compact = 0
+
+    print(f"{'turn':>4} {'full history':>13} {'compacted':>10}")
+    for turn in range(1, args.turns + 1):
+        full = system_tokens + estimate_tokens(messages)
+        compact = system_tokens + estimate_tokens(
+            compact_messages(messages, summary, args.budget, args.keep_last)
+        )
+        total_full += full
+        total_compact += compact
+        print(f"{turn:>4} {full:>13} {compact:>10}")
+
+        messages.extend(_turn(turn))
+        summary = summarize_requirements(_draft(turn))
+
+    print(
+        f"total prompt tokens over {args.turns} turns: full {total_full}, "
+        f"compacted {total_compact} ({total_compact / total_full:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
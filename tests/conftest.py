@@ -0,0 +1,40 @@
+import copy
+
+import pytest
+
+
+REQUIREMENTS = {
+    "traveler": {"adults": 1, "children": 0, "contact_name": "Ana Perera", "contact_email": "ana@example.com"},
+    "trip": {
+        "type": "round_trip",
+        "origin": {"city": "Tokyo", "airport_iata": "NRT"},
+        "destination": {"city": "Seoul", "airport_iata": "ICN"},
+        "depart_date": "2026-03-10",
+        "return_date": "2026-03-13",
+    },
+    "preferences": {"cabin_class": "economy", "non_stop": True, "max_layovers": 0, "date_flex_days": 2, "interests": ["food", "culture"]},
+    "budget": {"total_currency": "USD", "total_amount": 1500, "flights_amount": 600, "hotels_amount": 600},
+    "hotel_prefs": {"stars": "3-4", "area": "central", "room_type": "Standard"},
+    "flight_check": {
+        "outbound_query": {"from_iata": "NRT", "to_iata": "ICN", "date": "2026-03-10", "passengers": 1, "cabin": "economy", "non_stop": True},
+        "outbound_result": {
+            "available": True,
+            "top_option": {
+                "flight_id": "fl_NRT_ICN_0",
+                "carrier": "KE",
+                "flight_number": "100",
+                "depart_iso": "2026-03-10T08:30:00",
+                "arrive_iso": "2026-03-10T11:00:00",
+                "price_usd": 180,
+            },
+        },
+    },
+    "user_confirmations": {"accept_outbound_top_option": True},
+    "missing_info": {"missing_info": [], "question": ""},
+}
+
+
+@pytest.fixture
+def requirements() -> dict:
+    """Complete, valid requirements for a Tokyo -> Seoul round trip."""
+    return copy.deepcopy(REQUIREMENTS)
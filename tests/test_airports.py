@@ -0,0 +1,71 @@
+import pytest
+
+from app.agents.airports import AirportIndex, Airport, normalize_name, nearby_airports, resolve_airports
+
+
+def _codes(airports):
+    return [airport.iata for airport in airports]
+
+
+def test_city_returns_every_airport_main_first():
+    assert _codes(resolve_airports("Tokyo")) == ["NRT", "HND"]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("LON", "LHR"),  # metro code, main airport first
+        ("heathrow", "LHR"),
+        ("Bali", "DPS"),  # alias
+        ("São Paulo", "GRU"),  # accents
+        ("London Heathrow Airport", "LHR"),
+        ("Seoul (ICN)", "ICN"),
+    ],
+)
+def test_exact_names_and_codes(query, expected):
+    assert resolve_airports(query)[0].iata == expected
+
+
+def test_prefix_matches_partial_names():
+    assert _codes(resolve_airports("bangk")) == ["BKK", "DMK"]
+
+
+def test_typos_are_tolerated():
+    assert resolve_airports("Kuala Lumpr")[0].iata == "KUL"
+    assert resolve_airports("Heathorw")[0].iata == "LHR"
+
+
+def test_exact_skips_prefix_and_typo_matches():
+    assert resolve_airports("bangk", exact=True) == []
+
+
+def test_unknown_and_blank_queries_find_nothing():
+    assert resolve_airports("Xyzzyville") == []
+    assert resolve_airports("  ") == []
+
+
+def test_normalize_name_drops_generic_words_and_accents():
+    assert normalize_name("Narita International Airport") == "narita"
+    assert normalize_name("Zürich") == "zurich"
+    assert normalize_name("Airport") == "airport"
+
+
+def test_nearby_lists_the_metro_area_first():
+    nearby = nearby_airports("LHR", limit=3)
+
+    assert [airport["iata"] for airport in nearby[:3]] == ["LGW", "STN", "LTN"]
+    assert all(airport["distance_km"] < 100 for airport in nearby)
+
+
+def test_nearby_adds_close_airports_outside_the_metro_area():
+    index = AirportIndex(
+        [
+            Airport("AAA", "Alpha", "Alpha", "XX", "", 10.0, 10.0),
+            Airport("BBB", "Beta", "Beta", "XX", "", 10.5, 10.0),  # ~56 km
+            Airport("CCC", "Gamma", "Gamma", "XX", "", 15.0, 10.0),  # ~556 km
+        ],
+        {},
+    )
+
+    assert [(airport.iata, round(km)) for airport, km in index.nearby("AAA", 5, 200)] == [("BBB", 56)]
+    assert index.nearby("ZZZ", 5, 200) == []
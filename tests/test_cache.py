@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import SQLiteCache, TTLCache
+
+
+class FakeClock:
+    """Stands in for the `time` module inside app.core.cache."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def _cache(**kwargs) -> TTLCache:
+    return TTLCache(maxsize=kwargs.pop("maxsize", 8), ttl=kwargs.pop("ttl", 60.0), **kwargs)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl_and_stale_ttl(clock):
+    cache = _cache(ttl=10.0, stale_ttl=5.0)
+    cache.set("k", "v")
+
+    clock.now += 12
+    assert cache.get("k") == "v"
+    assert cache.stats()["stale_hits"] == 1
+    clock.now += 5
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_uncacheable_values_are_not_stored():
+    cache = _cache(cacheable=lambda value: bool(value))
+    cache.set("empty", [])
+
+    assert cache.get("empty") is None
+    assert len(cache) == 0
+
+
+def test_stale_value_is_served_while_one_refresh_runs(clock):
+    cache = _cache(ttl=10.0, stale_ttl=60.0)
+    cache.set("k", "old")
+    clock.now += 20
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_load("k", loader) == "old"
+    assert refreshed.wait(1.0)
+    for _ in range(100):
+        if cache.get("k") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("k") == "new"
+
+
+def test_concurrent_sync_misses_share_one_load():
+    cache = _cache()
+    calls = 0
+    release = threading.Event()
+
+    def loader():
+        nonlocal calls
+        calls += 1
+        release.wait(1.0)
+        return "hotels"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["hotels"] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_cancelling_the_loading_caller_does_not_fail_the_waiters():
+    cache = _cache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "flights"
+
+    async def scenario():
+        owner = asyncio.create_task(cache.aget_or_load("NRT-ICN", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_load("NRT-ICN", loader))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await waiter
+
+    assert asyncio.run(scenario()) == "flights"
+    assert calls == 1
+    assert cache.get("NRT-ICN") == "flights"
+
+
+def test_async_load_errors_reach_every_waiter_and_are_not_cached():
+    cache = _cache()
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("backend down")
+
+    async def scenario():
+        return await asyncio.gather(
+            cache.aget_or_load("k", loader), cache.aget_or_load("k", loader), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert cache.get("k") is None
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCache(path, "search", ttl=60, max_entries=10).set("q", {"results": ["a"]})
+
+    assert SQLiteCache(path, "search", ttl=60, max_entries=10).get("q") == {"results": ["a"]}
+    assert SQLiteCache(path, "itinerary", ttl=60, max_entries=10).get("q") is None
+
+
+def test_sqlite_cache_expires_and_caps_entries(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "search", ttl=60, max_entries=2)
+    cache.set("short", 1, ttl=5)
+    clock.now += 10
+    assert cache.get("short") is None
+
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
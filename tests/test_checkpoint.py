@@ -0,0 +1,181 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import var_child_runnable_config
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from app.core import checkpoint as checkpoint_module
+from app.core.checkpoint import SQLiteCheckpointSaver
+
+
+class FakeClock:
+    """Stands in for the `time` module inside app.core.checkpoint."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(checkpoint_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"), keep_last=2)
+    yield saver
+    saver.close()
+
+
+def _config(thread_id: str, checkpoint_id: str = None) -> dict:
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def _put(saver, thread_id: str, step: int, parent: dict = None, note: str = "") -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = f"{step:08d}"
+    checkpoint["channel_values"] = {"note": note}
+    return saver.put(parent or _config(thread_id), checkpoint, {"source": "loop", "step": step}, {})
+
+
+def _rows(saver, table: str) -> list:
+    return saver._conn.execute(f"SELECT checkpoint_id FROM {table} ORDER BY checkpoint_id").fetchall()
+
+
+@pytest.mark.parametrize("note", ["short", "long " * 500])
+def test_put_get_and_list_round_trip(saver, note):
+    first = _put(saver, "t1", 1, note=note)
+    second = _put(saver, "t1", 2, parent=first, note=note)
+    saver.put_writes(second, [("messages", ["hi"])], task_id="task-1")
+
+    latest = saver.get_tuple(_config("t1"))
+
+    assert latest.checkpoint["channel_values"] == {"note": note}
+    assert latest.metadata["step"] == 2
+    assert latest.parent_config["configurable"]["checkpoint_id"] == "00000001"
+    assert latest.pending_writes == [("task-1", "messages", ["hi"])]
+    assert saver.get_tuple(_config("t1", "00000001")).checkpoint["id"] == "00000001"
+    assert [item.checkpoint["id"] for item in saver.list(_config("t1"))] == ["00000002", "00000001"]
+    assert [item.checkpoint["id"] for item in saver.list(None, filter={"step": 1})] == ["00000001"]
+    assert saver.get_tuple(_config("unknown")) is None
+
+
+def test_large_payloads_are_compressed(saver):
+    _put(saver, "small", 1, note="short")
+    _put(saver, "large", 1, note="long " * 500)
+
+    types = dict(saver._conn.execute("SELECT thread_id, type FROM checkpoints").fetchall())
+
+    assert not types["small"].endswith("+zlib")
+    assert types["large"].endswith("+zlib")
+
+
+def test_retention_drops_old_checkpoints_with_their_writes(saver):
+    parent = None
+    for step in range(1, 5):
+        parent = _put(saver, "t1", step, parent=parent)
+        saver.put_writes(parent, [("messages", [step])], task_id=f"task-{step}")
+
+    assert _rows(saver, "checkpoints") == [("00000003",), ("00000004",)]
+    assert _rows(saver, "writes") == [("00000003",), ("00000004",)]
+    assert saver.usage_report()["checkpoints"] == 2
+
+
+def test_idle_threads_are_pruned(clock, saver):
+    _put(saver, "idle", 1)
+    clock.now += 100
+    _put(saver, "active", 1)
+
+    assert saver.prune_idle_threads(ttl=50) == 1
+    assert saver.get_tuple(_config("idle")) is None
+    assert saver.get_tuple(_config("active")) is not None
+    assert saver.usage_report()["threads"] == 1
+
+
+def test_put_prunes_idle_threads_every_interval(clock, tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "c.sqlite3"), thread_ttl=50, prune_interval=10)
+    _put(saver, "idle", 1)
+    clock.now += 100
+    _put(saver, "active", 1)
+
+    assert saver.get_tuple(_config("idle")) is None
+    saver.close()
+
+
+class State(TypedDict):
+    question: str
+    answer: str
+
+
+def _ask(state: State) -> dict:
+    return {"answer": interrupt(state["question"])}
+
+
+async def _aask(state: State, config: RunnableConfig) -> dict:
+    # As in requirment_graph: before 3.11 async interrupts need the config set
+    token = var_child_runnable_config.set(config)
+    try:
+        return {"answer": interrupt(state["question"])}
+    finally:
+        var_child_runnable_config.reset(token)
+
+
+def _parent_graph(saver):
+    # Like travel_system_graph: the asking subgraph has no checkpointer of its
+    # own, so its interrupt pauses and checkpoints the parent thread
+    subgraph = StateGraph(State)
+    subgraph.add_node("ask", RunnableLambda(_ask, afunc=_aask))
+    subgraph.add_edge(START, "ask")
+    subgraph.add_edge("ask", END)
+    parent = StateGraph(State)
+    parent.add_node("requirements_subgraph", subgraph.compile())
+    parent.add_node("done", lambda state: {"answer": state["answer"].upper()})
+    parent.add_edge(START, "requirements_subgraph")
+    parent.add_edge("requirements_subgraph", "done")
+    parent.add_edge("done", END)
+    return parent.compile(checkpointer=saver)
+
+
+def test_interrupt_and_resume_through_the_parent_graph(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    config = _config("session-1")
+    saver = SQLiteCheckpointSaver(path)
+
+    paused = _parent_graph(saver).invoke({"question": "Your email?", "answer": ""}, config)
+    saver.close()
+
+    assert paused["__interrupt__"][0].value == "Your email?"
+    # A new process resumes the same thread from the file
+    saver = SQLiteCheckpointSaver(path)
+    result = _parent_graph(saver).invoke(Command(resume="ana@example.com"), config)
+
+    assert result == {"question": "Your email?", "answer": "ANA@EXAMPLE.COM"}
+    assert _parent_graph(saver).get_state(config).next == ()
+    saver.close()
+
+
+def test_async_interrupt_and_resume(saver):
+    graph = _parent_graph(saver)
+    config = _config("session-2")
+
+    async def run():
+        paused = await graph.ainvoke({"question": "Your name?", "answer": ""}, config)
+        resumed = await graph.ainvoke(Command(resume="Ana"), config)
+        return paused, resumed
+
+    paused, resumed = asyncio.run(run())
+
+    assert "__interrupt__" in paused
+    assert resumed["answer"] == "ANA"
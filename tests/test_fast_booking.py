@@ -0,0 +1,197 @@
+import pytest
+
+from app.agents import fast_booking
+from app.agents.fast_booking import (
+    book_from_requirements,
+    bookings_complete,
+    hotel_search_request,
+    merge_bookings,
+    plan_bookings,
+)
+from app.agents.response_models.booker_agent import Bookings, FlightBookingResult, HotelBookingResult
+from app.agents import travel_system_graph
+from app.agents.travel_system_graph import booker_agent_node, hotel_prefetch_node
+from app.core.components import components
+
+
+class FakeTool:
+    """Stand-in for a booking tool: records calls and answers from `respond`."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def invoke(self, args, config=None):
+        self.calls.append(args)
+        return self.respond(args)
+
+    async def ainvoke(self, args, config=None):
+        return self.invoke(args, config)
+
+
+CHEAP = {"_id": "ht_cheap", "stars": 3, "rating": 7.5, "pricePerNight": 90, "roomTypes": ["Standard"]}
+LUXURY = {"_id": "ht_luxury", "stars": 4, "rating": 9.4, "pricePerNight": 400, "roomTypes": ["Standard"]}
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    tools = {
+        "book_flight": FakeTool(lambda args: {"success": True, "booking_id": "fb1", "status": "confirmed", "booking_reference": "ABC123"}),
+        "search_hotels": FakeTool(lambda args: {"available": True, "hotels": [LUXURY, CHEAP]}),
+        "book_hotel": FakeTool(lambda args: {"success": True, "booking_id": "hb1", "status": "confirmed", "booking_reference": "H1", "total_price": 270}),
+    }
+    for name, tool in tools.items():
+        monkeypatch.setattr(fast_booking, name, tool)
+    return tools
+
+
+@pytest.fixture
+def one_way(requirements):
+    requirements["trip"].update(type="one_way", return_date=None)
+    requirements["budget"]["hotels_amount"] = 300
+    return requirements
+
+
+ITINERARY = {"days": [{"date": "2026-03-10"}, {"date": "2026-03-11"}, {"date": "2026-03-12"}]}
+
+
+def test_plan_bookings_reads_every_input(requirements):
+    plan = plan_bookings(requirements, None)
+
+    assert plan.flight_id == "fl_NRT_ICN_0"
+    assert (plan.city, plan.check_in, plan.check_out) == ("Seoul", "2026-03-10", "2026-03-13")
+    assert plan.max_price_per_night == pytest.approx(200.0)
+    assert (plan.stars, plan.area, plan.room_type) == ("3-4", "central", "Standard")
+
+
+def test_one_way_stays_until_the_morning_after_the_itinerary(one_way):
+    plan = plan_bookings(one_way, ITINERARY)
+
+    assert plan.check_out == "2026-03-13"
+    assert plan.max_price_per_night == pytest.approx(100.0)
+    assert plan_bookings(one_way, None) is None
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda r: r["user_confirmations"].update(accept_outbound_top_option=False),
+        lambda r: r["flight_check"]["outbound_result"].update(top_option=None),
+        lambda r: r["traveler"].update(contact_email=None),
+        lambda r: r["trip"].update(return_date="2026-03-10"),
+    ],
+)
+def test_plan_bookings_needs_every_input(requirements, change):
+    change(requirements)
+
+    assert plan_bookings(requirements, None) is None
+
+
+def test_hotel_search_request_is_known_before_the_itinerary(requirements):
+    request = hotel_search_request(requirements)
+
+    assert request["city"] == "Seoul"
+    assert request["max_price_per_night"] == pytest.approx(200.0)
+    assert hotel_search_request({"trip": {}}) is None
+
+
+def test_one_way_trips_are_not_prefetched(one_way, monkeypatch):
+    search = FakeTool(lambda args: {"available": True, "hotels": [CHEAP]})
+    monkeypatch.setattr(travel_system_graph, "search_hotels", search)
+
+    assert hotel_search_request(one_way) is None
+    assert hotel_prefetch_node({"requirements": one_way}) == {"hotel_options": None}
+    assert search.calls == []
+
+
+def test_merge_keeps_the_fast_path_confirmations():
+    flight = FlightBookingResult(booking_id="fb1", status="confirmed", ticket_ref="ABC123", flight_id="fl_1")
+    hotel = HotelBookingResult(booking_id="hb1", status="confirmed", reservation_ref="H1", hotel_id="ht_1", total_price=270)
+    other_hotel = hotel.model_copy(update={"hotel_id": "ht_2"})
+
+    merged = merge_bookings(Bookings(hotels=hotel), Bookings(flights=flight, hotels=other_hotel))
+
+    assert bookings_complete(merged)
+    assert merged.hotels.hotel_id == "ht_1"
+    assert not bookings_complete(Bookings(flights=flight))
+    assert merge_bookings(None, Bookings(flights=flight)).flights == flight
+
+
+def test_one_way_prefetch_without_budget_is_searched_again(tools, one_way):
+    prefetch = {
+        "request": {"city": "Seoul", "check_in": "2026-03-10", "check_out": None, "max_price_per_night": None},
+        "result": {"available": True, "hotels": [LUXURY]},
+    }
+
+    bookings = book_from_requirements(one_way, ITINERARY, prefetch)
+
+    assert tools["search_hotels"].calls[0]["max_price_per_night"] == pytest.approx(100.0)
+    assert bookings.hotels.hotel_id == "ht_cheap"
+
+
+def test_matching_prefetch_is_reused(tools, requirements):
+    plan = plan_bookings(requirements, None)
+    prefetch = {
+        "request": {
+            "city": plan.city,
+            "check_in": plan.check_in,
+            "check_out": plan.check_out,
+            "max_price_per_night": plan.max_price_per_night,
+        },
+        "result": {"available": True, "hotels": [CHEAP]},
+    }
+
+    bookings = book_from_requirements(requirements, None, prefetch)
+
+    assert tools["search_hotels"].calls == []
+    assert bookings.hotels.hotel_id == "ht_cheap"
+
+
+class FakeBookerAgent:
+    """Booker agent stand-in that books the hotel and keeps its prompt."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, state, config=None):
+        self.prompts.append(state["messages"][-1].content)
+        hotel = HotelBookingResult(booking_id="hb2", status="confirmed", reservation_ref="H2", hotel_id="ht_other", total_price=500)
+        return {"structured_response": type("Response", (), {"bookings": Bookings(hotels=hotel)})()}
+
+
+@pytest.fixture
+def booker_agent():
+    agent = FakeBookerAgent()
+    components.override("booker_agent", agent)
+    yield agent
+    components.reset("booker_agent")
+
+
+def test_complete_fast_path_skips_the_agent(tools, booker_agent, requirements):
+    update = booker_agent_node({"requirements": requirements, "itinerary": None}, {})
+
+    assert booker_agent.prompts == []
+    assert update["bookings"]["flights"]["booking_id"] == "fb1"
+    assert update["bookings"]["hotels"]["hotel_id"] == "ht_cheap"
+
+
+def test_no_matching_hotel_falls_back_to_the_agent(tools, booker_agent, requirements):
+    tools["search_hotels"].respond = lambda args: {"available": True, "hotels": [LUXURY]}
+
+    update = booker_agent_node({"requirements": requirements, "itinerary": None}, {})
+
+    assert len(booker_agent.prompts) == 1
+    assert "ALREADY BOOKED" in booker_agent.prompts[0]
+    assert len(tools["book_flight"].calls) == 1
+    assert update["bookings"]["flights"]["booking_id"] == "fb1"
+    assert update["bookings"]["hotels"]["hotel_id"] == "ht_other"
+
+
+def test_failed_flight_booking_falls_back_to_the_agent(tools, booker_agent, requirements):
+    tools["book_flight"].respond = lambda args: {"success": False, "error": "Flight is full"}
+
+    update = booker_agent_node({"requirements": requirements, "itinerary": None}, {})
+
+    assert len(booker_agent.prompts) == 1
+    # The fast path's hotel confirmation wins over the agent's
+    assert update["bookings"]["hotels"]["hotel_id"] == "ht_cheap"
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from app.agents.tools.booker_tools import hotel_price_per_night
+from app.agents.tools.flight_tools import (
+    _calendar_dates,
+    _search_flight_calendar,
+    project_flight,
+    search_flight_calendar,
+    select_flights,
+)
+
+
+def _tool_call(args: dict) -> dict:
+    graph = StateGraph(MessagesState)
+    graph.add_node("tools", ToolNode([search_flight_calendar]))
+    graph.add_edge(START, "tools")
+    message = AIMessage(content="", tool_calls=[{"name": "search_flight_calendar", "args": args, "id": "call-1"}])
+    return graph.compile().invoke({"messages": [message]})["messages"][-1]
+
+
+@pytest.mark.parametrize("center_date", ["next friday", "2026/03/10"])
+def test_calendar_rejects_a_non_iso_center_date_as_a_tool_error(center_date):
+    reply = _tool_call({"origin": "CMB", "destination": "BKK", "center_date": center_date, "flex_days": 2})
+
+    assert reply.status == "error"
+    assert "center_date" in reply.content
+
+
+def test_calendar_called_directly_with_a_bad_date_returns_an_error():
+    result = _search_flight_calendar("CMB", "BKK", "next friday", 2)
+
+    assert result["available"] is False
+    assert "YYYY-MM-DD" in result["error"]
+
+
+def test_calendar_dates_span_the_flex_window():
+    assert _calendar_dates(date(2026, 3, 10), 1) == ["2026-03-09", "2026-03-10", "2026-03-11"]
+    assert _calendar_dates("2026-03-01", 1)[0] == "2026-02-28"
+
+
+def test_unparseable_stops_and_prices_do_not_break_selection():
+    flights = [
+        {"_id": "f1", "price": "$420", "stops": "1 stop"},
+        {"_id": "f2", "price": "380.5", "stops": "0"},
+        {"_id": "f3", "price": 900, "stops": [{"airport": "DOH"}]},
+    ]
+
+    result = select_flights(flights, max_layovers=0, max_price=500)
+
+    assert [o["flight_id"] for o in result["options"]] == ["f2", "f1"]
+    assert project_flight(flights[0])["price_usd"] is None
+    assert project_flight(flights[0])["stops"] is None
+    assert hotel_price_per_night({"pricePerNight": "$120"}) is None
+
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.config import settings
+from app.core import http
+from app.core.http import (
+    aclose_convex_client,
+    close_convex_session,
+    convex_url,
+    get_async_convex_client,
+    get_convex_session,
+)
+
+
+def test_tools_share_one_pooled_session(monkeypatch):
+    monkeypatch.setattr(settings, "CONVEX_POOL_MAXSIZE", 7)
+    close_convex_session()
+    try:
+        session = get_convex_session()
+
+        assert get_convex_session() is session
+        adapter = session.get_adapter("https://convex.test")
+        assert adapter._pool_maxsize == 7
+        assert session.get_adapter("http://convex.test") is adapter
+    finally:
+        close_convex_session()
+    assert http._session is None
+
+
+def test_async_client_is_reused_within_a_loop_and_not_across_loops():
+    async def clients():
+        first, second = get_async_convex_client(), get_async_convex_client()
+        await aclose_convex_client()
+        return first, second
+
+    first, second = asyncio.run(clients())
+    other, _ = asyncio.run(clients())
+
+    assert first is second
+    assert other is not first
+    assert first.is_closed
+
+
+def test_convex_url_joins_without_double_slashes(monkeypatch):
+    monkeypatch.setattr(settings, "CONVEX_BASE_URL", "https://convex.test/")
+
+    assert convex_url("/flights/search") == "https://convex.test/flights/search"
@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+from app.core import metrics
+from app.core.metrics import MetricsCallbackHandler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+def _start_tool(handler, name="search_flights"):
+    run_id = uuid4()
+    handler.on_tool_start({"name": name}, "{}", run_id=run_id)
+    return run_id
+
+
+def test_finished_spans_are_not_kept_open():
+    handler = MetricsCallbackHandler()
+    run_id = _start_tool(handler)
+    handler.on_tool_end("ok", run_id=run_id)
+
+    assert len(handler._open) == 0
+
+
+def test_spans_that_never_end_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics, "time", clock)
+    handler = MetricsCallbackHandler(open_span_ttl=60)
+    abandoned = _start_tool(handler)
+    clock.now += 30
+    recent = _start_tool(handler)
+    clock.now += 40
+
+    current = _start_tool(handler)
+
+    assert list(handler._open) == [recent, current]
+    handler.on_tool_end("ok", run_id=abandoned)  # ending a dropped span is a no-op
+    assert list(handler._open) == [recent, current]
+
+
+def test_open_spans_are_capped():
+    handler = MetricsCallbackHandler(max_open_spans=3)
+    run_ids = [_start_tool(handler) for _ in range(5)]
+
+    assert list(handler._open) == run_ids[-3:]
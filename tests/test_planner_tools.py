@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from app.agents.tools import planner_tools
+from app.core.cache import SQLiteCache
+from app.core.components import components
+
+
+class FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    async def ainvoke(self, query):
+        self.queries.append(query)
+        return f"Results for {query}. " * 5
+
+
+def test_async_web_search_keeps_cache_io_off_the_event_loop(tmp_path, monkeypatch):
+    cache = SQLiteCache(path=str(tmp_path / "search.sqlite3"), namespace="search", ttl=60, max_entries=100)
+    get = cache.get
+
+    def slow_get(key):
+        time.sleep(0.2)  # a busy database file
+        return get(key)
+
+    monkeypatch.setattr(cache, "get", slow_get)
+    monkeypatch.setattr(planner_tools, "search_cache", cache)
+    search = FakeSearch()
+    components.override("duckduckgo", search)
+
+    async def main():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        first = await planner_tools._aweb_search("Seoul  food")
+        second = await planner_tools._aweb_search("seoul food")
+        beat.cancel()
+        return first, second, ticks
+
+    try:
+        first, second, ticks = asyncio.run(main())
+    finally:
+        components.reset("duckduckgo")
+
+    assert first == second
+    assert search.queries == ["Seoul  food"]
+    # Two 0.2 s cache reads; a blocked loop would not have ticked meanwhile
+    assert ticks >= 20
+
+
+def test_search_key_ignores_case_and_punctuation_but_not_word_order():
+    key = planner_tools.normalize_search_query
+
+    assert key("Seoul food tours") == key("  seoul  FOOD-tours! ")
+    assert key("flights from Tokyo to Seoul") != key("flights from Seoul to Tokyo")
+    assert key("Bora Bora beaches") == "bora bora beaches"
@@ -0,0 +1,155 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app import config
+from app.core.rate_limit import LLMQueueTimeout, LLMRateLimiter
+
+
+async def _loop_stalls(work, interval=0.01):
+    """Longest gap between ticks of a heartbeat task while `work` runs."""
+    longest = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal longest
+        last = time.monotonic()
+        while not done:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            longest = max(longest, now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(interval)
+    try:
+        await work
+    finally:
+        done = True
+        await beat
+    return longest
+
+
+def test_sqlite_budget_transactions_run_off_the_event_loop(tmp_path):
+    limiter = LLMRateLimiter(0, 0, 0, 5.0, backend="sqlite", path=str(tmp_path / "budget.sqlite3"))
+    take = limiter._budget.take
+
+    def slow_take(tokens):
+        time.sleep(0.2)  # another process holding the database lock
+        return take(tokens)
+
+    limiter._budget.take = slow_take
+
+    async def call():
+        async with limiter.aadmit(100) as ticket:
+            await ticket.asettle(80)
+
+    stall = asyncio.run(_loop_stalls(call()))
+
+    assert stall < 0.1
+    assert limiter.stats()["admitted"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_locked_sqlite_budget_does_not_hold_the_limiter_lock(tmp_path):
+    path = str(tmp_path / "budget.sqlite3")
+    limiter = LLMRateLimiter(60, 1000, 0, 5.0, backend="sqlite", path=path)
+    with limiter.admit(100) as ticket:
+        pass
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # another process mid-transaction
+    try:
+        ticket.settle(50)  # carried over instead of waiting for the lock
+        admitted = threading.Event()
+
+        def call():
+            with limiter.admit(100):
+                admitted.set()
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        stats = limiter.stats()
+        assert time.monotonic() - started < 0.1
+        assert stats["queued"]["background"] == 1
+        assert not admitted.is_set()
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    thread.join(2.0)
+    assert admitted.is_set()
+    levels = dict(sqlite3.connect(path).execute("SELECT name, level FROM llm_budget"))
+    assert levels["tokens"] == pytest.approx(1000 - 100 + 50 - 100, abs=5)
+
+
+def test_unknown_backend_is_reported_by_validate_settings(monkeypatch):
+    monkeypatch.setattr(config.settings, "LLM_RATE_LIMIT_BACKEND", "redis")
+
+    assert LLMRateLimiter(0, 0, 0, 5.0, backend="redis").stats()["admitted"] == 0
+    with pytest.raises(ValueError, match="LLM_RATE_LIMIT_BACKEND"):
+        config.validate_settings("LLM_RATE_LIMIT_BACKEND")
+
+
+def test_async_admission_respects_the_concurrency_cap():
+    limiter = LLMRateLimiter(0, 0, 2, 5.0)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter.aadmit(10):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == 2
+    assert limiter.stats()["admitted"] == 6
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = LLMRateLimiter(0, 0, 1, 5.0)
+
+    async def call(hold):
+        async with limiter.aadmit(10):
+            await hold.wait()
+
+    async def main():
+        hold = asyncio.Event()
+        holder = asyncio.create_task(call(hold))
+        waiter = asyncio.create_task(call(hold))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queued"]["background"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        hold.set()
+        await holder
+
+    asyncio.run(main())
+
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queued"]["background"] == 0
+    assert stats["admitted"] == 1
+
+
+def test_request_budget_times_out_when_exhausted():
+    limiter = LLMRateLimiter(1, 0, 0, 0.05)
+
+    with limiter.admit(10):
+        pass
+    with pytest.raises(LLMQueueTimeout):
+        with limiter.admit(10):
+            pass
+    assert limiter.stats()["timeouts"] == 1
@@ -0,0 +1,183 @@
+from datetime import date
+
+import pytest
+
+from app.agents.requirements_extraction import (
+    extract_answer,
+    fill_missing,
+    find_dates,
+    normalize_iata,
+    parse_date,
+    validate_requirements,
+)
+
+
+TODAY = date(2026, 1, 15)
+
+
+def _awaiting(requirements: dict, *missing: str) -> dict:
+    """Summary of a turn that asked the user for `missing`."""
+    requirements["user_confirmations"]["accept_outbound_top_option"] = False
+    return {"still_missing": list(missing), "extracted": requirements}
+
+
+@pytest.mark.parametrize("answer", ["yes", "Yes please", "Sounds good, book it", "ok"])
+def test_plain_confirmation_completes_in_code(requirements, answer):
+    summary = _awaiting(requirements, "user_confirmations.accept_outbound_top_option")
+
+    completed = fill_missing(summary, answer, TODAY)
+
+    assert completed is not None
+    assert completed["user_confirmations"]["accept_outbound_top_option"] is True
+
+
+@pytest.mark.parametrize(
+    "answer",
+    [
+        "ok but not that one, I want a later departure",
+        "Yes, but can you find a cheaper flight instead?",
+        "no",
+        "ok, is there an earlier one?",
+        "sure, what about a different airline",
+        "yes I guess it is fine if nothing else works out for us",
+    ],
+)
+def test_qualified_or_negative_reply_goes_to_the_llm(requirements, answer):
+    summary = _awaiting(requirements, "user_confirmations.accept_outbound_top_option")
+
+    assert fill_missing(summary, answer, TODAY) is None
+
+
+def test_qualified_reply_is_not_read_as_a_yes():
+    values, _ = extract_answer("ok but not that one, I want a later departure")
+
+    assert "accept_outbound_top_option" not in values
+
+
+def test_contact_details_with_some_chatter_still_fill(requirements):
+    requirements["traveler"]["contact_email"] = None
+    summary = {"still_missing": ["traveler.contact_email"], "extracted": requirements}
+
+    completed = fill_missing(summary, "sure, you can reach me at ana@example.com any time", TODAY)
+
+    assert completed["traveler"]["contact_email"] == "ana@example.com"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("2026-03-10", "2026-03-10"),
+        ("2026/3/9", "2026-03-09"),
+        ("March 10, 2026", "2026-03-10"),
+        ("10th of March 2026", "2026-03-10"),
+        ("Mar. 2", "2026-03-02"),  # next such day from TODAY
+        ("Jan 3", "2027-01-03"),  # already past this year
+        ("Feb 30, 2026", None),
+        ("next friday", None),
+    ],
+)
+def test_parse_date(text, expected):
+    assert parse_date(text, TODAY) == expected
+
+
+def test_parse_date_rejects_ambiguous_text():
+    assert parse_date("March 10 to March 13", TODAY) is None
+    assert [iso for _, iso in find_dates("March 10 to March 13", TODAY)] == ["2026-03-10", "2026-03-13"]
+
+
+@pytest.mark.parametrize("value, expected", [("icn", "ICN"), (" ICN ", "ICN"), ("Seoul (icn)", "ICN"), ("Seoul", None), (None, None)])
+def test_normalize_iata(value, expected):
+    assert normalize_iata(value) == expected
+
+
+def test_valid_requirements_have_no_problems(requirements):
+    normalized, problems = validate_requirements(requirements, TODAY)
+
+    assert problems == []
+    assert normalized == requirements
+
+
+def test_repairable_values_are_normalized(requirements):
+    requirements["trip"].update(type="Round Trip", depart_date="March 10, 2026", return_date="2026/03/13")
+    requirements["trip"]["origin"]["airport_iata"] = "Tokyo Narita (nrt)"
+    requirements["trip"]["destination"] = {"city": "", "airport_iata": "icn"}
+
+    normalized, problems = validate_requirements(requirements, TODAY)
+
+    assert problems == []
+    trip = normalized["trip"]
+    assert (trip["type"], trip["depart_date"], trip["return_date"]) == ("round_trip", "2026-03-10", "2026-03-13")
+    assert trip["origin"]["airport_iata"] == "NRT"
+    assert trip["destination"] == {"city": "Seoul", "airport_iata": "ICN"}
+
+
+def test_missing_code_is_looked_up_from_a_single_airport_city(requirements):
+    requirements["trip"]["destination"] = {"city": "Denpasar", "airport_iata": None}
+
+    normalized, problems = validate_requirements(requirements, TODAY)
+
+    assert problems == []
+    assert normalized["trip"]["destination"]["airport_iata"] == "DPS"
+
+
+def test_city_with_several_airports_is_asked_about(requirements):
+    requirements["trip"]["origin"] = {"city": "Tokyo", "airport_iata": "TYO"}
+
+    _, problems = validate_requirements(requirements, TODAY)
+
+    assert [field for field, _ in problems] == ["trip.origin.airport_iata"]
+    assert "NRT" in problems[0][1] and "HND" in problems[0][1]
+
+
+def test_rule_violations_become_questions(requirements):
+    requirements["trip"].update(depart_date="2026-03-13", return_date="2026-03-10")
+    requirements["trip"]["destination"]["airport_iata"] = "NRT"
+    requirements["traveler"].update(adults=0, contact_email="ana at example")
+
+    _, problems = validate_requirements(requirements, TODAY)
+
+    assert sorted(field for field, _ in problems) == [
+        "traveler.adults",
+        "traveler.contact_email",
+        "trip.destination.airport_iata",
+        "trip.return_date",
+    ]
+
+
+def test_round_trip_without_return_date_is_a_problem(requirements):
+    requirements["trip"]["return_date"] = None
+
+    _, problems = validate_requirements(requirements, TODAY)
+
+    assert [field for field, _ in problems] == ["trip.return_date"]
+
+
+@pytest.mark.parametrize("answer", ["John.Smith@example.com", "Ana@mail.com", "  ana.perera+trips@example.co.uk "])
+def test_email_only_answer_sets_no_name(requirements, answer):
+    values, _ = extract_answer(answer)
+    requirements["traveler"].update(contact_name=None, contact_email=None)
+    summary = {"still_missing": ["traveler.contact_name", "traveler.contact_email"], "extracted": requirements}
+
+    assert "contact_name" not in values
+    assert values["contact_email"] == answer.strip()
+    assert fill_missing(summary, answer, TODAY) is None
+
+
+@pytest.mark.parametrize(
+    "answer",
+    ["Ana Perera ana@example.com", "Ana Perera <ana@example.com>", "Ana Perera, ana@example.com", "My name is Ana Perera, ana@example.com"],
+)
+def test_name_before_the_email_is_read(requirements, answer):
+    requirements["traveler"].update(contact_name=None, contact_email=None)
+    summary = {"still_missing": ["traveler.contact_name", "traveler.contact_email"], "extracted": requirements}
+
+    completed = fill_missing(summary, answer, TODAY)
+
+    assert completed["traveler"]["contact_name"] == "Ana Perera"
+    assert completed["traveler"]["contact_email"] == "ana@example.com"
+
+
+def test_name_overlapping_the_email_is_ignored():
+    values, _ = extract_answer("My name is John.Smith@example.com")
+
+    assert "contact_name" not in values
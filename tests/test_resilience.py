@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import requests
+
+from app.config import settings
+from app.core import resilience
+from app.core.resilience import CircuitBreaker, CircuitOpenError, aconvex_get, convex_get, convex_post
+
+
+def _response(status: int, body: dict, headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.headers.update(headers or {})
+    response.url = "http://convex.test"
+    return response
+
+
+class FakeSession:
+    """Answers requests from a script of responses or exceptions, in order."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, timeout))
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def fast_policy(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(settings, "CONVEX_BASE_URL", "http://convex.test")
+    monkeypatch.setattr(settings, "CONVEX_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "CONVEX_SEARCH_RETRIES", 2)
+    monkeypatch.setattr(settings, "CONVEX_BREAKER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CONVEX_HEDGE_AFTER_SECONDS", 0.0)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(*script):
+        fake = FakeSession(*script)
+        monkeypatch.setattr(resilience, "get_convex_session", lambda: fake)
+        return fake
+
+    return install
+
+
+def test_search_is_retried_on_server_errors(session):
+    fake = session(_response(503, {}), requests.exceptions.ConnectTimeout(), _response(200, {"flights": []}))
+
+    assert convex_get("/flights/search") == {"flights": []}
+    assert len(fake.calls) == 3
+
+
+def test_search_gives_up_after_the_retry_budget(session):
+    fake = session(*[_response(502, {})] * 3)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        convex_get("/flights/search")
+    assert len(fake.calls) == 3
+
+
+def test_client_errors_are_not_retried(session):
+    fake = session(_response(404, {}))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        convex_get("/flights/search")
+    assert len(fake.calls) == 1
+
+
+def test_bookings_are_never_retried(session):
+    fake = session(requests.exceptions.ReadTimeout(), _response(200, {"success": True}))
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        convex_post("/flights/book", {"flight_id": "fl_1"})
+    assert len(fake.calls) == 1
+
+
+def test_attempt_timeouts_are_clipped_to_the_deadline(session, monkeypatch):
+    monkeypatch.setattr(settings, "CONVEX_SEARCH_DEADLINE_SECONDS", 1.0)
+    fake = session(_response(200, {}))
+
+    convex_get("/flights/search")
+
+    connect, read = fake.calls[0][2]
+    assert connect <= 1.0 and read <= 1.0
+
+
+def test_open_circuit_fails_fast(session, monkeypatch):
+    monkeypatch.setattr(settings, "CONVEX_SEARCH_RETRIES", 0)
+    fake = session(*[_response(500, {})] * 3)
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            convex_get("/hotels/search")
+    with pytest.raises(CircuitOpenError):
+        convex_get("/hotels/search")
+    assert len(fake.calls) == 3
+    assert resilience.breaker_states()["/hotels/search"] == "open"
+
+
+def test_breaker_lets_one_trial_through_after_the_reset_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker("/x", failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_async_search_honours_retry_after(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        return httpx.Response(200, json={"hotels": []})
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(resilience, "get_async_convex_client", lambda: client)
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await aconvex_get("/hotels/search", {"city": "Seoul"})
+            return result, loop.time() - started
+        finally:
+            await client.aclose()
+
+    result, elapsed = asyncio.run(main())
+
+    assert result == {"hotels": []}
+    assert len(calls) == 2
+    assert elapsed >= 0.05
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.sessions import RunEvents, SessionStore
+from app.core.components import components
+
+
+class ScriptedGraph:
+    """Graph stand-in: each run streams one update per queued answer, then pauses."""
+
+    def __init__(self):
+        self.runs = 0
+
+    async def astream(self, graph_input, config, stream_mode=None, subgraphs=False):
+        self.runs += 1
+        yield (), "updates", {"requirements": {"run": self.runs}}
+        yield (), "updates", {"__interrupt__": [SimpleNamespace(value=f"question {self.runs}")]}
+
+    async def aget_state(self, config):
+        return SimpleNamespace(next=("ask",), values={})
+
+
+@pytest.fixture
+def graph():
+    graph = ScriptedGraph()
+    components.override("travel_system_graph", graph)
+    yield graph
+    components.reset("travel_system_graph")
+
+
+async def _collect(store: SessionStore, session) -> list:
+    return [chunk async for chunk in store.stream(session) if not chunk.startswith(":")]
+
+
+def _names(chunks: list) -> list:
+    return [chunk.split("\n", 1)[0].removeprefix("event: ") for chunk in chunks]
+
+
+def test_unread_events_of_a_run_do_not_leak_into_the_next(graph):
+    async def scenario():
+        store = SessionStore(ttl=0)
+        session = store.create()
+        store.start_run(session, {"messages": []})
+        await session.task  # nobody subscribed to the first run
+        store.start_run(session, "answer")
+        chunks = await _collect(store, session)
+        return chunks
+
+    chunks = asyncio.run(scenario())
+
+    assert _names(chunks) == ["update", "interrupt", "end"]
+    assert '"run": 2' in chunks[0]
+    assert "question 2" in chunks[1]
+
+
+def test_several_subscribers_each_get_the_whole_run(graph):
+    async def scenario():
+        store = SessionStore(ttl=0)
+        session = store.create()
+        store.start_run(session, {"messages": []})
+        early, late = asyncio.create_task(_collect(store, session)), None
+        await session.task
+        late = await _collect(store, session)
+        return await early, late, session.subscribers
+
+    early, late, subscribers = asyncio.run(scenario())
+
+    assert _names(early) == _names(late) == ["update", "interrupt", "end"]
+    assert subscribers == 0
+
+
+def test_event_log_is_bounded_and_keeps_the_end():
+    async def scenario():
+        events = RunEvents(maxlen=3)
+        for index in range(10):
+            await events.publish("token", index)
+        await events.publish("end", {})
+        return events.read(0)
+
+    batch, position = asyncio.run(scenario())
+
+    assert [data for _, data in batch] == [8, 9, {}]
+    assert position == 11
+
+
+def test_idle_sessions_are_evicted_after_the_ttl(graph):
+    async def scenario():
+        store = SessionStore(ttl=60)
+        idle, busy = store.create(), store.create()
+        store.start_run(busy, {"messages": []})
+        idle.last_active -= 120
+        busy.last_active -= 120
+        evicted = store.evict_idle(force=True)
+        await busy.task
+        return store, idle, busy, evicted
+
+    store, idle, busy, evicted = asyncio.run(scenario())
+
+    assert evicted == 1
+    assert store.get(idle.session_id) is None
+    assert store.get(busy.session_id) is busy
+
+
+class HangingGraph(ScriptedGraph):
+    """Streams one update, then never finishes."""
+
+    async def astream(self, graph_input, config, stream_mode=None, subgraphs=False):
+        yield (), "updates", {"requirements": {"run": 1}}
+        await asyncio.Event().wait()
+
+
+def test_cancelled_run_ends_with_a_cancelled_status():
+    components.override("travel_system_graph", HangingGraph())
+
+    async def scenario():
+        store = SessionStore(ttl=0)
+        session = store.create()
+        store.start_run(session, {"messages": []})
+        subscriber = asyncio.create_task(_collect(store, session))
+        await asyncio.sleep(0.01)
+        session.task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await session.task
+        return session, await subscriber
+
+    try:
+        session, chunks = asyncio.run(scenario())
+    finally:
+        components.reset("travel_system_graph")
+
+    assert session.status == "cancelled"
+    assert not session.running
+    assert _names(chunks) == ["update", "end"]
+    assert '"status": "cancelled"' in chunks[-1]